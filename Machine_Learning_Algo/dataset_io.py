@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+
+import pandas as pd
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+# Low-cardinality label columns are stored as categoricals (codes + a small
+# dictionary) instead of one Python string per row
+CATEGORICAL_COLUMNS = ["label_source", "label_topic", "sender_domain"]
+DATE_COLUMNS = ["deadline_date"]
+
+
+# ----------------------------------------------------------
+# Typing
+# ----------------------------------------------------------
+
+def normalize(df):
+    """Applies the corpus schema in place: categoricals, real timestamps, "" for missing text."""
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS:
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].fillna("").astype(str).astype("category")
+        elif col in DATE_COLUMNS:
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                values = df[col].replace("", None)
+                # Our own exports are ISO; dayfirst only for the hand-entered dd/mm/yyyy
+                # values, or 2024-11-09 would come back as 11 September
+                parsed = pd.to_datetime(values, errors="coerce", format="%Y-%m-%d")
+                rest = parsed.isna() & values.notna()
+                if rest.any():
+                    parsed[rest] = pd.to_datetime(values[rest], errors="coerce", format="mixed", dayfirst=True)
+                df[col] = parsed
+    return df
+
+
+def ensure_categories(df, column, values):
+    """Makes `values` assignable to a categorical column (e.g. labels not seen in the file yet)."""
+    if isinstance(df[column].dtype, pd.CategoricalDtype):
+        missing = [v for v in dict.fromkeys(values) if v not in df[column].cat.categories]
+        if missing:
+            df[column] = df[column].cat.add_categories(missing)
+    return df
+
+
+# ----------------------------------------------------------
+# Read / write
+# ----------------------------------------------------------
+
+def is_parquet(path):
+    return str(path).lower().endswith((".parquet", ".pq"))
+
+
+def read_dataset(path, columns=None):
+    """
+    Loads a corpus file as a typed DataFrame. Parquet only reads the requested
+    `columns` from disk; CSV (the old format) is parsed and typed the same way.
+    """
+    if is_parquet(path):
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, usecols=columns)
+    return normalize(df)
+
+
+def write_dataset(df, path):
+    """Writes Parquet, or a plain CSV export when `path` ends in .csv. Atomic either way."""
+    tmp = f"{path}.tmp"
+    if is_parquet(path):
+        normalize(df.copy()).to_parquet(tmp, index=False)
+    else:
+        export = df.copy()
+        for col in DATE_COLUMNS:
+            if col in export.columns and pd.api.types.is_datetime64_any_dtype(export[col]):
+                export[col] = export[col].dt.strftime("%Y-%m-%d").fillna("")
+        export.to_csv(tmp, index=False, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def parquet_path(path):
+    """Sibling .parquet path for a .csv path."""
+    return os.path.splitext(path)[0] + ".parquet"
+
+
+# ----------------------------------------------------------
+# Convert + compare (python dataset_io.py <file.csv>)
+# ----------------------------------------------------------
+
+def compare_formats(csv_path):
+    target = parquet_path(csv_path)
+    write_dataset(read_dataset(csv_path), target)
+
+    for label, load in [
+        ("CSV (dtype=str)", lambda: pd.read_csv(csv_path, dtype=str, keep_default_na=False)),
+        ("Parquet", lambda: read_dataset(target)),
+        ("Parquet, labels only", lambda: read_dataset(target, columns=["label_source", "label_topic"])),
+    ]:
+        start = time.perf_counter()
+        df = load()
+        elapsed = time.perf_counter() - start
+        size_mb = df.memory_usage(deep=True).sum() / 1e6
+        print(f"{label:<22} load {elapsed * 1000:7.1f} ms   in memory {size_mb:7.2f} MB")
+
+    print(f"On disk: CSV {os.path.getsize(csv_path) / 1e6:.2f} MB, Parquet {os.path.getsize(target) / 1e6:.2f} MB")
+    print(f"Written: {target}")
+    check_round_trip(csv_path)
+
+
+def check_round_trip(csv_path, rounds=2):
+    """Export -> read -> export again must keep every date (chained runs re-read our CSV exports)."""
+    original = read_dataset(csv_path)
+    df = original
+    export = f"{csv_path}.roundtrip.csv"
+    try:
+        for _ in range(rounds):
+            write_dataset(df, export)
+            df = read_dataset(export)
+    finally:
+        if os.path.exists(export):
+            os.remove(export)
+    for col in DATE_COLUMNS:
+        if col in original.columns:
+            changed = (original[col] != df[col]) & ~(original[col].isna() & df[col].isna())
+            assert not changed.any(), f"{changed.sum()} {col} values changed after {rounds} round trips"
+            print(f"{col}: {original[col].notna().sum()} dates survive {rounds} CSV round trips")
+
+
+if __name__ == "__main__":
+    compare_formats(sys.argv[1] if len(sys.argv) > 1 else os.path.join("output_20260103_222919", "source_labeled_dataset.csv"))
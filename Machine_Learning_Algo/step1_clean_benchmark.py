@@ -0,0 +1,68 @@
+import glob
+import os
+import re
+import time
+
+import pandas as pd
+
+from step1_preprocessing import clean_many, clean_text
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+INPUT_GLOB = os.path.join("..", "data", "*_all_emails*.csv")
+WORKERS = sorted({1, os.cpu_count() or 1})   # pool only pays off with spare cores
+
+
+# ----------------------------------------------------------
+# Reference: clean_text as it was in "step1 Dataset cleaning.ipynb"
+# ----------------------------------------------------------
+
+def legacy_clean_text(text):
+    text = str(text)
+    text = re.sub(r"(?is)disclaimer[:].*", "", str(text)).strip()
+    text = re.sub(
+        r"(?is)(thanks[,.]?$|regards[,.]?$|warm regards[,.]?$|best wishes[,.]?$)",
+        "",
+        text
+    )
+    text = re.sub(r"(?is)(thanks|regards)[\s\S]{0,200}$", "", text)
+    text = re.sub(r"http\S+|www\.\S+", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.lower()
+
+
+def load_raw_texts():
+    texts = []
+    for path in sorted(glob.glob(INPUT_GLOB)):
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        texts.extend((df["subject"].astype(str) + " " + df["content"].astype(str)).tolist())
+        print(f"Loaded {len(df)} emails from {path}")
+    return texts
+
+
+if __name__ == "__main__":
+    texts = load_raw_texts()
+    print(f"{len(texts)} emails, {sum(map(len, texts)) / 1e6:.1f}M chars")
+
+    start = time.perf_counter()
+    expected = [legacy_clean_text(t) for t in texts]
+    legacy_time = time.perf_counter() - start
+    print(f"Notebook clean_text:  {legacy_time:.2f}s")
+
+    for workers in WORKERS:
+        start = time.perf_counter()
+        actual = list(clean_many(texts, workers=workers))
+        elapsed = time.perf_counter() - start
+        print(f"clean_many workers={workers}: {elapsed:.2f}s ({legacy_time / elapsed:.1f}x)")
+        assert actual == expected, "clean_many output differs from the notebook clean_text"
+
+    # Edge cases around the signature/closing rules
+    samples = [
+        "hello\nthanks", "hi warm regards.", "x " * 150 + "regards " + "y" * 200,
+        "a http://x b www.y.com\tc", "body DISCLAIMER: legal", "foohttp://x", "Regards\n" + "z" * 200 + "\nq",
+    ]
+    for s in samples:
+        assert clean_text(s) == legacy_clean_text(s), s
+    print("OK – output identical")
@@ -0,0 +1,214 @@
+import hashlib
+import os
+import re
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dataset_io import write_dataset
+from step1_preprocessing import prepare_dataset
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+DATA_DIR = os.path.join("..", "data")
+OUTPUT_DIR = "corpus"
+EXPORT_EXTENSIONS = (".csv", ".xlsx")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+
+# Columns every export is normalised to (Gmail API export layout)
+EXPORT_COLUMNS = ["id", "threadId", "from", "subject", "date", "labelIds", "snippet", "content"]
+# Renamed so prepare_dataset (which drops the notebook's id columns) keeps them
+RENAME_COLUMNS = {"id": "message_id", "threadId": "thread_id", "labelIds": "label_ids"}
+
+# Near-duplicate detection: MinHash over word 5-grams, LSH with BANDS x ROWS
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+NEAR_DUP_THRESHOLD = 0.8      # estimated Jaccard similarity to call two emails the same broadcast
+MINHASH_PRIME = (1 << 31) - 1
+MINHASH_SEED = 1234
+
+STUDENT_RE = re.compile(r"([0-9a-z]+)_all_emails", re.IGNORECASE)
+
+
+# ----------------------------------------------------------
+# Discovery + reading
+# ----------------------------------------------------------
+
+def discover_exports(data_dir=DATA_DIR):
+    """
+    Returns [(path, student, mailbox)] for every csv/xlsx export under data_dir.
+    "<id>_all_emails.csv" files are one student's whole mailbox; files inside a
+    per-student folder (e.g. D23CE186/updates.csv) are one mailbox category each.
+    """
+    exports = []
+    for root, _, files in os.walk(data_dir):
+        for name in sorted(files):
+            if not name.lower().endswith(EXPORT_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            m = STUDENT_RE.search(name)
+            if m:
+                exports.append((path, m.group(1).lower(), "all"))
+            elif root != data_dir:
+                exports.append((path, os.path.basename(root).lower(), os.path.splitext(name)[0].lower()))
+            else:
+                print(f"Skipping {path}: can't tell whose export it is")
+    return exports
+
+
+def read_export(path):
+    if path.lower().endswith(".xlsx"):
+        df = pd.read_excel(path, dtype=str).fillna("")
+    else:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    # Some exports have stray spaces in headers ("from ")
+    df.columns = [str(c).strip() for c in df.columns]
+    for col in EXPORT_COLUMNS:
+        if col not in df.columns:
+            df[col] = ""
+    return df[EXPORT_COLUMNS].rename(columns=RENAME_COLUMNS)
+
+
+def read_exports(exports, workers=INGEST_WORKERS):
+    """Reads all exports in parallel: xlsx parsing is CPU-bound so it gets processes, csv gets threads."""
+    xlsx = [e for e in exports if e[0].lower().endswith(".xlsx")]
+    csv = [e for e in exports if not e[0].lower().endswith(".xlsx")]
+    with ProcessPoolExecutor(max(1, min(workers, len(xlsx) or 1))) as processes, \
+            ThreadPoolExecutor(max(1, workers)) as threads:
+        futures = [(e, processes.submit(read_export, e[0])) for e in xlsx]
+        futures += [(e, threads.submit(read_export, e[0])) for e in csv]
+        frames = []
+        for (path, student, mailbox), future in futures:
+            df = future.result()
+            df["student"] = student
+            df["mailbox"] = mailbox
+            df["source_file"] = os.path.relpath(path, DATA_DIR)
+            frames.append(df)
+            print(f"Read {len(df)} emails from {path}")
+    return pd.concat(frames, ignore_index=True)
+
+
+# ----------------------------------------------------------
+# Dedup
+# ----------------------------------------------------------
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def shingle_hashes(text, k=SHINGLE_SIZE):
+    """uint64 hashes of the word k-grams of text (one shingle for very short texts)."""
+    tokens = np.array([zlib.crc32(t.encode("utf-8")) for t in text.split()] or [0], dtype=np.uint64)
+    if len(tokens) < k:
+        k = len(tokens)
+    # Polynomial combination of k consecutive token hashes, wrapping in uint64
+    weights = np.array([31 ** (k - 1 - i) for i in range(k)], dtype=np.uint64)
+    windows = np.lib.stride_tricks.sliding_window_view(tokens, k)
+    return np.unique((windows * weights).sum(axis=1) % np.uint64(MINHASH_PRIME))
+
+
+def minhash_signatures(texts):
+    rng = np.random.default_rng(MINHASH_SEED)
+    a = rng.integers(1, MINHASH_PRIME, NUM_PERM, dtype=np.uint64)[:, None]
+    b = rng.integers(0, MINHASH_PRIME, NUM_PERM, dtype=np.uint64)[:, None]
+    signatures = np.empty((len(texts), NUM_PERM), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        shingles = shingle_hashes(text)[None, :]
+        signatures[i] = ((a * shingles + b) % np.uint64(MINHASH_PRIME)).min(axis=1)
+    return signatures
+
+
+def near_duplicate_groups(signatures, threshold=NEAR_DUP_THRESHOLD):
+    """
+    LSH over MinHash bands; candidate pairs that agree on >= threshold of their
+    signature are merged with union-find. Returns the group root per row.
+    """
+    parent = np.arange(len(signatures))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(BANDS):
+        buckets = {}
+        block = np.ascontiguousarray(signatures[:, band * ROWS:(band + 1) * ROWS])
+        for i, key in enumerate(map(bytes, block)):
+            buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                ra, rb = find(first), find(other)
+                if ra != rb and (signatures[first] == signatures[other]).mean() >= threshold:
+                    parent[max(ra, rb)] = min(ra, rb)
+
+    return np.array([find(i) for i in range(len(signatures))])
+
+
+def deduplicate(df):
+    """
+    Collapses the same email across mailboxes. Exact copies share a content
+    hash of clean_text; near copies (per-recipient greetings, footers) are
+    found with MinHash. Returns (corpus, members): one row per unique email
+    with the students who received it, and every ingested row mapped to its
+    doc_id so labels can be fanned back out per recipient.
+    """
+    df = df.copy()
+    df["content_hash"] = df["clean_text"].map(content_hash)
+
+    unique = df.drop_duplicates("content_hash").reset_index(drop=True)
+    roots = near_duplicate_groups(minhash_signatures(unique["clean_text"].tolist()))
+    doc_of_hash = dict(zip(unique["content_hash"], unique["content_hash"].to_numpy()[roots]))
+    df["doc_id"] = df["content_hash"].map(doc_of_hash)
+    df["dedup"] = np.where(
+        df["content_hash"] == df["doc_id"],
+        np.where(df.duplicated("content_hash"), "exact", ""),
+        "near",
+    )
+
+    recipients = df.groupby("doc_id")["student"].agg(lambda s: ";".join(sorted(set(s))))
+    corpus = df[df["content_hash"] == df["doc_id"]].drop_duplicates("doc_id").copy()
+    corpus["students"] = corpus["doc_id"].map(recipients)
+    corpus["recipient_count"] = corpus["students"].str.count(";") + 1
+    corpus = corpus.drop(columns=["content_hash", "dedup"]).reset_index(drop=True)
+
+    members = df[["doc_id", "student", "mailbox", "source_file", "message_id", "thread_id", "dedup"]]
+    return corpus, members
+
+
+# ----------------------------------------------------------
+# Main
+# ----------------------------------------------------------
+
+def ingest(data_dir=DATA_DIR, output_dir=OUTPUT_DIR, workers=INGEST_WORKERS):
+    start = time.perf_counter()
+    exports = discover_exports(data_dir)
+    raw = read_exports(exports, workers)
+    print(f"Read {len(raw)} emails from {len(exports)} exports in {time.perf_counter() - start:.1f}s")
+
+    df = prepare_dataset(raw, workers=workers, columns=None).drop(columns=["raw_text"])
+    corpus, members = deduplicate(df)
+    print(
+        f"{len(df)} emails after filtering -> {len(corpus)} unique "
+        f"({(members['dedup'] == 'exact').sum()} exact, {(members['dedup'] == 'near').sum()} near duplicates)"
+    )
+
+    os.makedirs(output_dir, exist_ok=True)
+    corpus_path = os.path.join(output_dir, "email_corpus.parquet")
+    # Shared corpus schema: categorical sender_domain, real deadline_date timestamps
+    write_dataset(corpus, corpus_path)
+    write_dataset(members, os.path.join(output_dir, "email_members.parquet"))
+    print(f"Corpus written to: {corpus_path} ({time.perf_counter() - start:.1f}s total)")
+    return corpus, members
+
+
+if __name__ == "__main__":
+    ingest()
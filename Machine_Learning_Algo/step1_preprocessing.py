@@ -0,0 +1,159 @@
+import os
+import re
+from multiprocessing import Pool
+
+import pandas as pd
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+CLEAN_WORKERS = int(os.getenv("CLEAN_WORKERS", str(os.cpu_count() or 1)))
+CLEAN_CHUNKSIZE = 256      # emails per task sent to a worker process
+
+# Same rules as the original clean_text in "step1 Dataset cleaning.ipynb",
+# compiled once and only ever run over the part of the text they can match
+DISCLAIMER_RE = re.compile(r"disclaimer:", re.IGNORECASE)
+CLOSING_RE = re.compile(r"(?:thanks[,.]?|regards[,.]?|warm regards[,.]?|best wishes[,.]?)$", re.IGNORECASE)
+CLOSING_MAX_LEN = len("warm regards.")
+SIGNATURE_RE = re.compile(r"thanks|regards", re.IGNORECASE)
+SIGNATURE_MAX_TAIL = 200   # a thanks/regards this close to the end starts the signature block
+URL_RE = re.compile(r"http\S+|www\.\S+")
+EMAIL_RE = re.compile(r"[\w\.-]+@[\w\.-]+")
+
+SUBMIT_RE = re.compile(r"\b(submit|upload|last date|due|fill)\b")
+EXAM_RE = re.compile(r"\b(exam|test|cie|hall ticket|seating)\b")
+EVENT_RE = re.compile(r"\b(hackathon|event|bootcamp|seminar|workshop|competition)\b")
+FORM_LINK_RE = re.compile(r"(docs\.google\.com/forms|forms\.gle)")
+DEADLINE_RE = re.compile(
+    r"(due|deadline|submit by|last date)[:\- ]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{1,2}\s+\w+\s+\d{4})",
+    re.IGNORECASE,
+)
+
+COLS_TO_DROP = ["Unnamed: 0", "id", "threadId", "labelIds", "snippet"]
+LABEL_COLUMNS = [
+    "sender_email",
+    "sender_domain",
+    "subject",
+    "clean_text",
+    "deadline_date",
+    "label_source",
+    "label_topic",
+    "label_urgency",
+]
+
+
+# ----------------------------------------------------------
+# Cleaning
+# ----------------------------------------------------------
+
+def remove_charusat_disclaimer(text):
+    # Remove only the long legal footer, not message body
+    text = str(text)
+    m = DISCLAIMER_RE.search(text)
+    if m:
+        text = text[:m.start()]
+    return text.strip()
+
+
+def clean_text(text):
+    text = remove_charusat_disclaimer(text)
+
+    # Remove a generic closing at the very end (keep forwarded content intact)
+    m = CLOSING_RE.search(text, max(0, len(text) - CLOSING_MAX_LEN))
+    if m:
+        text = text[:m.start()]
+
+    # Remove the signature block: the first thanks/regards within 200 chars of the end
+    threshold = len(text) - SIGNATURE_MAX_TAIL - (1 if text.endswith("\n") else 0)
+    for m in SIGNATURE_RE.finditer(text, max(0, threshold - len("regards"))):
+        if m.end() >= threshold:
+            text = text[:m.start()]
+            break
+
+    # Remove URLs (most emails have none), then collapse whitespace –
+    # str.split() splits on exactly the characters \s matches
+    if "http" in text or "www." in text:
+        text = URL_RE.sub("", text)
+    return " ".join(text.split()).lower()
+
+
+def clean_many(texts, workers=CLEAN_WORKERS, chunksize=CLEAN_CHUNKSIZE):
+    """
+    Yields clean_text(t) for each t, in order. With workers > 1 the texts are
+    cleaned across a process pool, `chunksize` at a time.
+    """
+    if workers <= 1:
+        yield from map(clean_text, texts)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap(clean_text, texts, chunksize)
+
+
+# ----------------------------------------------------------
+# Email + domain extraction
+# ----------------------------------------------------------
+
+def extract_email(text):
+    match = EMAIL_RE.search(str(text))
+    return match.group(0).lower() if match else ""
+
+
+def extract_domain(email):
+    return email.split('@')[-1] if "@" in email else ""
+
+
+# ----------------------------------------------------------
+# Flags + deadline
+# ----------------------------------------------------------
+
+def contains_submit_word(text):
+    return bool(SUBMIT_RE.search(text))
+
+
+def contains_exam_word(text):
+    return bool(EXAM_RE.search(text))
+
+
+def contains_event_word(text):
+    return bool(EVENT_RE.search(text))
+
+
+def contains_form_link(text):
+    return bool(FORM_LINK_RE.search(text))
+
+
+def extract_deadline(text):
+    m = DEADLINE_RE.search(text)
+    return m.group(2) if m else ""
+
+
+# ----------------------------------------------------------
+# Pipeline
+# ----------------------------------------------------------
+
+def prepare_dataset(df, workers=CLEAN_WORKERS, columns=LABEL_COLUMNS):
+    """
+    Raw Gmail export -> unlabeled dataset (the notebook's pipeline + filtering rules).
+    Pass columns=None to keep the export's own columns (ids, dates) as well.
+    """
+    df = df.drop(columns=[c for c in COLS_TO_DROP if c in df.columns], errors="ignore")
+
+    df["raw_text"] = df["subject"].astype(str) + " " + df["content"].astype(str)
+    df["clean_text"] = list(clean_many(df["raw_text"], workers=workers))
+
+    df["sender_email"] = df["from"].apply(extract_email)
+    df["sender_domain"] = df["sender_email"].apply(extract_domain)
+
+    df["deadline_date"] = ""
+    df["label_source"] = ""
+    df["label_topic"] = ""
+    df["label_urgency"] = ""
+
+    # Delete ONLY pure system messages (not real emails)
+    df = df[~df["from"].str.contains(r"^no-reply@classroom\.google\.com$", na=False, case=False)]
+    # Keep short tiny urgent mails
+    df = df[df["clean_text"].str.len() > 5].reset_index(drop=True)
+    # Remove emails from classroom.google.com domain
+    df = df[~df["sender_domain"].str.contains(r"classroom\.google\.com$", na=False, case=False)]
+    return df if columns is None else df[columns]
@@ -1,19 +1,16 @@
 
 import re
+import numpy as np
 import pandas as pd
 from html import unescape
 import os
 from datetime import datetime
 
+from dataset_io import parquet_path, read_dataset, write_dataset
+
 INPUT_FILE = "unlabeled_dataset.csv"
 # OUTPUT_FILE = "source_labeled_dataset.csv"
 
-# Output will be saved in a timestamped folder
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-OUTPUT_DIR = f"output_{timestamp}"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-OUTPUT_FILE = os.path.join(OUTPUT_DIR, "source_labeled_dataset.csv")
-
 # ----------------------------------------------------------
 # Helper: Extract domain from "from" field if missing
 # ----------------------------------------------------------
@@ -91,24 +88,75 @@ def classify_level1(sender, sender_domain, clean_text):
     return "Misc / External"
 
 
+# ----------------------------------------------------------
+# Batch classifier (whole DataFrame at once)
+# ----------------------------------------------------------
+
+LEVEL1_LABELS = [
+    "External Course Provider",
+    "Student / Club",
+    "Administration / Office",
+    "Faculty / Academic Staff",
+    "Misc / External",
+]
+
+# One alternation per keyword list; plain substring semantics, same as `k in clean_text`
+ADMIN_RE = re.compile("|".join(re.escape(k) for k in ADMIN_KEYWORDS))
+FACULTY_RE = re.compile("|".join(re.escape(k) for k in FACULTY_KEYWORDS))
+
+
+def classify_level1_batch(df):
+    """
+    Same rules as classify_level1, over whole columns.
+    Returns a categorical Series aligned with df.index.
+    """
+    def column(name):
+        if name not in df.columns:
+            return pd.Series("", index=df.index)
+        return df[name].fillna("").astype(str)
+
+    domain = column("sender_domain").str.lower().str.strip()
+    missing = domain == ""
+    domain[missing] = column("from")[missing].str.extract(r"@([^ >]+)", expand=False).fillna("").str.lower()
+
+    external = domain.isin(EXTERNAL_COURSE_DOMAINS).to_numpy()
+    club = domain.str.endswith("charusat.edu.in").to_numpy()
+    office = domain.str.endswith("charusat.ac.in").to_numpy() & ~external & ~club
+
+    # Keyword scans only run on the charusat.ac.in rows that can still need them
+    admin = np.zeros(len(df), dtype=bool)
+    faculty = np.zeros(len(df), dtype=bool)
+    text = column("clean_text")[office].str.lower()
+    admin[office] = text.str.contains(ADMIN_RE).to_numpy()
+    faculty[office & ~admin] = text[~admin[office]].str.contains(FACULTY_RE).to_numpy()
+
+    labels = np.select(
+        [external, club, admin, faculty],
+        LEVEL1_LABELS[:4],
+        default="Misc / External",
+    )
+    return pd.Series(pd.Categorical(labels, categories=LEVEL1_LABELS), index=df.index, name="label_source")
+
+
 # ----------------------------------------------------------
 # Apply classifier
 # ----------------------------------------------------------
 if __name__ == "__main__":
-    df = pd.read_csv(INPUT_FILE, dtype=str, keep_default_na=False)
+    # Output will be saved in a timestamped folder
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    OUTPUT_DIR = f"output_{timestamp}"
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    OUTPUT_FILE = os.path.join(OUTPUT_DIR, "source_labeled_dataset.csv")
+
+    df = read_dataset(INPUT_FILE)
 
     # Extract domain if column absent
     if "sender_domain" not in df.columns:
         df["sender_domain"] = df["from"].map(extract_domain)
 
-    df["label_source"] = df.apply(
-        lambda r: classify_level1(
-            r.get("from", ""),
-            r.get("sender_domain", ""),
-            r.get("clean_text", "")
-        ),
-        axis=1
-    )
+    df["label_source"] = classify_level1_batch(df)
 
-    df.to_csv(OUTPUT_FILE, index=False)
-    print(f"Level-1 labels written to: {OUTPUT_FILE}")
+    # Parquet for the next stage, CSV kept as an export
+    write_dataset(df, parquet_path(OUTPUT_FILE))
+    write_dataset(df, OUTPUT_FILE)
+    print(f"Level-1 labels written to: {parquet_path(OUTPUT_FILE)} (+ .csv)")
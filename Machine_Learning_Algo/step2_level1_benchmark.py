@@ -0,0 +1,71 @@
+"""
+Row-wise classify_level1 vs classify_level1_batch on the real exports.
+
+    python step2_level1_benchmark.py      (from Machine_Learning_Algo/)
+
+Prints timings only; label parity is covered by tests/test_level1_batch.py.
+"""
+import glob
+import importlib.util
+import os
+import time
+
+import pandas as pd
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+STEP2_FILE = "step2 Semi assisted Labelling.py"
+INPUT_FILES = ["unlabeled_dataset.csv"] + sorted(glob.glob(os.path.join("..", "data", "*_all_emails*.csv")))
+REPEAT = 5              # stack the dataset to get stable timings
+
+
+def load_step2():
+    # The script name has spaces, so it can't be imported the normal way
+    spec = importlib.util.spec_from_file_location("step2_labelling", STEP2_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_dataset():
+    """Merged multi-student dataset; raw exports have from/content instead of clean_text."""
+    frames = []
+    for path in INPUT_FILES:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        df.columns = [c.strip() for c in df.columns]
+        if "clean_text" not in df.columns:
+            df["clean_text"] = (df.get("subject", "") + " " + df.get("content", "")).str.lower()
+        if "sender_domain" not in df.columns:
+            df["sender_domain"] = ""
+        frames.append(df[[c for c in ["from", "sender_domain", "clean_text"] if c in df.columns]])
+        print(f"Loaded {len(df)} rows from {path}")
+    return pd.concat(frames, ignore_index=True)
+
+
+def classify_rowwise(step2, df):
+    return df.apply(
+        lambda r: step2.classify_level1(r.get("from", ""), r.get("sender_domain", ""), r.get("clean_text", "")),
+        axis=1,
+    )
+
+
+if __name__ == "__main__":
+    step2 = load_step2()
+    df = load_dataset()
+    df = pd.concat([df] * REPEAT, ignore_index=True)
+    print(f"Benchmarking on {len(df)} rows")
+
+    start = time.perf_counter()
+    expected = classify_rowwise(step2, df)
+    rowwise_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = step2.classify_level1_batch(df)
+    batch_time = time.perf_counter() - start
+
+    mismatches = (actual.astype(str) != expected).sum()
+    print(f"Row-wise: {rowwise_time:.3f}s  Batch: {batch_time:.3f}s  Speedup: {rowwise_time / batch_time:.1f}x")
+    print(actual.value_counts().to_string())
+    print(f"{mismatches} rows differ from classify_level1")
@@ -0,0 +1,118 @@
+import heapq
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from llm_extractor import ExtractionFailed
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+# Rows whose LLM markers are fetched ahead of the one on screen
+PREFETCH_DEPTH = int(os.getenv("LEVEL2_PREFETCH_DEPTH", "3"))
+# Each row already picked from a label_source multiplies that source's scores by this
+DIVERSITY_DECAY = float(os.getenv("LEVEL2_DIVERSITY_DECAY", "0.7"))
+
+
+def uncertainty(proba):
+    """1 - margin between the two most likely topics per row: 1 = coin flip, 0 = certain."""
+    if proba.shape[1] < 2:
+        return np.zeros(proba.shape[0])
+    top2 = np.partition(proba, -2, axis=1)[:, -2:]
+    return 1.0 - (top2[:, 1] - top2[:, 0])
+
+
+# ----------------------------------------------------------
+# Sampler
+# ----------------------------------------------------------
+
+class ActiveSampler:
+    """
+    Orders unlabelled rows for manual labelling: most uncertain first, with a
+    per-label_source decay so one source can't take every slot.
+
+    Scores come from one vectorised pass over the model's probabilities. The
+    queue is a heap with lazy re-scoring: a popped row whose source has been
+    picked since it was pushed is pushed back with its decayed score, so each
+    pick costs O(log n). Without probabilities every row scores 1 and the
+    decay alone cycles through the sources in row order, like the old
+    round-robin.
+    """
+
+    def __init__(self, rows, sources, proba=None, decay=DIVERSITY_DECAY):
+        rows = list(rows)
+        sources = [str(s) for s in sources]
+        scores = uncertainty(np.asarray(proba)) if proba is not None else np.ones(len(rows))
+        self.decay = decay
+        self.picked = dict.fromkeys(sources, 0)
+        # (-score, position, row, source, picks of source when scored)
+        self.heap = [(-float(s), i, row, src, 0) for i, (row, src, s) in enumerate(zip(rows, sources, scores))]
+        heapq.heapify(self.heap)
+        self.base = dict(zip(rows, scores.tolist()))
+
+    def __len__(self):
+        return len(self.heap)
+
+    def pop(self):
+        while self.heap:
+            neg_score, pos, row, src, seen = heapq.heappop(self.heap)
+            picks = self.picked[src]
+            if seen != picks:
+                heapq.heappush(self.heap, (-self.base[row] * self.decay ** picks, pos, row, src, picks))
+                continue
+            self.picked[src] = picks + 1
+            return row, -neg_score
+        raise IndexError("pop from empty ActiveSampler")
+
+    def __iter__(self):
+        while self.heap:
+            yield self.pop()[0]
+
+
+# ----------------------------------------------------------
+# Background marker prefetch
+# ----------------------------------------------------------
+
+class MarkerPrefetcher:
+    """
+    Extracts LLM markers for the next `depth` rows on a background thread
+    while the annotator reads the current one.
+
+    make_extractor() is called on the worker thread, so the extractor's
+    SQLite cache connection belongs to that thread. Rows fetched ahead but
+    never shown still land in the cache for the auto-label pass.
+    """
+
+    def __init__(self, make_extractor, depth=PREFETCH_DEPTH):
+        self.make_extractor = make_extractor
+        self.depth = depth
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="marker-prefetch")
+
+    def _extract(self, label_source, clean_text):
+        if not hasattr(self._local, "extractor"):
+            self._local.extractor = self.make_extractor()
+        try:
+            return self._local.extractor.extract_one(label_source, clean_text)
+        except ExtractionFailed as e:
+            print(f"[LLM ERROR] {e}")
+            return {}
+
+    def iterate(self, rows):
+        """rows: iterable of (key, label_source, clean_text). Yields (key, markers) in order."""
+        window = deque()
+        for key, label_source, clean_text in rows:
+            window.append((key, self._pool.submit(self._extract, label_source, clean_text)))
+            if len(window) > self.depth:
+                key, future = window.popleft()
+                yield key, future.result()
+        while window:
+            key, future = window.popleft()
+            yield key, future.result()
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,436 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+EMBED_MODEL = os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBED_BATCH = int(os.getenv("EMBED_BATCH", "64"))
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "embedding_cache.sqlite")
+EMBED_INDEX_DIR = "embedding_index"
+
+IVF_NPROBE = 8            # minimum lists scanned per query
+IVF_PROBE_FRACTION = 0.3   # ...or this share of the lists, whichever is more (lists grow with sqrt(n))
+IVF_MIN_TRAIN = 256       # below this a topic is searched exhaustively (it's tiny anyway)
+IVF_KMEANS_ITERS = 10
+IVF_SEED = 42
+
+
+def text_key(model, text):
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+# ----------------------------------------------------------
+# Embeddings (sentence-transformers, CPU, cached by content hash)
+# ----------------------------------------------------------
+
+class EmbeddingCache:
+    """SQLite store of float32 embeddings keyed by text_key(model, text)."""
+
+    def __init__(self, path=EMBED_CACHE_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys):
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            found.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+            ((key, np.asarray(vec, dtype=np.float32).tobytes()) for key, vec in items),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class Embedder:
+    """
+    Encodes texts with a sentence-transformers model on CPU, in batches.
+    Vectors are L2-normalised (dot product = cosine). Texts seen before, by
+    the same model, come from the cache instead of the model.
+    """
+
+    def __init__(self, model_name=EMBED_MODEL, batch_size=EMBED_BATCH, cache=None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache = cache
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            # Imported on first use: torch takes seconds to load
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    def encode(self, texts):
+        texts = [str(t) for t in texts]
+        keys = [text_key(self.model_name, t) for t in texts]
+        cached = self.cache.get_many(list(dict.fromkeys(keys))) if self.cache is not None else {}
+
+        todo = list(dict.fromkeys(k for k in keys if k not in cached))
+        if todo:
+            text_of = dict(zip(keys, texts))
+            vectors = self.model.encode(
+                [text_of[k] for k in todo],
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            ).astype(np.float32)
+            fresh = dict(zip(todo, vectors))
+            if self.cache is not None:
+                self.cache.put_many(fresh.items())
+            cached.update(fresh)
+
+        return np.vstack([cached[k] for k in keys]) if keys else np.zeros((0, 0), dtype=np.float32)
+
+
+# ----------------------------------------------------------
+# IVF index (pure NumPy)
+# ----------------------------------------------------------
+
+class _InvertedList:
+    """Growable (ids, vectors) arrays; capacity doubles so appends are amortised O(1)."""
+
+    def __init__(self, dim):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.size = 0
+
+    def append(self, ids, vectors):
+        needed = self.size + len(ids)
+        if needed > len(self.ids):
+            capacity = max(needed, 2 * len(self.ids), 16)
+            self.ids = np.resize(self.ids, capacity)
+            grown = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+        self.ids[self.size:needed] = ids
+        self.vectors[self.size:needed] = vectors
+        self.size = needed
+
+    def remove(self, ids):
+        """Drops the entries with these ids, compacting in place. Returns how many were dropped."""
+        keep = ~np.isin(self.ids[:self.size], ids)
+        kept = int(keep.sum())
+        if kept < self.size:
+            self.ids[:kept] = self.ids[:self.size][keep]
+            self.vectors[:kept] = self.vectors[:self.size][keep]
+            self.size = kept
+        return len(keep) - kept
+
+
+def last_occurrences(ids):
+    """Positions of the last occurrence of each id, in input order – later duplicates win."""
+    last = len(ids) - 1 - np.unique(ids[::-1], return_index=True)[1]
+    last.sort()
+    return last
+
+
+def kmeans(vectors, k, iters=IVF_KMEANS_ITERS, seed=IVF_SEED):
+    """Spherical k-means (vectors are unit length, so nearest = highest dot product)."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iters):
+        assign = (vectors @ centroids.T).argmax(axis=1)
+        for c in range(k):
+            members = vectors[assign == c]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+            else:
+                centroids[c] = vectors[rng.integers(len(vectors))]
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index over unit vectors (inner product = cosine).
+
+    Vectors are bucketed by nearest k-means centroid; a query scans only the
+    closest buckets: `nprobe` of them or `probe_fraction` of all lists,
+    whichever is more, so recall holds as retraining adds lists. New vectors go straight into their bucket. The
+    quantizer is (re)trained once the index is IVF_MIN_TRAIN vectors big and
+    again each time it doubles, so buckets stay balanced as mail arrives.
+    Below IVF_MIN_TRAIN everything sits in one bucket and search is exact.
+    Ids are unique: adding an id that is already indexed replaces its vector.
+    """
+
+    def __init__(self, dim, nprobe=IVF_NPROBE, min_train=IVF_MIN_TRAIN, probe_fraction=IVF_PROBE_FRACTION):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.probe_fraction = probe_fraction
+        self.min_train = min_train
+        self.centroids = np.zeros((1, dim), dtype=np.float32)
+        self.lists = [_InvertedList(dim)]
+        self.trained_size = 0
+
+    def __len__(self):
+        return sum(lst.size for lst in self.lists)
+
+    def add(self, ids, vectors):
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(ids):
+            return
+        last = last_occurrences(ids)
+        if len(last) < len(ids):
+            ids, vectors = ids[last], vectors[last]
+        self.remove(ids)
+        assign = (vectors @ self.centroids.T).argmax(axis=1)
+        for c in np.unique(assign):
+            self.lists[c].append(ids[assign == c], vectors[assign == c])
+
+        size = len(self)
+        if size >= self.min_train and size >= 2 * self.trained_size:
+            self._retrain()
+
+    def remove(self, ids):
+        """Drops these ids from the index (unknown ids are ignored). Returns how many were dropped."""
+        ids = np.asarray(ids, dtype=np.int64)
+        return sum(lst.remove(ids) for lst in self.lists if lst.size)
+
+    def _retrain(self):
+        ids = np.concatenate([lst.ids[:lst.size] for lst in self.lists])
+        vectors = np.vstack([lst.vectors[:lst.size] for lst in self.lists])
+        nlist = max(1, int(np.sqrt(len(vectors))))
+        self.centroids = kmeans(vectors, nlist).astype(np.float32)
+        self.lists = [_InvertedList(self.dim) for _ in range(nlist)]
+        self.trained_size = len(vectors)
+        assign = (vectors @ self.centroids.T).argmax(axis=1)
+        for c in np.unique(assign):
+            self.lists[c].append(ids[assign == c], vectors[assign == c])
+
+    def probes(self):
+        """Lists scanned per query at the current list count."""
+        return min(max(self.nprobe, int(np.ceil(len(self.lists) * self.probe_fraction))), len(self.lists))
+
+    def search(self, query, k=5, nprobe=None):
+        """Top-k (ids, scores) for one unit query vector, best first. `nprobe` overrides probes()."""
+        nprobe = min(nprobe, len(self.lists)) if nprobe else self.probes()
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(centroid_scores, -nprobe)[-nprobe:] if nprobe < len(self.lists) else range(len(self.lists))
+        probed = [self.lists[c] for c in probe if self.lists[c].size]
+        if not probed:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        ids = np.concatenate([lst.ids[:lst.size] for lst in probed])
+        scores = np.concatenate([lst.vectors[:lst.size] @ query for lst in probed])
+        if k < len(scores):
+            best = np.argpartition(scores, -k)[-k:]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return ids[best], scores[best]
+
+    def state(self):
+        return {
+            "centroids": self.centroids,
+            "ids": [lst.ids[:lst.size] for lst in self.lists],
+            "vectors": [lst.vectors[:lst.size] for lst in self.lists],
+            "trained_size": self.trained_size,
+        }
+
+    @classmethod
+    def from_state(cls, dim, centroids, ids, vectors, trained_size, nprobe=IVF_NPROBE):
+        index = cls(dim, nprobe=nprobe)
+        index.centroids = centroids.astype(np.float32)
+        index.lists = []
+        for list_ids, list_vectors in zip(ids, vectors):
+            lst = _InvertedList(dim)
+            lst.append(list_ids, list_vectors)
+            index.lists.append(lst)
+        index.trained_size = trained_size
+        return index
+
+
+# ----------------------------------------------------------
+# Per-topic embedding index
+# ----------------------------------------------------------
+
+class EmbeddingIndex:
+    """
+    One IVFIndex per label_topic over sentence embeddings of clean_text.
+    add() embeds and inserts new emails incrementally; search() restricts
+    to the query's topic, like the TF-IDF retrieval in retrieval.py.
+    Re-adding an id (edited text, or a relabelled email under a new topic)
+    replaces its old entry.
+    """
+
+    def __init__(self, embedder):
+        self.embedder = embedder
+        self.topics = {}
+
+    def add(self, ids, texts, topics):
+        vectors = self.embedder.encode(texts)
+        ids = np.asarray(ids, dtype=np.int64)
+        topics = np.asarray([str(t) for t in topics], dtype=object)
+        last = last_occurrences(ids)
+        if len(last) < len(ids):
+            ids, vectors, topics = ids[last], vectors[last], topics[last]
+        for topic in dict.fromkeys(topics):
+            rows = topics == topic
+            # An id moving to another topic leaves its old one
+            for other, index in self.topics.items():
+                if other != topic:
+                    index.remove(ids[rows])
+            if topic not in self.topics:
+                self.topics[topic] = IVFIndex(vectors.shape[1])
+            self.topics[topic].add(ids[rows], vectors[rows])
+
+    def remove(self, ids):
+        """Drops these ids from every topic."""
+        return sum(index.remove(ids) for index in self.topics.values())
+
+    def search(self, text, topic, k=5):
+        index = self.topics.get(topic)
+        if index is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return index.search(self.embedder.encode([text])[0], k)
+
+    def save(self, index_dir=EMBED_INDEX_DIR):
+        os.makedirs(index_dir, exist_ok=True)
+        meta = {"model": self.embedder.model_name, "topics": {}}
+        for n, (topic, index) in enumerate(self.topics.items()):
+            state = index.state()
+            arrays = {"centroids": state["centroids"]}
+            for i, (list_ids, list_vectors) in enumerate(zip(state["ids"], state["vectors"])):
+                arrays[f"ids_{i}"] = list_ids
+                arrays[f"vectors_{i}"] = list_vectors
+            np.savez(os.path.join(index_dir, f"topic_{n}.npz"), **arrays)
+            meta["topics"][topic] = {
+                "file": f"topic_{n}.npz",
+                "dim": index.dim,
+                "lists": len(state["ids"]),
+                "trained_size": state["trained_size"],
+            }
+        with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, embedder, index_dir=EMBED_INDEX_DIR):
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["model"] != embedder.model_name:
+            raise ValueError(f"{index_dir} was built with {meta['model']}, not {embedder.model_name}")
+        index = cls(embedder)
+        for topic, info in meta["topics"].items():
+            with np.load(os.path.join(index_dir, info["file"])) as arrays:
+                index.topics[topic] = IVFIndex.from_state(
+                    info["dim"],
+                    arrays["centroids"],
+                    [arrays[f"ids_{i}"] for i in range(info["lists"])],
+                    [arrays[f"vectors_{i}"] for i in range(info["lists"])],
+                    info["trained_size"],
+                )
+        return index
+
+
+# ----------------------------------------------------------
+# Recall benchmark (python embedding_index.py [--synthetic])
+# ----------------------------------------------------------
+
+class _SyntheticEmbedder:
+    """Stands in for Embedder on machines without torch: text "<n>" encodes to vectors[n]."""
+
+    model_name = "synthetic"
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def encode(self, texts):
+        return self.vectors[[int(t) for t in texts]]
+
+
+def recall_at_k(index, vectors, texts, topics, queries, k):
+    """
+    Fraction of the exact top-k (brute-force inner product within the query's
+    topic) that EmbeddingIndex.search returns.
+    """
+    hits = 0
+    for q in queries:
+        same_topic = np.flatnonzero(topics == topics[q])
+        exact = same_topic[np.argsort(-(vectors[same_topic] @ vectors[q]), kind="stable")[:k]]
+        found, _ = index.search(texts[q], topics[q], k)
+        hits += len(set(exact) & set(found))
+    return hits / (k * len(queries))
+
+
+def load_corpus(synthetic):
+    """(embedder, texts, topics, benchmark label)."""
+    if synthetic:
+        # Clustered unit vectors shaped like MiniLM output (384-d) in 3 topics, for machines without torch
+        rng = np.random.default_rng(IVF_SEED)
+        centers = rng.normal(size=(1000, 384))
+        cluster = rng.integers(1000, size=20000)
+        vectors = centers[cluster] + rng.normal(scale=1.5, size=(20000, 384))
+        vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+        texts = np.array([str(i) for i in range(len(vectors))], dtype=object)
+        topics = np.array([f"topic {c % 3}" for c in cluster], dtype=object)
+        return _SyntheticEmbedder(vectors), texts, topics, "synthetic 20k x 384, 3 topics"
+
+    # Shared corpus I/O lives one level up (Machine_Learning_Algo/dataset_io.py)
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from dataset_io import read_dataset
+    df = read_dataset("level_2_fixed_3rd_jan.csv", columns=["clean_text", "label_topic"])
+    embedder = Embedder(cache=EmbeddingCache())
+    texts = df["clean_text"].to_numpy(dtype=object)
+    topics = df["label_topic"].to_numpy(dtype=object)
+    return embedder, texts, topics, f"level_2_fixed_3rd_jan.csv with {EMBED_MODEL}"
+
+
+if __name__ == "__main__":
+    embedder, texts, topics, label = load_corpus("--synthetic" in sys.argv)
+    ids = np.arange(len(texts))
+    print(f"Benchmark: {label}")
+
+    start = time.perf_counter()
+    vectors = embedder.encode(texts.tolist())     # warms the cache so add() below times indexing only
+    print(f"Encoded {len(texts)} texts in {time.perf_counter() - start:.1f}s")
+
+    index = EmbeddingIndex(embedder)
+    start = time.perf_counter()
+    for chunk in range(0, len(texts), 500):     # inserted incrementally, as new mail would be
+        index.add(ids[chunk:chunk + 500], texts[chunk:chunk + 500], topics[chunk:chunk + 500])
+    print(f"EmbeddingIndex.add: {len(texts)} texts in {time.perf_counter() - start:.2f}s")
+    for topic, ivf in index.topics.items():
+        print(f"  {topic:<40} {len(ivf):>6} vectors  {len(ivf.lists):>4} lists  probes {ivf.probes()}")
+
+    rng = np.random.default_rng(0)
+    queries = rng.choice(len(texts), min(200, len(texts)), replace=False)
+    start = time.perf_counter()
+    for q in queries:
+        index.search(texts[q], topics[q], 10)
+    ann_ms = (time.perf_counter() - start) / len(queries) * 1000
+    start = time.perf_counter()
+    for q in queries:
+        same_topic = np.flatnonzero(topics == topics[q])
+        np.argsort(-(vectors[same_topic] @ vectors[q]))[:10]
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+    print(
+        f"EmbeddingIndex.search: recall@10 {recall_at_k(index, vectors, texts, topics, queries, 10):.3f}   "
+        f"{ann_ms:.2f} ms/query (brute force {exact_ms:.2f} ms)"
+    )
@@ -0,0 +1,82 @@
+import re
+
+import numpy as np
+
+# ----------------------------------------------------------
+# Keyword scoring engine
+# ----------------------------------------------------------
+
+# Endings a keyword may carry and still count: "exam" hits "exams",
+# "schedule" hits "scheduled", but "exam" does not hit "example"
+INFLECTIONS = r"(?:s|es|d|ed|ing)?"
+
+class KeywordScorer:
+    """
+    Scores texts against per-topic keyword lists in one pass.
+
+    All keywords are compiled into a single regex that matches whole words
+    plus an optional inflection (INFLECTIONS), so "ia" does not hit inside
+    "media" while "job" still hits "jobs". Derived forms with other endings
+    ("examination") have to be listed as keywords themselves. Each topic scores 1 per distinct keyword present; the per-source
+    bias table is added as a broadcast and the best topic is the argmax
+    (ties go to the earlier label, as max() over the old score dict did).
+    Texts with no keyword hit and no bias fall back to `default`.
+    """
+
+    def __init__(self, topic_keywords, labels, bias=None, default="General Information / Misc",
+                 inflections=INFLECTIONS):
+        self.labels = list(labels)
+        self.default = default
+        topic_index = {label: i for i, label in enumerate(self.labels)}
+
+        # keyword -> topic columns it counts towards
+        self.keyword_topics = {}
+        for topic, kws in topic_keywords.items():
+            for kw in kws:
+                self.keyword_topics.setdefault(kw.lower(), []).append(topic_index[topic])
+        self.keywords = sorted(self.keyword_topics, key=len, reverse=True)
+        self.keyword_index = {kw: i for i, kw in enumerate(self.keywords)}
+
+        # (n_keywords x n_topics) 0/1 matrix: keyword hits @ this = topic scores
+        self.keyword_matrix = np.zeros((len(self.keywords), len(self.labels)))
+        for kw, cols in self.keyword_topics.items():
+            self.keyword_matrix[self.keyword_index[kw], cols] = 1.0
+
+        # The lookahead lets matches that start inside an earlier match still count;
+        # longest keywords are tried first at each position. Group 1 is the bare keyword
+        alternation = "|".join(re.escape(kw) for kw in self.keywords)
+        self.pattern = re.compile(rf"\b(?=({alternation}){inflections}\b)")
+
+        # Row 0 is "no bias" for sources missing from the table
+        bias = bias or {}
+        self.sources = {source: i + 1 for i, source in enumerate(bias)}
+        self.bias_matrix = np.zeros((len(bias) + 1, len(self.labels)))
+        for source, topics in bias.items():
+            for topic, weight in topics.items():
+                self.bias_matrix[self.sources[source], topic_index[topic]] = weight
+
+    def keyword_hits(self, texts):
+        """(n_texts x n_keywords) 0/1 matrix of which keywords occur in each text."""
+        texts = list(texts)
+        hits = np.zeros((len(texts), len(self.keywords)))
+        for row, text in enumerate(texts):
+            found = {m.group(1) for m in self.pattern.finditer((text or "").lower())}
+            hits[row, [self.keyword_index[kw] for kw in found]] = 1.0
+        return hits
+
+    def score(self, texts, sources=None):
+        """(n_texts x n_topics) keyword scores, plus source bias when `sources` is given."""
+        scores = self.keyword_hits(texts) @ self.keyword_matrix
+        if sources is not None:
+            codes = np.fromiter((self.sources.get(s, 0) for s in sources), dtype=np.intp, count=len(scores))
+            scores += self.bias_matrix[codes]
+        return scores
+
+    def predict(self, texts, sources):
+        scores = self.score(texts, sources)
+        if not len(scores):
+            return []
+        best = scores.argmax(axis=1)
+        labels = np.array(self.labels, dtype=object)[best]
+        labels[scores.max(axis=1) <= 0] = self.default
+        return labels.tolist()
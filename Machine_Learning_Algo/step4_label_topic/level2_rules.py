@@ -1,18 +1,45 @@
 
 import os
+import sys
 import pandas as pd
-from collections import defaultdict
-from datetime import datetime
 import requests
+
+from keyword_engine import KeywordScorer
+from marker_cache import MarkerCache, cache_key
+from results_log import ResultsLog, apply_results, compact, open_run
+
+# Shared corpus I/O lives one level up (Machine_Learning_Algo/dataset_io.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dataset_io import ensure_categories, normalize, read_dataset
+
+# Bump whenever the suggestion prompt below changes (cached answers are keyed on it)
+SUGGEST_PROMPT_VERSION = "suggest-v1"
+SUGGEST_MODEL = "llama3"
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = MarkerCache()
+    return _cache
+
 # ----------------------------------------------------------
 # Helpers
 # ----------------------------------------------------------
 
 def llm_label_suggestion(label_source, clean_text):
     """
-    Calls Ollama (localhost:11434, model 'gemma3') to get a topic label suggestion.
+    Calls Ollama (localhost:11434, model 'llama3') to get a topic label suggestion.
+    Answers are cached on disk, so a re-run over the same emails skips the LLM.
     Returns (label, reason) or (None, None) on failure.
     """
+    key = cache_key(SUGGEST_MODEL, SUGGEST_PROMPT_VERSION, label_source, clean_text)
+    cached = get_cache().get(key)
+    if cached is not None:
+        return cached["label"], cached["reason"]
+
     prompt = f"""You are assisting with academic email labeling.
 
 Context:
@@ -54,7 +81,7 @@ Reason (1–2 lines max): <brief justification based on student action and urgen
         response = requests.post(
             "http://127.0.0.1:11434/api/generate",
             json={
-                "model": "llama3",
+                "model": SUGGEST_MODEL,
                 "prompt": prompt,
                 "stream": False
             },
@@ -71,6 +98,8 @@ Reason (1–2 lines max): <brief justification based on student action and urgen
                 label = line.split(":", 1)[-1].strip()
             if line.lower().startswith("reason"):
                 reason = line.split(":", 1)[-1].strip()
+        if label:
+            get_cache().put(key, {"label": label, "reason": reason})
         return label, reason
     except Exception as e:
         print(f"[LLM ERROR] {e}")
@@ -98,8 +127,8 @@ LEVEL2_LABELS = [
 
 TOPIC_KEYWORDS = {
     "Timetable / Schedule Update": ["timetable", "schedule", "rescheduled"],
-    "Exam Notifications": ["exam", "midsem", "endsem", "hall ticket", "seating"],
-    "Assignment or Submission": ["submit", "submission", "assignment", "project", "sgp"],
+    "Exam Notifications": ["exam", "examination", "midsem", "endsem", "hall ticket", "seating"],
+    "Assignment or Submission": ["submit", "submitted", "submission", "assignment", "project", "sgp"],
     "Certification / Courses": ["nptel", "coursera", "aws", "cisco", "certification"],
     "Internship / Placement Opportunities": ["internship", "placement", "job", "apply"],
     "Events / Hackathons": ["event", "workshop", "seminar", "hackathon"],
@@ -120,26 +149,19 @@ LEVEL1_BIAS = {
     },
 }
 
+_scorer = KeywordScorer(TOPIC_KEYWORDS, LEVEL2_LABELS, LEVEL1_BIAS)
+
 # ----------------------------------------------------------
 # Helpers
 # ----------------------------------------------------------
 
 def infer_level2_topic(text, source):
-    text = (text or "").lower()
-    scores = defaultdict(float)
-
-    for topic, kws in TOPIC_KEYWORDS.items():
-        for kw in kws:
-            if kw in text:
-                scores[topic] += 1.0
+    return infer_level2_topics([text], [source])[0]
 
-    for topic, bias in LEVEL1_BIAS.get(source, {}).items():
-        scores[topic] += bias
 
-    if not scores or max(scores.values()) == 0:
-        return "General Information / Misc"
-
-    return max(scores, key=scores.get)
+def infer_level2_topics(texts, sources):
+    """Rule-based suggestion for a whole batch (keyword scores + Level-1 bias, argmax)."""
+    return _scorer.predict(texts, sources)
 
 
 def choose_label():
@@ -175,64 +197,72 @@ def write_readme(output_dir, df):
 # ----------------------------------------------------------
 
 def main():
-    df = pd.read_csv(INPUT_FILE, dtype=str, keep_default_na=False)
+    df = read_dataset(INPUT_FILE)
 
     if "label_topic" not in df.columns:
         df["label_topic"] = ""
+    normalize(df)
+    ensure_categories(df, "label_topic", LEVEL2_LABELS)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_dir = os.path.join(BASE_OUTPUT_DIR, f"run_{timestamp}")
-    os.makedirs(output_dir, exist_ok=True)
-
+    output_dir = open_run(BASE_OUTPUT_DIR)
     output_csv = os.path.join(output_dir, "level2_labeled.csv")
 
+    # Decisions are appended to the log as they are made; the CSV is written once at the end
+    log = ResultsLog(output_dir, INPUT_FILE, len(df))
+    restored = apply_results(df, log.replay())
+    if restored:
+        print(f"Resumed {restored} labelled rows from {log.path}")
 
-    for idx, row in df.iterrows():
-        if df.at[idx, "label_topic"].strip():
-            continue
+    # Rule-based suggestions for every row up front
+    suggestions = dict(zip(df.index, infer_level2_topics(df["clean_text"], df["label_source"])))
 
-        suggestion = infer_level2_topic(
-            row.get("clean_text", ""),
-            row.get("label_source", "")
-        )
-
-        # LLM suggestion
-        llm_label, llm_reason = llm_label_suggestion(row.get("label_source", ""), row.get("clean_text", ""))
-
-        print("\n--------------------------------------------------")
-        print(f"Row index: {idx}")
-        print(f"Source: {row.get('label_source')}")
-        print(f"Rule-based suggestion: {suggestion}")
-        if llm_label:
-            print(f"LLM suggestion: {llm_label}")
-            if llm_reason:
-                print(f"LLM reason: {llm_reason}")
-        print("\nEmail preview:\n")
-        print(row.get("clean_text", "")[:MAX_PREVIEW_CHARS])
-
-        ans = input("\nAccept suggestion? [Enter/y = yes | n = change | l = LLM | s = skip | q = quit]: ").strip().lower()
-
-        if ans == "q":
-            break
-        elif ans == "s":
-            continue
-        elif ans == "l" and llm_label:
-            df.at[idx, "label_topic"] = llm_label
-            print("LLM label accepted")
-        elif ans in ["", "y"]:
-            df.at[idx, "label_topic"] = suggestion
-            print("Rule-based label accepted")
-        else:
-            new_label = choose_label()
-            df.at[idx, "label_topic"] = new_label
-            print("Updated")
-
-        df.to_csv(output_csv, index=False, encoding="utf-8")
+    try:
+        for idx, row in df.iterrows():
+            if df.at[idx, "label_topic"].strip():
+                continue
+
+            suggestion = suggestions[idx]
+
+            # LLM suggestion
+            llm_label, llm_reason = llm_label_suggestion(row.get("label_source", ""), row.get("clean_text", ""))
+
+            print("\n--------------------------------------------------")
+            print(f"Row index: {idx}")
+            print(f"Source: {row.get('label_source')}")
+            print(f"Rule-based suggestion: {suggestion}")
+            if llm_label:
+                print(f"LLM suggestion: {llm_label}")
+                if llm_reason:
+                    print(f"LLM reason: {llm_reason}")
+            print("\nEmail preview:\n")
+            print(row.get("clean_text", "")[:MAX_PREVIEW_CHARS])
+
+            ans = input("\nAccept suggestion? [Enter/y = yes | n = change | l = LLM | s = skip | q = quit]: ").strip().lower()
+
+            if ans == "q":
+                break
+            elif ans == "s":
+                continue
+            elif ans == "l" and llm_label:
+                ensure_categories(df, "label_topic", [llm_label])
+                df.at[idx, "label_topic"] = llm_label
+                print("LLM label accepted")
+            elif ans in ["", "y"]:
+                df.at[idx, "label_topic"] = suggestion
+                print("Rule-based label accepted")
+            else:
+                new_label = choose_label()
+                df.at[idx, "label_topic"] = new_label
+                print("Updated")
+
+            log.record(idx, df.at[idx, "label_topic"], source=row.get("label_source"))
+    finally:
+        log.close()
+        compact(df, output_csv)
         write_readme(output_dir, df)
 
-    df.to_csv(output_csv, index=False, encoding="utf-8")
-    write_readme(output_dir, df)
-
+    print(f"LLM cache: {get_cache().stats()}")
+    get_cache().flush()
     print("\nSession ended.")
     print(f"Output saved in: {output_dir}")
 
@@ -1,7 +1,16 @@
 import os
+import sys
 import pandas as pd
-from datetime import datetime
-import requests
+from active_learning import ActiveSampler, MarkerPrefetcher
+from llm_extractor import ExtractionFailed, MarkerExtractor
+from marker_cache import MarkerCache
+from results_log import ResultsLog, apply_results, compact, open_run
+from topic_model import load_topic_model
+from topic_rules import decide_topics, marker_table
+
+# Shared corpus I/O lives one level up (Machine_Learning_Algo/dataset_io.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dataset_io import ensure_categories, normalize, read_dataset
 
 # ----------------------------------------------------------
 # Config
@@ -10,6 +19,18 @@ import requests
 INPUT_FILE = r"D:\vanshmalanidata\Documents\GitHub\Uni-Dash_Reborn\Machine_Learning_Algo\output_20260103_222919\source_labeled_dataset.csv"
 BASE_OUTPUT_DIR = "level2_annotation_runs"
 MAX_PREVIEW_CHARS = 500
+MANUAL_LABELS = 50         # rows shown to the annotator before auto-labelling
+AUTO_LABEL_CHUNK = 200     # rows per concurrent batch; results are logged after each
+
+_extractor = None
+
+
+def get_extractor():
+    # Created on first use so importing this module doesn't open the cache file
+    global _extractor
+    if _extractor is None:
+        _extractor = MarkerExtractor(cache=MarkerCache())
+    return _extractor
 
 LEVEL2_LABELS = [
     "Timetable / Schedule Update",
@@ -29,7 +50,7 @@ LEVEL2_LABELS = [
 
 def extract_obligation_markers(label_source, clean_text):
     """
-    Calls Ollama (localhost:11434, model 'llama3') to extract obligation markers.
+    Calls Ollama (OLLAMA_URL, model OLLAMA_MODEL – default llama3) to extract obligation markers.
     Returns a dict with keys:
         has_required_action (bool)
         action_type (str)
@@ -41,48 +62,13 @@ def extract_obligation_markers(label_source, clean_text):
         optional_participation (bool)
         deadline (str or None)
         academic_work_type (str)
+        parse_errors (dict, only if some fields didn't parse: key -> reason)
+    Single blocking call for the interactive loop; bulk labelling goes through
+    MarkerExtractor.run so requests run concurrently.
     """
-    prompt = f"""You are assisting with academic email topic extraction.\n\nContext:\nEach email has a known SOURCE (who sent it).\nYour task is to extract obligation markers, NOT to assign a topic label.\n\nAnswer ONLY the following questions, in the exact format below.\nDo NOT invent categories or labels.\n\nQuestions:\n1. Is there a required student action? (yes / no)\n2. What is the action verb? (pay / submit / attend / register / none)\n3. Is there a consequence if ignored? (yes / no / unclear)\n4. Is the action enforced by the university system? (yes / no)\n5. Is participation optional? (yes / no)\n6. Is there a deadline mentioned or implied? (text span or none)\n7. Is the action related to an exam process? (yes / no)\n8. Is there a change in schedule/date/time/location? (yes / no)\n9. Is this an optional learning opportunity? (yes / no)\n10. Is this an optional participation event? (yes / no)\n11. What is the academic work type? (ongoing_coursework / one_time_requirement / informational_context / optional_activity)\n\nInput:\nSOURCE: {label_source}\nEMAIL CONTENT:\n{clean_text}\n\nOutput format (strict):\n1. Required action: <yes/no>\n2. Action verb: <verb>\n3. Consequence: <yes/no/unclear>\n4. University enforced: <yes/no>\n5. Optional participation: <yes/no>\n6. Deadline: <text span/none>\n7. Exam related: <yes/no>\n8. Schedule changed: <yes/no>\n9. Optional learning: <yes/no>\n10. Optional participation event: <yes/no>\n11. Academic work type: <ongoing_coursework/one_time_requirement/informational_context/optional_activity>\n"""
     try:
-        response = requests.post(
-            "http://127.0.0.1:11434/api/generate",
-            json={
-                "model": "llama3",
-                "prompt": prompt,
-                "stream": False
-            },
-            timeout=30
-        )
-        response.raise_for_status()
-        result = response.json()
-        output = result.get("response", "")
-        # Parse output
-        markers = {}
-        for line in output.splitlines():
-            if line.startswith("1. Required action:"):
-                markers["has_required_action"] = line.split(":",1)[-1].strip().lower() == "yes"
-            elif line.startswith("2. Action verb:"):
-                markers["action_type"] = line.split(":",1)[-1].strip().lower()
-            elif line.startswith("3. Consequence:"):
-                markers["consequence"] = line.split(":",1)[-1].strip().lower()
-            elif line.startswith("4. University enforced:"):
-                markers["university_enforced"] = line.split(":",1)[-1].strip().lower() == "yes"
-            elif line.startswith("5. Optional participation:"):
-                markers["optional_participation"] = line.split(":",1)[-1].strip().lower() == "yes"
-            elif line.startswith("6. Deadline:"):
-                markers["deadline"] = line.split(":",1)[-1].strip()
-            elif line.startswith("7. Exam related:"):
-                markers["exam_related"] = line.split(":",1)[-1].strip().lower() == "yes"
-            elif line.startswith("8. Schedule changed:"):
-                markers["schedule_changed"] = line.split(":",1)[-1].strip().lower() == "yes"
-            elif line.startswith("9. Optional learning:"):
-                markers["optional_learning"] = line.split(":",1)[-1].strip().lower() == "yes"
-            elif line.startswith("10. Optional participation event:"):
-                markers["optional_participation_event"] = line.split(":",1)[-1].strip().lower() == "yes"
-            elif line.startswith("11. Academic work type:"):
-                markers["academic_work_type"] = line.split(":",1)[-1].strip().lower()
-        return markers
-    except Exception as e:
+        return get_extractor().extract_one(label_source, clean_text)
+    except ExtractionFailed as e:
         print(f"[LLM ERROR] {e}")
         return {}
 
@@ -126,36 +112,50 @@ def decide_topic(markers):
 # ----------------------------------------------------------
 
 def main():
-    df = pd.read_csv(INPUT_FILE, dtype=str, keep_default_na=False)
+    df = read_dataset(INPUT_FILE)
     if "label_topic" not in df.columns:
         df["label_topic"] = ""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_dir = os.path.join(BASE_OUTPUT_DIR, f"run_{timestamp}")
-    os.makedirs(output_dir, exist_ok=True)
+    normalize(df)
+    ensure_categories(df, "label_topic", LEVEL2_LABELS)
+    output_dir = open_run(BASE_OUTPUT_DIR)
     output_csv = os.path.join(output_dir, "level2_labeled.csv")
 
-    # Group by label_source, cycle through sources for first 50 manual labels, then auto-label
-    sources = df["label_source"].unique().tolist()
-    source_indices = {src: df[(df["label_source"] == src) & (df["label_topic"].str.strip() == "")].index.tolist() for src in sources}
+    # Every decision is appended to the log; the CSV is only materialised at the end
+    log = ResultsLog(output_dir, INPUT_FILE, len(df))
+    restored = apply_results(df, log.replay())
+    if restored:
+        print(f"Resumed {restored} labelled rows from {log.path}")
+
+    # Manual phase: the most uncertain rows under the trained topic model
+    # (topic_model.py) first, spread across sources; LLM markers for the next
+    # rows are fetched in the background while the current one is on screen
+    model = load_topic_model()
+    unlabelled = df.index[df["label_topic"].astype(str).str.strip() == ""].tolist()
+    proba = None
+    if model is not None and unlabelled:
+        proba = model.predict_proba(
+            df.loc[unlabelled, "clean_text"].astype(str).tolist(),
+            df.loc[unlabelled, "label_source"].astype(str).tolist(),
+        )
+    sampler = ActiveSampler(unlabelled, df.loc[unlabelled, "label_source"], proba)
+    prefetcher = MarkerPrefetcher(lambda: MarkerExtractor(cache=MarkerCache()))
     manual_labelled = 0
-    source_cycle = 0
     total_rows = len(df)
     labelled_rows = 0
     # Track which indices have been manually labelled
     manually_labelled_indices = set()
-    # First, cycle through sources for first 50 manual labels
-    while manual_labelled < 50 and sum(len(lst) for lst in source_indices.values()) > 0:
-        src = sources[source_cycle % len(sources)]
-        idx_list = source_indices[src]
-        if idx_list:
-            idx = idx_list.pop(0)
+    rows = ((idx, df.at[idx, "label_source"], df.at[idx, "clean_text"]) for idx in sampler)
+    try:
+        for idx, markers in prefetcher.iterate(rows):
+            if manual_labelled >= MANUAL_LABELS:
+                break
             row = df.loc[idx]
             print("\n--------------------------------------------------")
             print(f"Row index: {idx}")
             print(f"Source: {row.get('label_source')}")
             print("\nEmail preview:\n")
             print(row.get("clean_text", "")[:MAX_PREVIEW_CHARS])
-            markers = extract_obligation_markers(row.get("label_source", ""), row.get("clean_text", ""))
+            markers = dict(markers)
             markers["label_source"] = row.get("label_source", "")
             topic = decide_topic(markers)
             print(f"\nExtracted markers: {markers}")
@@ -184,23 +184,61 @@ def main():
                         break
                     print("Invalid choice. Retry.")
                 print("Updated")
-            df.to_csv(output_csv, index=False, encoding="utf-8")
+            log.record(idx, df.at[idx, "label_topic"], row.get("label_source", ""), markers)
             manual_labelled += 1
             manually_labelled_indices.add(idx)
-        source_cycle += 1
-    # Now, auto-label the rest
-    for idx, row in df.iterrows():
-        if df.at[idx, "label_topic"].strip() or idx in manually_labelled_indices:
-            continue
-        markers = extract_obligation_markers(row.get("label_source", ""), row.get("clean_text", ""))
-        markers["label_source"] = row.get("label_source", "")
-        topic = decide_topic(markers)
-        df.at[idx, "label_topic"] = topic
-        if (labelled_rows + manual_labelled) % 100 == 0:
-            print(f"Auto-labelled {labelled_rows + manual_labelled} / {total_rows}")
-        df.to_csv(output_csv, index=False, encoding="utf-8")
-        labelled_rows += 1
-    df.to_csv(output_csv, index=False, encoding="utf-8")
+    finally:
+        prefetcher.close()
+    # Now, auto-label the rest – LLM calls run concurrently, one chunk at a time
+    pending = [
+        idx for idx in df.index
+        if not df.at[idx, "label_topic"].strip() and idx not in manually_labelled_indices
+    ]
+    # The topic model labels the rows it is confident about in one batch;
+    # only the rest go to the LLM
+    if model is not None and pending:
+        labels, confidence, confident = model.route(
+            df.loc[pending, "clean_text"].astype(str).tolist(),
+            df.loc[pending, "label_source"].astype(str).tolist(),
+        )
+        ensure_categories(df, "label_topic", labels[confident])
+        decisions = []
+        for idx, label, p, ok in zip(pending, labels, confidence, confident):
+            if ok:
+                df.at[idx, "label_topic"] = label
+                decisions.append((idx, str(label), df.at[idx, "label_source"], {"model_confidence": round(float(p), 4)}))
+        log.record_many(decisions)
+        labelled_rows += len(decisions)
+        pending = [idx for idx, ok in zip(pending, confident) if not ok]
+        print(f"Topic model labelled {len(decisions)} rows (confidence >= {model.threshold}); {len(pending)} left for the LLM")
+    failed = {}
+    for start in range(0, len(pending), AUTO_LABEL_CHUNK):
+        chunk = pending[start:start + AUTO_LABEL_CHUNK]
+        results, failures = get_extractor().run(
+            (idx, df.at[idx, "label_source"], df.at[idx, "clean_text"]) for idx in chunk
+        )
+        rows = list(results)
+        for idx in rows:
+            results[idx]["label_source"] = df.at[idx, "label_source"]
+        # Same rules as decide_topic, evaluated for the whole chunk at once
+        topics = decide_topics(marker_table(results[idx] for idx in rows))
+        df.loc[rows, "label_topic"] = topics
+        log.record_many(
+            (idx, str(topic), results[idx]["label_source"], results[idx]) for idx, topic in zip(rows, topics)
+        )
+        failed.update(failures)
+        labelled_rows += len(results)
+        print(f"Auto-labelled {labelled_rows + manual_labelled} / {total_rows} ({len(failed)} failed)")
+    # Rows the LLM never answered stay unlabelled; list them so the next run can retry
+    if failed:
+        failed_csv = os.path.join(output_dir, "llm_failed_rows.csv")
+        pd.DataFrame({"row_index": list(failed), "error": list(failed.values())}).to_csv(failed_csv, index=False)
+        print(f"{len(failed)} rows failed LLM extraction, see {failed_csv}")
+    log.close()
+    compact(df, output_csv)
+    print(f"LLM cache: {get_extractor().cache.stats()}")
+    get_extractor().cache.flush()
+    get_extractor().close()
     print("\nSession ended.")
     print(f"Output saved in: {output_dir}")
 
@@ -0,0 +1,266 @@
+import asyncio
+import json
+import os
+import random
+from contextlib import nullcontext
+
+import httpx
+
+from marker_cache import cache_key
+from marker_parser import MarkerStreamParser
+from prompt_budget import EMAIL_TOKEN_BUDGET, truncate_email
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+# Point OLLAMA_URL at a local stub server for tests/benchmarks
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://127.0.0.1:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+
+# Match this to OLLAMA_NUM_PARALLEL on the server – more in flight just queues there
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))          # per request, for timeouts / 5xx
+LLM_RETRY_ROUNDS = int(os.getenv("LLM_RETRY_ROUNDS", "1"))  # extra passes over the failed-row queue
+
+# Keep the model (and its KV cache of the instruction prefix) loaded between calls
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Evaluate MARKER_PREFIX once and send its `context` tokens with each email instead
+# of the prefix text. Off by default: current Ollama reuses a cached identical
+# prefix by itself, and `context` replays the prefix as an earlier turn.
+OLLAMA_REUSE_CONTEXT = os.getenv("OLLAMA_REUSE_CONTEXT", "0") == "1"
+
+# Bump whenever the prompt text changes (cached markers are keyed on it)
+PROMPT_VERSION = "markers-v2"
+
+# Static instructions + answer format come first and are byte-identical for every
+# email, so the server only evaluates the per-email MARKER_INPUT tail
+MARKER_INSTRUCTIONS = """You are assisting with academic email topic extraction.\n\nContext:\nEach email has a known SOURCE (who sent it).\nYour task is to extract obligation markers, NOT to assign a topic label.\n\nAnswer ONLY the following questions, in the exact format below.\nDo NOT invent categories or labels.\n\nQuestions:\n1. Is there a required student action? (yes / no)\n2. What is the action verb? (pay / submit / attend / register / none)\n3. Is there a consequence if ignored? (yes / no / unclear)\n4. Is the action enforced by the university system? (yes / no)\n5. Is participation optional? (yes / no)\n6. Is there a deadline mentioned or implied? (text span or none)\n7. Is the action related to an exam process? (yes / no)\n8. Is there a change in schedule/date/time/location? (yes / no)\n9. Is this an optional learning opportunity? (yes / no)\n10. Is this an optional participation event? (yes / no)\n11. What is the academic work type? (ongoing_coursework / one_time_requirement / informational_context / optional_activity)\n\n"""
+MARKER_OUTPUT_FORMAT = """Output format (strict):\n1. Required action: <yes/no>\n2. Action verb: <verb>\n3. Consequence: <yes/no/unclear>\n4. University enforced: <yes/no>\n5. Optional participation: <yes/no>\n6. Deadline: <text span/none>\n7. Exam related: <yes/no>\n8. Schedule changed: <yes/no>\n9. Optional learning: <yes/no>\n10. Optional participation event: <yes/no>\n11. Academic work type: <ongoing_coursework/one_time_requirement/informational_context/optional_activity>\n"""
+MARKER_PREFIX = MARKER_INSTRUCTIONS + MARKER_OUTPUT_FORMAT + "\n"
+MARKER_INPUT = """Input:\nSOURCE: {label_source}\nEMAIL CONTENT:\n{clean_text}\n\nAnswer:\n"""
+
+
+class ExtractionFailed(Exception):
+    pass
+
+
+# ----------------------------------------------------------
+# Prompt + parsing
+# ----------------------------------------------------------
+
+def build_marker_input(label_source, clean_text, budget=EMAIL_TOKEN_BUDGET):
+    """Per-email tail of the prompt; the body is cut to `budget` tokens, keeping deadline sentences."""
+    return MARKER_INPUT.format(label_source=label_source, clean_text=truncate_email(clean_text, budget))
+
+
+def build_marker_prompt(label_source, clean_text, budget=EMAIL_TOKEN_BUDGET):
+    return MARKER_PREFIX + build_marker_input(label_source, clean_text, budget)
+
+
+# ----------------------------------------------------------
+# Extraction engine
+# ----------------------------------------------------------
+
+class MarkerExtractor:
+    """
+    Runs obligation-marker extraction against Ollama with up to `concurrency`
+    requests in flight over one pooled HTTP client.
+
+    Each request gets a timeout and retries with backoff. Rows that still fail
+    (or whose output can't be parsed) go on a retry queue that is re-run after
+    the main pass. Anything left after that is returned as a failure instead
+    of being silently labelled from empty markers.
+
+    Answers are streamed and parsed line by line (marker_parser), and the
+    request is closed once all 11 fields are in, so anything the model
+    would write after the last field is never generated.
+
+    With a MarkerCache, rows whose (model, PROMPT_VERSION, source, text) were
+    answered before are served from disk without a request.
+
+    The blocking run()/extract_one() calls share one event loop and one client
+    across calls, so the interactive loop reuses its keep-alive connection;
+    close() releases them.
+    """
+
+    def __init__(self, url=OLLAMA_URL, model=OLLAMA_MODEL, concurrency=LLM_CONCURRENCY,
+                 timeout=LLM_TIMEOUT, retries=LLM_RETRIES, retry_rounds=LLM_RETRY_ROUNDS, cache=None,
+                 email_budget=EMAIL_TOKEN_BUDGET, keep_alive=OLLAMA_KEEP_ALIVE, reuse_context=OLLAMA_REUSE_CONTEXT):
+        self.url = url.rstrip("/")
+        self.model = model
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_rounds = retry_rounds
+        self.cache = cache
+        self.email_budget = email_budget
+        self.keep_alive = keep_alive
+        self.reuse_context = reuse_context
+        # The budget changes the prompt text, so it is part of the cache key
+        self.prompt_version = f"{PROMPT_VERSION}-b{email_budget}"
+        self._context = None
+        self._primed = False
+        self.chunks_received = 0      # streamed chunks (~ tokens) read this session
+        self.early_stops = 0          # answers cut off after the last field
+        self._loop = None
+        self._http = None
+
+    def _client(self):
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+
+    def _payload(self, label_source, clean_text):
+        body = build_marker_input(label_source, clean_text, self.email_budget)
+        payload = {"model": self.model, "stream": True, "keep_alive": self.keep_alive}
+        if self._context:
+            payload.update(prompt=body, context=self._context)
+        else:
+            payload["prompt"] = MARKER_PREFIX + body
+        return payload
+
+    async def _prime(self, client):
+        """reuse_context mode: evaluates MARKER_PREFIX once and keeps the returned context tokens."""
+        self._primed = True
+        try:
+            response = await client.post(
+                f"{self.url}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": MARKER_PREFIX,
+                    "stream": False,
+                    "keep_alive": self.keep_alive,
+                    "options": {"num_predict": 1},
+                },
+            )
+            response.raise_for_status()
+            self._context = response.json().get("context")
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"[LLM] Prefix priming failed, sending full prompts: {e!r}")
+
+    async def _generate(self, client, payload):
+        """
+        Streams the answer into a MarkerStreamParser and hangs up as soon as
+        all 11 fields are in – closing the stream makes Ollama stop
+        generating, so the model's trailing chatter is never produced.
+        Returns the finished parser.
+        """
+        for attempt in range(self.retries + 1):
+            parser = MarkerStreamParser()
+            try:
+                async with client.stream(
+                    "POST",
+                    f"{self.url}/api/generate",
+                    json=payload,
+                ) as response:
+                    if response.status_code < 500:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if not line:
+                                continue
+                            chunk = json.loads(line)
+                            if parser.feed(chunk.get("response", "")):
+                                self.early_stops += 1
+                                break
+                            if chunk.get("done"):
+                                break
+                        self.chunks_received += parser.chunks
+                        parser.close()
+                        return parser
+                    error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                error = repr(e)
+            if attempt < self.retries:
+                await asyncio.sleep(random.uniform(0, 0.5 * 2 ** attempt))
+        raise ExtractionFailed(error)
+
+    async def extract(self, client, label_source, clean_text):
+        parser = await self._generate(client, self._payload(label_source, clean_text))
+        markers = parser.markers
+        if "has_required_action" not in markers:
+            raise ExtractionFailed(f"unparseable response: {parser.errors}")
+        # Fields that didn't parse travel with the markers (and into the results log)
+        if parser.errors:
+            markers["parse_errors"] = parser.errors
+        return markers
+
+    async def extract_many(self, rows, on_result=None, client=None):
+        """
+        rows: iterable of (key, label_source, clean_text).
+        on_result(key, markers) is called as each row succeeds.
+        Uses `client` when given, else a client opened for this call.
+        Returns (results {key: markers}, failures {key: error}).
+        """
+        results, failures = {}, {}
+        pending, keys = [], {}
+        for row in rows:
+            key, label_source, clean_text = row
+            if self.cache is not None:
+                keys[key] = cache_key(self.model, self.prompt_version, label_source, clean_text)
+                markers = self.cache.get(keys[key])
+                # Entries with parse errors (written before they were skipped) are retried
+                if markers is not None and "parse_errors" not in markers:
+                    results[key] = markers
+                    if on_result:
+                        on_result(key, markers)
+                    continue
+            pending.append(row)
+        if not pending:
+            return results, failures
+
+        slots = asyncio.Semaphore(self.concurrency)
+
+        # A client passed in stays open for the caller's next batch
+        async with (nullcontext(client) if client is not None else self._client()) as client:
+            if self.reuse_context and not self._primed:
+                await self._prime(client)
+
+            async def run(row):
+                key, label_source, clean_text = row
+                async with slots:
+                    try:
+                        markers = await self.extract(client, label_source, clean_text)
+                    except Exception as e:
+                        failures[key] = str(e)
+                        return
+                failures.pop(key, None)
+                results[key] = markers
+                # A garbled answer may parse next time; only complete answers are cached
+                if self.cache is not None and "parse_errors" not in markers:
+                    self.cache.put(keys[key], markers)
+                if on_result:
+                    on_result(key, markers)
+
+            for _ in range(self.retry_rounds + 1):
+                await asyncio.gather(*(run(row) for row in pending))
+                pending = [row for row in pending if row[0] in failures]
+                if not pending:
+                    break
+
+        return results, failures
+
+    def run(self, rows, on_result=None):
+        """Blocking wrapper around extract_many for scripts."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._http = self._client()
+        return self._loop.run_until_complete(self.extract_many(rows, on_result, client=self._http))
+
+    def extract_one(self, label_source, clean_text):
+        """Single blocking extraction (interactive loop). Raises ExtractionFailed."""
+        results, failures = self.run([(0, label_source, clean_text)])
+        if failures:
+            raise ExtractionFailed(failures[0])
+        return results[0]
+
+    def close(self):
+        """Closes the client and event loop kept by run()."""
+        if self._loop is not None:
+            self._loop.run_until_complete(self._http.aclose())
+            # As asyncio.run() does: finalise streams abandoned after an early stop
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+            self._loop = self._http = None
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "200000"))
+LLM_CACHE_TOUCH_BATCH = int(os.getenv("LLM_CACHE_TOUCH_BATCH", "500"))   # buffered last_used updates per write
+
+
+def cache_key(model, prompt_version, label_source, clean_text):
+    """Content address: any change to model, prompt template, source or text is a new entry."""
+    h = hashlib.sha256()
+    for part in (model, prompt_version, label_source or "", clean_text or ""):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class MarkerCache:
+    """
+    Persistent SQLite cache of parsed LLM outputs (marker dicts, label suggestions).
+
+    Entries are keyed by cache_key(). Once the table grows past `max_entries`,
+    the least recently used tenth is evicted. hits/misses count this session's
+    lookups.
+
+    Hits don't write: their last_used stamps are buffered and written in one
+    transaction every `touch_batch` hits, on put() and on close(). Stamps still
+    buffered when the process dies are lost, which only makes those entries
+    look older to the evictor.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES, touch_batch=LLM_CACHE_TOUCH_BATCH):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_batch = touch_batch
+        self._touched = {}      # key -> last_used not yet written
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                   key TEXT PRIMARY KEY,
+                   value TEXT NOT NULL,
+                   created_at REAL NOT NULL,
+                   last_used REAL NOT NULL
+               )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache (last_used)")
+        self.conn.commit()
+        self.size = self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        row = self.conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time()
+        if len(self._touched) >= self.touch_batch:
+            self.flush()
+        return json.loads(row[0])
+
+    def _write_touches(self):
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE llm_cache SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def flush(self):
+        """Writes buffered last_used stamps."""
+        self._write_touches()
+        self.conn.commit()
+
+    def put(self, key, value):
+        now = time.time()
+        self._touched.pop(key, None)
+        # Written before a possible eviction, so recent hits aren't evicted as stale
+        self._write_touches()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now, now),
+        )
+        # Approximate (replacements also count); recounted exactly before evicting
+        self.size += 1
+        if self.size > self.max_entries:
+            self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        self.size = self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if self.size <= self.max_entries:
+            return
+        # Drop down to 90% in one statement so eviction isn't paid on every put
+        excess = self.size - int(self.max_entries * 0.9)
+        self.conn.execute(
+            "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self.size -= excess
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        self.flush()
+        self.conn.close()
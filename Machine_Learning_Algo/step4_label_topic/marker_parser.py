@@ -0,0 +1,132 @@
+import re
+
+# ----------------------------------------------------------
+# Fields – (number in the prompt, marker key, label, kind)
+# ----------------------------------------------------------
+
+MARKER_FIELDS = [
+    (1, "has_required_action", "required action", "bool"),
+    (2, "action_type", "action verb", "word"),
+    (3, "consequence", "consequence", "word"),
+    (4, "university_enforced", "university enforced", "bool"),
+    (5, "optional_participation", "optional participation", "bool"),
+    (6, "deadline", "deadline", "text"),
+    (7, "exam_related", "exam related", "bool"),
+    (8, "schedule_changed", "schedule changed", "bool"),
+    (9, "optional_learning", "optional learning", "bool"),
+    (10, "optional_participation_event", "optional participation event", "bool"),
+    (11, "academic_work_type", "academic work type", "word"),
+]
+FIELDS_BY_NUMBER = {num: (key, kind) for num, key, _, kind in MARKER_FIELDS}
+FIELDS_BY_LABEL = {label: (key, kind) for _, key, label, kind in MARKER_FIELDS}
+
+TRUE_WORDS = {"yes", "y", "true"}
+FALSE_WORDS = {"no", "n", "false"}
+
+# "1. Required action: yes", "1) required action - yes", "**1. Required action:** yes",
+# "- Required action: yes" ...
+LINE_RE = re.compile(
+    r"^[\s*#>-]*"
+    r"(?:(?P<num>\d{1,2})\s*[.):\]]\s*)?"
+    r"\**\s*(?P<label>[a-z][a-z /_]*?)\s*\**\s*[:=\-–]\s*"
+    r"(?P<value>.*)$",
+    re.IGNORECASE,
+)
+
+
+def _clean_value(value):
+    """Strips markdown emphasis, <placeholder> brackets, quotes and a trailing full stop."""
+    value = value.strip().strip("*").strip()
+    if value.startswith("<") and value.endswith(">"):
+        value = value[1:-1].strip()
+    return value.strip("\"'`").rstrip(".").strip()
+
+
+# ----------------------------------------------------------
+# Parser
+# ----------------------------------------------------------
+
+class MarkerStreamParser:
+    """
+    Incremental parser for the 11-line marker answer.
+
+    feed() takes text as it streams in and parses every line as soon as it
+    is complete; it returns True once all 11 fields have been seen, so the
+    caller can stop generation there. Lines are matched by label when it is
+    recognisable, else by number, so "1) Required action - yes" or
+    "**Required action:** Yes." still parse. close() handles a final
+    unterminated line and records never-answered fields.
+
+    markers holds parsed values; errors maps marker key -> reason for
+    fields that were missing or had an unusable value.
+    """
+
+    def __init__(self):
+        self.markers = {}
+        self.errors = {}
+        self.chunks = 0
+        self._buffer = ""
+
+    @property
+    def done(self):
+        return len(self.markers) + len(self.errors) == len(MARKER_FIELDS)
+
+    def feed(self, text):
+        self.chunks += 1
+        if "\n" not in text:
+            self._buffer += text
+            return self.done
+        lines = (self._buffer + text).split("\n")
+        self._buffer = lines.pop()
+        for line in lines:
+            self._parse_line(line)
+            if self.done:
+                break
+        return self.done
+
+    def close(self):
+        if self._buffer:
+            self._parse_line(self._buffer)
+            self._buffer = ""
+        for _, key, _, _ in MARKER_FIELDS:
+            if key not in self.markers and key not in self.errors:
+                self.errors[key] = "missing"
+        return self.markers
+
+    def _parse_line(self, line):
+        m = LINE_RE.match(line)
+        if not m:
+            return
+        label = " ".join(m.group("label").lower().replace("_", " ").split())
+        field = FIELDS_BY_LABEL.get(label)
+        if field is None and m.group("num"):
+            field = FIELDS_BY_NUMBER.get(int(m.group("num")))
+        if field is None:
+            return
+        key, kind = field
+        if key in self.markers:
+            return      # first answer wins; later lines are the model repeating itself
+        value = _clean_value(m.group("value"))
+        if kind == "text":
+            self.markers[key] = value
+        elif kind == "word":
+            self.markers[key] = value.lower()
+        else:
+            words = value.lower().replace(",", " ").split()
+            first = words[0] if words else ""
+            if first in TRUE_WORDS:
+                self.markers[key] = True
+            elif first in FALSE_WORDS:
+                self.markers[key] = False
+            else:
+                self.errors[key] = f"not yes/no: {value[:40]!r}"
+                return
+        self.errors.pop(key, None)
+
+
+def parse_marker_output(output):
+    """Parses a complete (non-streamed) answer. Returns (markers, errors)."""
+    parser = MarkerStreamParser()
+    parser.feed(output)
+    parser.close()
+    return parser.markers, parser.errors
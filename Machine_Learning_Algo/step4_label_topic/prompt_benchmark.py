@@ -0,0 +1,188 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from llm_extractor import MARKER_INSTRUCTIONS, MARKER_OUTPUT_FORMAT, MarkerExtractor
+from marker_parser import MarkerStreamParser
+from prompt_budget import TOKEN_RE
+
+# Shared corpus I/O lives one level up (Machine_Learning_Algo/dataset_io.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dataset_io import read_dataset
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+INPUT_FILE = "level_2_fixed_3rd_jan.csv"
+SAMPLE_EMAILS = 60
+STUB_PORT = 11997
+# Rough CPU llama3-8B ratio: evaluating a prompt token is ~10x cheaper than generating one
+PROMPT_MS_PER_TOKEN = 0.25
+GEN_MS_PER_TOKEN = 2.5
+
+# Replayed for every email: an answer in the prompt's format followed by the kind of
+# explanation llama3 tends to append after field 11
+RECORDED_ANSWER = (
+    "1. Required action: yes\n2. Action verb: submit\n3. Consequence: unclear\n"
+    "4. University enforced: yes\n5. Optional participation: no\n6. Deadline: 25.02.2025\n"
+    "7. Exam related: no\n8. Schedule changed: no\n9. Optional learning: no\n"
+    "10. Optional participation event: no\n11. Academic work type: one_time_requirement\n\n"
+    "Explanation: the email asks students to collect their marksheets from the office "
+    "before the stated date, which is an administrative requirement set by the university."
+)
+
+
+# ----------------------------------------------------------
+# Stub server
+# ----------------------------------------------------------
+
+class StubOllama:
+    """
+    Minimal /api/generate stand-in that replays RECORDED_ANSWER token by token.
+
+    Models Ollama's prompt cache: the prompt tokens shared with the previous
+    request (its longest common prefix) are not evaluated again. A `context`
+    list is treated as already-tokenised prompt prefix. Costs are slept:
+    PROMPT_MS_PER_TOKEN per evaluated prompt token, GEN_MS_PER_TOKEN per
+    streamed answer token. Every request appends its counts to `stats`.
+    """
+
+    def __init__(self, port=STUB_PORT):
+        self.vocab = {}
+        self.cached = []
+        self.lock = threading.Lock()
+        self.stats = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.handle(self, body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _ids(self, text):
+        return [self.vocab.setdefault(tok, len(self.vocab)) for tok in TOKEN_RE.findall(text)]
+
+    def handle(self, handler, body):
+        with self.lock:     # one model slot: requests are evaluated one at a time
+            prompt = list(body.get("context") or []) + self._ids(body["prompt"])
+            shared = 0
+            for a, b in zip(prompt, self.cached):
+                if a != b:
+                    break
+                shared += 1
+            self.cached = prompt
+            evaluated = len(prompt) - shared
+            time.sleep(evaluated * PROMPT_MS_PER_TOKEN / 1000)
+            stat = {"prompt_sent": len(TOKEN_RE.findall(body["prompt"])), "prompt_evaluated": evaluated, "generated": 0}
+            self.stats.append(stat)
+
+            answer = body.get("options", {}).get("num_predict")
+            tokens = [t + " " for t in RECORDED_ANSWER.split(" ")][:answer]
+            if not body.get("stream", True):
+                time.sleep(len(tokens) * GEN_MS_PER_TOKEN / 1000)
+                stat["generated"] = len(tokens)
+                self._send(handler, {"response": "".join(tokens), "done": True, "context": prompt + self._ids("".join(tokens))})
+                return
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/x-ndjson")
+            handler.send_header("Transfer-Encoding", "chunked")
+            handler.end_headers()
+            try:
+                for tok in tokens:
+                    time.sleep(GEN_MS_PER_TOKEN / 1000)
+                    self._chunk(handler, {"response": tok, "done": False})
+                    stat["generated"] += 1
+                self._chunk(handler, {"response": "", "done": True, "prompt_eval_count": evaluated})
+                handler.wfile.write(b"0\r\n\r\n")
+                handler.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass    # client hung up after the last field: generation stops here
+
+    @staticmethod
+    def _chunk(handler, obj):
+        line = (json.dumps(obj) + "\n").encode("utf-8")
+        handler.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        handler.wfile.flush()
+
+    @staticmethod
+    def _send(handler, obj):
+        data = json.dumps(obj).encode("utf-8")
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+
+# ----------------------------------------------------------
+# Before / after
+# ----------------------------------------------------------
+
+class LegacyExtractor(MarkerExtractor):
+    """
+    Request as sent before: email between the questions and the answer format,
+    untruncated, and a non-streamed answer that is parsed once it is complete –
+    so the model's trailing explanation is generated and paid for.
+    """
+
+    def _payload(self, label_source, clean_text):
+        prompt = (
+            MARKER_INSTRUCTIONS
+            + f"Input:\nSOURCE: {label_source}\nEMAIL CONTENT:\n{clean_text}\n\n"
+            + MARKER_OUTPUT_FORMAT
+        )
+        return {"model": self.model, "prompt": prompt, "stream": False}
+
+    async def _generate(self, client, payload):
+        response = await client.post(f"{self.url}/api/generate", json=payload)
+        response.raise_for_status()
+        parser = MarkerStreamParser()
+        parser.feed(response.json().get("response", ""))
+        parser.close()
+        return parser
+
+
+def run(stub, label, extractor, rows):
+    stub.stats.clear()
+    stub.cached = []
+    start = time.perf_counter()
+    results, failures = extractor.run(rows)
+    elapsed = time.perf_counter() - start
+    extractor.close()
+    time.sleep(0.1)     # let the stub finish recording hung-up streams
+    stats = pd.DataFrame(stub.stats[-len(rows):])
+    print(
+        f"{label:<28} prompt tokens sent {stats['prompt_sent'].mean():7.1f}  "
+        f"evaluated {stats['prompt_evaluated'].mean():7.1f}  "
+        f"generated {stats['generated'].mean():5.1f}  "
+        f"latency {elapsed / len(rows) * 1000:6.1f} ms/email  ({len(failures)} failed)"
+    )
+    return results
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else INPUT_FILE
+    df = read_dataset(path, columns=["label_source", "clean_text"])
+    sample = df.sample(min(SAMPLE_EMAILS, len(df)), random_state=0)
+    rows = list(zip(range(len(sample)), sample["label_source"], sample["clean_text"]))
+
+    stub = StubOllama()
+    print(f"{len(rows)} emails, one request at a time, stub at {stub.url}")
+    run(stub, "before (email mid-prompt)", LegacyExtractor(url=stub.url, concurrency=1), rows)
+    run(stub, "after (static prefix)", MarkerExtractor(url=stub.url, concurrency=1), rows)
+    run(stub, "after (prefix + context)", MarkerExtractor(url=stub.url, concurrency=1, reuse_context=True), rows)
@@ -0,0 +1,105 @@
+import os
+import re
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+# Token budget for the email body in the marker prompt (the annotator preview
+# is 500 chars; the LLM gets more, but not a 30k-char forwarded thread)
+EMAIL_TOKEN_BUDGET = int(os.getenv("LLM_EMAIL_TOKEN_BUDGET", "400"))
+# Share of the budget always spent on the opening (subject + first lines)
+HEAD_SHARE = 0.4
+GAP = "..."               # marks dropped sentences
+
+# Llama-style tokenisers average a little over one token per word or
+# punctuation mark; close enough to budget against without the real tokenizer
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+
+MONTHS = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+DAY = r"(?:0?[1-9]|[12]\d|3[01])"
+MONTH_NUM = r"(?:0?[1-9]|1[0-2])"
+# 25.02.2025, 25/02/25, 25-2-2025, 25/02 – but not 3.10 or 3.10.12 (versions) or 10-12 (a range)
+NUMERIC_DATE = (
+    rf"(?<![\d.]){DAY}(?:\.{MONTH_NUM}\.\d{{4}}|(?P<sep>[/-]){MONTH_NUM}(?P=sep)(?:\d{{4}}|\d{{2}})|/{MONTH_NUM})"
+    r"(?!\.?\d)"
+    r"|\b\d{4}-\d{2}-\d{2}\b"
+)
+DEADLINE_RE = re.compile(
+    r"\b(?:deadline|due|last date|on or before|till|until|latest|closes?|extended|no later than)\b"
+    rf"|{NUMERIC_DATE}"
+    rf"|\b\d{{1,2}}(?:st|nd|rd|th)?\s+(?:{MONTHS})\b"
+    rf"|\b(?:{MONTHS})\s+\d{{1,2}}\b"
+    r"|\b\d{1,2}(?::\d{2})?\s*(?:am|pm)\b"
+    r"|\b(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|today|tomorrow|tonight)\b",
+    re.IGNORECASE,
+)
+
+
+def count_tokens(text):
+    return len(TOKEN_RE.findall(text))
+
+
+def split_sentences(text):
+    return [s for s in SENTENCE_END_RE.split(text) if s]
+
+
+def _cut(sentence, budget):
+    """First `budget` tokens' worth of a sentence that doesn't fit whole."""
+    end = 0
+    for i, m in enumerate(TOKEN_RE.finditer(sentence)):
+        if i == budget:
+            break
+        end = m.end()
+    return sentence[:end]
+
+
+def truncate_email(text, budget=EMAIL_TOKEN_BUDGET):
+    """
+    Fits an email body into `budget` tokens, keeping what the marker
+    questions need: the opening (HEAD_SHARE of the budget), then every
+    sentence that mentions a date, time or deadline wording, then the rest
+    in order while it fits. Kept sentences stay in their original order;
+    each dropped stretch becomes "..." (not counted against the budget).
+    """
+    text = str(text)
+    if count_tokens(text) <= budget:
+        return text
+
+    sentences = split_sentences(text)
+    sizes = [count_tokens(s) for s in sentences]
+    keep = [False] * len(sentences)
+    used = 0
+
+    # 1. Opening lines
+    head_budget = int(budget * HEAD_SHARE)
+    for i, size in enumerate(sizes):
+        if used + size > head_budget:
+            if i == 0:
+                sentences[0] = _cut(sentences[0], head_budget)
+                sizes[0] = count_tokens(sentences[0])
+                keep[0] = True
+                used = sizes[0]
+            break
+        keep[i] = True
+        used += size
+
+    # 2. Deadline-bearing sentences, then 3. everything else, in order
+    for wanted in (lambda s: DEADLINE_RE.search(s) is not None, lambda s: True):
+        for i, sentence in enumerate(sentences):
+            if not keep[i] and used + sizes[i] <= budget and wanted(sentence):
+                keep[i] = True
+                used += sizes[i]
+
+    out = []
+    for i, sentence in enumerate(sentences):
+        if keep[i]:
+            out.append(sentence.strip())
+        elif not out or out[-1] != GAP:
+            out.append(GAP)
+    return " ".join(out)
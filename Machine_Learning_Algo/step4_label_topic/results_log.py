@@ -0,0 +1,116 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+# Shared corpus I/O lives one level up (Machine_Learning_Algo/dataset_io.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dataset_io import ensure_categories, parquet_path, write_dataset
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+LOG_NAME = "results.jsonl"
+# Point at an existing run folder to pick up an interrupted session where it stopped
+RESUME_RUN = os.getenv("LEVEL2_RESUME_RUN")
+
+
+def open_run(base_dir, resume=RESUME_RUN):
+    """Returns the run folder: `resume` if given, else a new run_<timestamp> folder."""
+    if resume:
+        if not os.path.isdir(resume):
+            raise FileNotFoundError(f"Run folder to resume not found: {resume}")
+        return resume
+    output_dir = os.path.join(base_dir, f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+
+class ResultsLog:
+    """
+    Append-only JSONL log of labelling decisions, one line per decided row:
+        {"row": <df index>, "label": ..., "source": ..., "markers": {...}, "ts": ...}
+
+    Each record is a single append (+ fsync), so saving a decision costs the
+    same whatever the dataset size, and a crash loses at most the row being
+    written. The first line describes the input so a resume against a
+    different file is refused. Later records for a row override earlier ones.
+    """
+
+    def __init__(self, output_dir, input_file, total_rows, fsync=True):
+        self.path = os.path.join(output_dir, LOG_NAME)
+        self.fsync = fsync
+        meta = {"input": os.path.basename(input_file), "rows": int(total_rows)}
+
+        existing = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        if existing:
+            self._check_meta(meta)
+        self.f = open(self.path, "a", encoding="utf-8")
+        if existing:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                # A crash mid-write leaves a partial last line; start a fresh one after it
+                if f.read(1) != b"\n":
+                    self.f.write("\n")
+        else:
+            self._write([{"meta": meta}])
+
+    def _check_meta(self, meta):
+        with open(self.path, encoding="utf-8") as f:
+            first = f.readline()
+        try:
+            logged = json.loads(first).get("meta")
+        except ValueError:
+            logged = None
+        if logged != meta:
+            raise ValueError(f"{self.path} was written for {logged}, not {meta}; start a new run instead")
+
+    def replay(self):
+        """Returns {row: latest record} for everything logged so far."""
+        results = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue    # torn write from a crash
+                if "row" in entry:
+                    results[entry["row"]] = entry
+        return results
+
+    def record(self, row, label, source=None, markers=None):
+        self.record_many([(row, label, source, markers)])
+
+    def record_many(self, decisions):
+        """decisions: iterable of (row, label, source, markers); written with one fsync."""
+        now = time.time()
+        self._write(
+            {"row": int(row), "label": label, "source": source, "markers": markers, "ts": now}
+            for row, label, source, markers in decisions
+        )
+
+    def _write(self, entries):
+        self.f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+        self.f.flush()
+        if self.fsync:
+            os.fsync(self.f.fileno())
+
+    def close(self):
+        self.f.close()
+
+
+def apply_results(df, results, column="label_topic"):
+    """Writes replayed labels back into df; returns how many rows were restored."""
+    rows = [row for row in results if row in df.index]
+    ensure_categories(df, column, [results[row]["label"] for row in rows])
+    for row in rows:
+        df.at[row, column] = results[row]["label"]
+    return len(rows)
+
+
+def compact(df, output_csv):
+    """Materialises the labelled dataset once: Parquet for the next stage plus the CSV export."""
+    write_dataset(df, parquet_path(output_csv))
+    write_dataset(df, output_csv)
@@ -0,0 +1,289 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+# Shared corpus I/O lives one level up (Machine_Learning_Algo/dataset_io.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dataset_io import read_dataset
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+INDEX_DIR = "retrieval_index"
+
+# Same TF-IDF space as the "step 4 academic engine" notebook
+TFIDF_PARAMS = dict(
+    ngram_range=(1, 2),     # captures short academic phrases
+    max_df=0.9,             # ignore overly common terms
+    min_df=3,               # ignore rare noise terms
+    stop_words="english",
+    sublinear_tf=True,      # stabilizes term frequency
+)
+
+
+def fingerprint(texts, topics):
+    """Identifies the labelled set an index was built from, so a stale index is rebuilt."""
+    h = hashlib.sha256()
+    for text, topic in zip(texts, topics):
+        h.update(str(text).encode("utf-8"))
+        h.update(b"\x00")
+        h.update(str(topic).encode("utf-8"))
+        h.update(b"\x01")
+    return h.hexdigest()
+
+
+def top_k(scores, k):
+    """Indices of the k largest scores, best first, without sorting the whole array."""
+    if k >= len(scores):
+        return np.argsort(scores)[::-1]
+    best = np.argpartition(scores, -k)[-k:]
+    return best[np.argsort(scores[best])[::-1]]
+
+
+# ----------------------------------------------------------
+# Index
+# ----------------------------------------------------------
+
+class RetrievalIndex:
+    """
+    Topic-restricted cosine retrieval over labelled emails.
+
+    Rows are L2-normalised TF-IDF vectors sorted by label_topic, so each topic
+    is one contiguous CSR block and cosine similarity is a sparse dot product
+    against that block only. save() writes the vectorizer with joblib and the
+    CSR arrays as .npy files that load() memory-maps.
+    """
+
+    def __init__(self, vectorizer, matrix, row_ids, partitions, fingerprint=None):
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.row_ids = row_ids
+        self.partitions = partitions      # topic -> (start, end) rows of matrix
+        self.fingerprint = fingerprint
+        self.blocks = {
+            topic: _row_block(matrix, start, end) for topic, (start, end) in partitions.items()
+        }
+        # Single-query fast path: skips sklearn's per-call validation in transform()
+        self._analyze = vectorizer.build_analyzer()
+        self._vocabulary = vectorizer.vocabulary_
+        self._idf = vectorizer.idf_
+
+    @classmethod
+    def build(cls, df_labeled, text_column="clean_text", topic_column="label_topic"):
+        order = np.argsort(df_labeled[topic_column].astype(str).to_numpy(), kind="stable")
+        texts = df_labeled[text_column].astype(str).to_numpy()[order]
+        topics = df_labeled[topic_column].astype(str).to_numpy()[order]
+
+        vectorizer = TfidfVectorizer(**TFIDF_PARAMS)
+        matrix = normalize(vectorizer.fit_transform(texts), norm="l2", copy=False).tocsr()
+
+        partitions = {}
+        for topic in dict.fromkeys(topics):
+            rows = np.flatnonzero(topics == topic)
+            partitions[topic] = (int(rows[0]), int(rows[-1]) + 1)
+        return cls(
+            vectorizer,
+            matrix,
+            df_labeled.index.to_numpy()[order],
+            partitions,
+            fingerprint(df_labeled[text_column], df_labeled[topic_column]),
+        )
+
+    # ------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------
+
+    def save(self, index_dir=INDEX_DIR):
+        os.makedirs(index_dir, exist_ok=True)
+        joblib.dump(self.vectorizer, os.path.join(index_dir, "vectorizer.joblib"))
+        for name in ("data", "indices", "indptr"):
+            np.save(os.path.join(index_dir, f"{name}.npy"), getattr(self.matrix, name))
+        np.save(os.path.join(index_dir, "row_ids.npy"), self.row_ids)
+        meta = {
+            "shape": list(self.matrix.shape),
+            "partitions": self.partitions,
+            "fingerprint": self.fingerprint,
+        }
+        with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, index_dir=INDEX_DIR, mmap=True):
+        mode = "r" if mmap else None
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode=mode) for name in ("data", "indices", "indptr")}
+        matrix = sparse.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=tuple(meta["shape"]), copy=False)
+        return cls(
+            joblib.load(os.path.join(index_dir, "vectorizer.joblib")),
+            matrix,
+            np.load(os.path.join(index_dir, "row_ids.npy"), allow_pickle=True),
+            {topic: tuple(bounds) for topic, bounds in meta["partitions"].items()},
+            meta.get("fingerprint"),
+        )
+
+    @classmethod
+    def load_or_build(cls, df_labeled, index_dir=INDEX_DIR):
+        """Loads the saved index if it was built from this exact labelled set, else rebuilds and saves it."""
+        current = fingerprint(df_labeled["clean_text"], df_labeled["label_topic"])
+        if os.path.exists(os.path.join(index_dir, "meta.json")):
+            index = cls.load(index_dir)
+            if index.fingerprint == current:
+                return index
+        index = cls.build(df_labeled)
+        index.save(index_dir)
+        return index
+
+    # ------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------
+
+    def transform(self, texts):
+        return normalize(self.vectorizer.transform(texts), norm="l2", copy=False)
+
+    def vectorize(self, text):
+        """Dense L2-normalised TF-IDF vector of one text; same values as transform([text])."""
+        counts = Counter(t for t in self._analyze(text) if t in self._vocabulary)
+        vec = np.zeros(len(self._idf))
+        if counts:
+            cols = np.fromiter((self._vocabulary[t] for t in counts), dtype=np.intp, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=float, count=len(counts))
+            vec[cols] = (1 + np.log(tf)) * self._idf[cols]     # sublinear_tf
+            vec[cols] /= np.linalg.norm(vec[cols])
+        return vec
+
+    def query(self, text, topic, k=5):
+        """Top-k (row_ids, scores) within `topic`, best first."""
+        return self.query_vector(self.vectorize(text), topic, k)
+
+    def query_vector(self, vec, topic, k=5):
+        """vec: dense vector from vectorize(), or a 1-row sparse matrix from transform()."""
+        block = self.blocks.get(topic)
+        if block is None:
+            return self.row_ids[:0], np.zeros(0)
+        if sparse.issparse(vec):
+            vec = vec.toarray().ravel()
+        start = self.partitions[topic][0]
+        scores = block @ vec
+        best = top_k(scores, k)
+        return self.row_ids[start + best], scores[best]
+
+    def query_batch(self, texts, topics, k=5):
+        """
+        Scores many emails at once: one vectorizer call, then one sparse
+        product per topic for all queries assigned to it. Returns a list of
+        (row_ids, scores) in input order.
+        """
+        vecs = self.transform(list(texts)).tocsr()
+        topics = np.asarray(list(topics), dtype=object)
+        results = [None] * len(topics)
+        for topic in dict.fromkeys(topics):
+            queries = np.flatnonzero(topics == topic)
+            block = self.blocks.get(topic)
+            if block is None:
+                for q in queries:
+                    results[q] = (self.row_ids[:0], np.zeros(0))
+                continue
+            start = self.partitions[topic][0]
+            scores = (vecs[queries] @ block.T).toarray()
+            # Row-wise argpartition, then sort just the k survivors
+            if k < scores.shape[1]:
+                best = np.argpartition(scores, -k, axis=1)[:, -k:]
+            else:
+                best = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            order = np.argsort(-best_scores, axis=1, kind="stable")
+            best = np.take_along_axis(best, order, axis=1)
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            for q, cols, row_scores in zip(queries, best, best_scores):
+                results[q] = (self.row_ids[start + cols], row_scores)
+        return results
+
+
+def _row_block(matrix, start, end):
+    """Rows [start, end) of a CSR matrix sharing its data/indices arrays (stays memory-mapped)."""
+    lo, hi = matrix.indptr[start], matrix.indptr[end]
+    return sparse.csr_matrix(
+        (matrix.data[lo:hi], matrix.indices[lo:hi], np.asarray(matrix.indptr[start:end + 1]) - lo),
+        shape=(end - start, matrix.shape[1]),
+        copy=False,
+    )
+
+
+# ----------------------------------------------------------
+# Notebook-compatible helper
+# ----------------------------------------------------------
+
+def retrieve_similar_emails(query_text, query_topic, df_labeled, index, k=5):
+    """
+    Retrieve top-k similar emails within the same label_topic.
+    Returns a DataFrame with similarity scores.
+    """
+    row_ids, scores = index.query(query_text, query_topic, k)
+    if not len(row_ids):
+        return pd.DataFrame()  # no comparable emails
+    results = df_labeled.loc[row_ids].copy()
+    results["similarity_score"] = scores
+    return results
+
+
+if __name__ == "__main__":
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    df = read_dataset("level_2_fixed_3rd_jan.csv", columns=["clean_text", "label_topic"])
+    labeled = df["label_topic"] != ""
+    df_labeled = df[labeled].copy()
+    df_unlabeled = df[~labeled].copy()
+
+    start = time.perf_counter()
+    index = RetrievalIndex.build(df_labeled)
+    index.save()
+    print(f"Built + saved index for {index.matrix.shape[0]} emails in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    index = RetrievalIndex.load()
+    print(f"Loaded (memory-mapped) in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Same answers as the notebook's mask + cosine_similarity + argsort
+    X_labeled = index.vectorizer.transform(df_labeled["clean_text"])
+    for i in range(0, len(df_labeled), 25):
+        row = df_labeled.iloc[i]
+        mask = (df_labeled["label_topic"] == row.label_topic).to_numpy()
+        sims = cosine_similarity(index.vectorizer.transform([row.clean_text]), X_labeled[mask]).ravel()
+        expected = np.sort(sims)[::-1][:5]
+        _, got = index.query(row.clean_text, row.label_topic, 5)
+        assert np.allclose(expected, got), (i, expected, got)
+    print("Top-5 scores match the notebook implementation")
+
+    texts = df_unlabeled["clean_text"].astype(str).tolist()
+    vecs = [index.vectorize(t) for t in texts]
+    reference = index.transform(texts).toarray()
+    assert np.allclose(np.vstack(vecs), reference)
+    topic = "General Information / Misc"
+    start = time.perf_counter()
+    for i in range(len(texts)):
+        index.query_vector(vecs[i], topic, 5)
+    per_query = (time.perf_counter() - start) / len(texts)
+    print(f"Single query (pre-vectorised): {per_query * 1e6:.0f} us")
+
+    start = time.perf_counter()
+    for text in texts[:200]:
+        index.query(text, topic, 5)
+    print(f"Single query incl. vectorising: {(time.perf_counter() - start) / 200 * 1e6:.0f} us")
+
+    start = time.perf_counter()
+    batch = index.query_batch(texts, [topic] * len(texts), 5)
+    print(f"Batch of {len(texts)}: {(time.perf_counter() - start) * 1000:.1f} ms")
+    for vec, (_, scores) in zip(vecs[:50], batch):
+        assert np.allclose(index.query_vector(vec, topic, 5)[1], scores)
@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+from collections import Counter
+from functools import partial
+
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+
+# Shared corpus I/O lives one level up (Machine_Learning_Algo/dataset_io.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dataset_io import read_dataset
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+MODEL_PATH = os.getenv("TOPIC_MODEL_PATH", "topic_model.joblib")
+TRAIN_FILE = "level_2_fixed_3rd_jan.csv"
+# Rows the model is less sure about than this go to the LLM marker extractor
+CONFIDENCE_THRESHOLD = float(os.getenv("TOPIC_MODEL_THRESHOLD", "0.7"))
+# Only the start of each email is featurised (subject + opening lines carry the
+# topic); tokenising is the bulk of inference time. 0 = whole email
+MAX_CHARS = int(os.getenv("TOPIC_MODEL_MAX_CHARS", "1000"))
+MIN_DF = 2
+MAX_DF = 0.9
+RANDOM_SEED = 42
+
+
+# ----------------------------------------------------------
+# Featurizer
+# ----------------------------------------------------------
+
+def truncate(text, max_chars=MAX_CHARS):
+    """Lowercased start of the email – the vectorizer skips its own lowercasing once a preprocessor is set."""
+    text = str(text)
+    return (text[:max_chars] if max_chars else text).lower()
+
+
+def build_featurizer(min_df=MIN_DF, max_df=MAX_DF, max_chars=MAX_CHARS):
+    """
+    Unigram + bigram TF-IDF (sublinear tf, L2 norm) with sklearn's Unicode
+    tokeniser, over the first `max_chars` characters of each email. fit()
+    fixes the vocabulary; transform() only looks tokens up in it.
+    """
+    return TfidfVectorizer(
+        ngram_range=(1, 2),
+        min_df=min_df,
+        max_df=max_df,
+        sublinear_tf=True,
+        preprocessor=partial(truncate, max_chars=max_chars),
+    )
+
+
+# ----------------------------------------------------------
+# Topic model
+# ----------------------------------------------------------
+
+class TopicModel:
+    """
+    Linear Level-2 topic classifier: TF-IDF text features plus a one-hot
+    label_source, logistic regression, sigmoid-calibrated probabilities.
+    """
+
+    def __init__(self, featurizer, sources, classifier, threshold=CONFIDENCE_THRESHOLD):
+        self.featurizer = featurizer
+        self.sources = {s: i for i, s in enumerate(sources)}
+        self.classifier = classifier
+        self.threshold = threshold
+
+    @property
+    def classes_(self):
+        return self.classifier.classes_
+
+    def _features(self, texts, sources):
+        text_features = self.featurizer.transform(texts)
+        codes = np.fromiter((self.sources.get(str(s), -1) for s in sources), dtype=np.int64, count=text_features.shape[0])
+        known = codes >= 0
+        source_features = sparse.csr_matrix(
+            (np.ones(known.sum()), (np.flatnonzero(known), codes[known])),
+            shape=(text_features.shape[0], len(self.sources)),
+        )
+        return sparse.hstack([text_features, source_features], format="csr")
+
+    @classmethod
+    def train(cls, texts, sources, labels, threshold=CONFIDENCE_THRESHOLD):
+        # Sigmoid calibration over up to 3 folds; the smallest topics only have a handful of rows
+        min_count = min(Counter(labels).values())
+        classifier = CalibratedClassifierCV(
+            LogisticRegression(max_iter=1000, C=10.0, class_weight="balanced"),
+            method="sigmoid",
+            cv=max(2, min(3, min_count)),
+        )
+        model = cls(build_featurizer().fit(texts), sorted(set(map(str, sources))), classifier, threshold)
+        classifier.fit(model._features(texts, sources), np.asarray(labels))
+        return model
+
+    def predict_proba(self, texts, sources):
+        if len(texts) == 0:
+            # sklearn rejects 0-row input; an empty batch (nothing new in a sync) is normal here
+            return np.zeros((0, len(self.classes_)))
+        return self.classifier.predict_proba(self._features(texts, sources))
+
+    def predict_batch(self, texts, sources):
+        """Returns (labels, confidence): best topic per email and its calibrated probability."""
+        proba = self.predict_proba(texts, sources)
+        best = proba.argmax(axis=1)
+        return self.classes_[best], proba[np.arange(len(best)), best]
+
+    def route(self, texts, sources):
+        """Splits a batch: (labels, confidence, confident mask). Rows outside the mask need the LLM."""
+        labels, confidence = self.predict_batch(texts, sources)
+        return labels, confidence, confidence >= self.threshold
+
+    def save(self, path=MODEL_PATH):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path=MODEL_PATH):
+        return joblib.load(path)
+
+
+def load_topic_model(path=MODEL_PATH):
+    """The saved model, or None when it hasn't been trained yet."""
+    return TopicModel.load(path) if os.path.exists(path) else None
+
+
+# ----------------------------------------------------------
+# Train + evaluate (python topic_model.py [labelled.csv])
+# ----------------------------------------------------------
+
+if __name__ == "__main__":
+    # Pickle against the importable module, not __main__, so load() works from other scripts
+    from topic_model import TopicModel
+
+    df = read_dataset(sys.argv[1] if len(sys.argv) > 1 else TRAIN_FILE, columns=["clean_text", "label_source", "label_topic"])
+    labelled = df[df["label_topic"].astype(str).str.strip() != ""].reset_index(drop=True)
+    print(f"{len(labelled)} labelled emails, {labelled['label_topic'].nunique()} topics")
+
+    train, test = train_test_split(labelled, test_size=0.25, random_state=RANDOM_SEED, stratify=labelled["label_topic"])
+    model = TopicModel.train(train["clean_text"].tolist(), train["label_source"].tolist(), train["label_topic"].tolist())
+    labels, confidence, confident = model.route(test["clean_text"].tolist(), test["label_source"].tolist())
+    correct = labels == test["label_topic"].to_numpy()
+    print(f"Held-out accuracy: {correct.mean():.3f}")
+    print(
+        f"At threshold {model.threshold}: {confident.mean():.0%} of rows skip the LLM, "
+        f"accuracy on those {correct[confident].mean() if confident.any() else float('nan'):.3f}"
+    )
+
+    # Final model on every labelled row
+    model = TopicModel.train(labelled["clean_text"].tolist(), labelled["label_source"].tolist(), labelled["label_topic"].tolist())
+    model.save()
+    print(f"Model saved to: {MODEL_PATH}")
+
+    texts = df["clean_text"].tolist() * 20
+    sources = df["label_source"].tolist() * 20
+    start = time.perf_counter()
+    model.predict_batch(texts, sources)
+    elapsed = time.perf_counter() - start
+    print(f"predict_batch: {len(texts)} emails in {elapsed:.2f}s ({len(texts) / elapsed:,.0f}/s)")
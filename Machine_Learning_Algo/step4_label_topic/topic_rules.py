@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------------------------
+# Marker table schema
+# ----------------------------------------------------------
+
+BOOL_MARKERS = [
+    "has_required_action",
+    "university_enforced",
+    "exam_related",
+    "schedule_changed",
+    "optional_learning",
+    "optional_participation_event",
+]
+CATEGORICAL_MARKERS = ["action_type", "label_source"]
+
+ADMIN_SOURCES = ["administration / office", "administration", "admin", "office"]
+FACULTY_SOURCES = ["faculty / academic staff", "faculty", "academic staff"]
+
+DEFAULT_TOPIC = "General Information / Misc"
+
+# ----------------------------------------------------------
+# Rules – first match wins, same order as decide_topic()
+# ----------------------------------------------------------
+# Each condition is column -> value (equality) or column -> list (membership).
+# Columns are the marker table plus the derived is_admin / is_faculty /
+# enforced (university_enforced or an admin source).
+
+TOPIC_RULES = [
+    ("General Information / Misc", {"has_required_action": False}),
+    ("Assignment or Submission", {"is_faculty": True, "action_type": ["submit", "upload", "prepare"]}),
+    ("Assignment or Submission", {"action_type": "submit"}),
+    ("Administrative / Fees / Counselling", {"action_type": ["pay", "update", "verify"], "enforced": True}),
+    ("Exam Notifications", {"action_type": ["appear", "register"], "exam_related": True}),
+    ("Timetable / Schedule Update", {"schedule_changed": True}),
+    ("Important Announcements", {"enforced": True}),
+    ("Certification / Courses", {"optional_learning": True}),
+    ("Events / Hackathons", {"optional_participation_event": True}),
+]
+
+
+def marker_table(markers):
+    """
+    Typed columnar table from marker dicts (as returned by the LLM extractor,
+    with label_source added): bool columns for the yes/no markers, categoricals
+    for action_type and label_source. Missing keys read as False / "".
+    """
+    markers = list(markers)
+    table = pd.DataFrame(index=pd.RangeIndex(len(markers)))
+    for col in BOOL_MARKERS:
+        table[col] = np.fromiter((bool(m.get(col)) for m in markers), dtype=bool, count=len(markers))
+    for col in CATEGORICAL_MARKERS:
+        table[col] = pd.Categorical([m.get(col) or "" for m in markers])
+    return table
+
+
+def _columns(table):
+    """
+    Plain arrays for rule evaluation: bool columns as numpy, categoricals as
+    (codes, categories), plus the derived source groups. Source groups are
+    resolved once per category and broadcast through the codes.
+    """
+    columns = {}
+    for col, values in table.items():
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            columns[col] = (values.cat.codes.to_numpy(), values.cat.categories)
+        else:
+            columns[col] = values.to_numpy(dtype=bool)
+    codes, categories = columns["label_source"]
+    lowered = pd.Index([str(c).lower() for c in categories])
+    # Code -1 (missing) indexes the appended False
+    columns["is_admin"] = np.append(lowered.isin(ADMIN_SOURCES), False)[codes]
+    columns["is_faculty"] = np.append(lowered.isin(FACULTY_SOURCES), False)[codes]
+    columns["enforced"] = columns["university_enforced"] | columns["is_admin"]
+    return columns
+
+
+def _mask(column, expected):
+    values = list(expected) if isinstance(expected, (list, tuple, set)) else [expected]
+    if isinstance(column, tuple):
+        codes, categories = column
+        return np.append(categories.isin(values), False)[codes]
+    if len(values) == 1:
+        return column == values[0]
+    return np.isin(column, values)
+
+
+def compile_rules(table, rules=TOPIC_RULES):
+    """One boolean mask per rule, in rule order."""
+    columns = _columns(table)
+    masks = []
+    for _, conditions in rules:
+        mask = np.ones(len(table), dtype=bool)
+        for col, expected in conditions.items():
+            mask &= _mask(columns[col], expected)
+        masks.append(mask)
+    return masks
+
+
+def decide_topics(table, rules=TOPIC_RULES, default=DEFAULT_TOPIC):
+    """Topic per row of a marker table – the vectorised equivalent of decide_topic()."""
+    topics = np.array([topic for topic, _ in rules] + [default], dtype=object)
+    if not len(table):
+        return topics[:0]
+    # Select rule numbers (cheap ints), then map to topic strings with one take
+    chosen = np.select(compile_rules(table, rules), np.arange(len(rules)), default=len(rules))
+    return topics[chosen]
@@ -0,0 +1,62 @@
+"""
+decide_topic loop vs marker_table + decide_topics on synthetic markers.
+
+    python topic_rules_benchmark.py      (from step4_label_topic/)
+
+Prints timings only; topic parity is covered by tests/test_topic_rules.py.
+"""
+import random
+import time
+
+from level2_rules_final import decide_topic
+from topic_rules import BOOL_MARKERS, decide_topics, marker_table
+
+# ----------------------------------------------------------
+# Config
+# ----------------------------------------------------------
+
+N_ROWS = 100_000
+RANDOM_SEED = 42
+
+ACTION_TYPES = ["submit", "upload", "prepare", "pay", "update", "verify", "appear", "register", "attend", "none", "", None]
+SOURCES = [
+    "Administration / Office", "administration", "Admin", "office",
+    "Faculty / Academic Staff", "faculty", "Academic Staff",
+    "Student / Club", "External Course Provider", "Misc / External", "",
+]
+
+
+def random_markers(rng):
+    """Marker dict like the extractor returns – including missing keys and None values."""
+    markers = {"label_source": rng.choice(SOURCES), "action_type": rng.choice(ACTION_TYPES)}
+    for col in BOOL_MARKERS:
+        value = rng.choice([True, False, None, "missing"])
+        if value != "missing":
+            markers[col] = value
+    if rng.random() < 0.05:
+        del markers["action_type"]
+    return markers
+
+
+if __name__ == "__main__":
+    rng = random.Random(RANDOM_SEED)
+    markers = [random_markers(rng) for _ in range(N_ROWS)]
+
+    start = time.perf_counter()
+    expected = [decide_topic(m) for m in markers]
+    rowwise_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    table = marker_table(markers)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = decide_topics(table)
+    relabel_time = time.perf_counter() - start
+
+    mismatches = sum(a != e for a, e in zip(actual, expected))
+    print(f"{N_ROWS} rows")
+    print(f"decide_topic loop: {rowwise_time * 1000:.1f} ms")
+    print(f"marker_table (once per extraction): {build_time * 1000:.1f} ms")
+    print(f"decide_topics: {relabel_time * 1000:.1f} ms")
+    print(f"{mismatches} rows differ from decide_topic")
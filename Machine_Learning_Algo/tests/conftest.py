@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The scripts use flat sibling imports, so put both script folders on the path
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path[:0] = [ROOT, os.path.join(ROOT, "step4_label_topic")]
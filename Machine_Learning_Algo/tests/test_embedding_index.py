@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from embedding_index import EmbeddingIndex, IVFIndex, _SyntheticEmbedder
+
+
+def unit_vectors(n, dim=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.mark.parametrize("n", [50, 600])      # below and above IVF_MIN_TRAIN
+def test_ivf_readd_replaces(n):
+    vectors = unit_vectors(n + 1)
+    index = IVFIndex(vectors.shape[1])
+    index.add(np.arange(n), vectors[:n])
+
+    index.add([7], vectors[n:])
+
+    assert len(index) == n
+    ids, scores = index.search(vectors[n], k=3, nprobe=len(index.lists))
+    assert ids[0] == 7 and np.isclose(scores[0], 1.0)
+    assert list(ids).count(7) == 1
+    ids, _ = index.search(vectors[7], k=n, nprobe=len(index.lists))
+    assert sorted(ids) == list(range(n))
+
+
+def test_ivf_duplicate_ids_in_one_batch():
+    vectors = unit_vectors(3)
+    index = IVFIndex(vectors.shape[1])
+
+    index.add([1, 2, 1], vectors)
+
+    assert len(index) == 2
+    ids, scores = index.search(vectors[2], k=2)
+    assert ids[0] == 1 and np.isclose(scores[0], 1.0)
+
+
+def test_ivf_remove():
+    vectors = unit_vectors(10)
+    index = IVFIndex(vectors.shape[1])
+    index.add(np.arange(10), vectors)
+
+    assert index.remove([3, 4, 99]) == 2
+    assert len(index) == 8
+    assert 3 not in index.search(vectors[3], k=10)[0]
+
+
+def test_embedding_index_readd_moves_topic():
+    vectors = unit_vectors(4)
+    index = EmbeddingIndex(_SyntheticEmbedder(vectors))
+    index.add([10, 11, 12], ["0", "1", "2"], ["Exams", "Exams", "Events"])
+
+    index.add([11], ["3"], ["Events"])      # relabelled and edited
+
+    assert len(index.topics["Exams"]) == 1
+    assert len(index.topics["Events"]) == 2
+    ids, scores = index.search("3", "Events", k=5)
+    assert ids[0] == 11 and np.isclose(scores[0], 1.0)
+    assert 11 not in index.search("1", "Exams", k=5)[0]
+
+
+def test_embedding_index_last_duplicate_wins():
+    vectors = unit_vectors(2)
+    index = EmbeddingIndex(_SyntheticEmbedder(vectors))
+
+    index.add([5, 5], ["0", "1"], ["Exams", "Events"])
+
+    assert "Exams" not in index.topics
+    ids, _ = index.search("1", "Events", k=5)
+    assert list(ids) == [5]
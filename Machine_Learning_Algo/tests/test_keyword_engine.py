@@ -0,0 +1,66 @@
+"""
+Which words each Level-2 keyword is meant to hit.
+
+    python -m pytest tests/test_keyword_engine.py      (from Machine_Learning_Algo/)
+"""
+import pytest
+
+from keyword_engine import KeywordScorer
+from level2_rules import LEVEL1_BIAS, LEVEL2_LABELS, TOPIC_KEYWORDS, infer_level2_topics
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return KeywordScorer(TOPIC_KEYWORDS, LEVEL2_LABELS, LEVEL1_BIAS)
+
+
+def matched(scorer, text):
+    hits = scorer.keyword_hits([text])[0]
+    return {kw for kw, hit in zip(scorer.keywords, hits) if hit}
+
+
+@pytest.mark.parametrize("text, keyword", [
+    ("exam tomorrow", "exam"),
+    ("Mid-term EXAMS begin", "exam"),
+    ("examination form", "examination"),
+    ("upcoming events", "event"),
+    ("class scheduled at 10", "schedule"),
+    ("lecture rescheduled", "rescheduled"),
+    ("new jobs posted", "job"),
+    ("applying for internships", "apply"),
+    ("report submitted", "submitted"),
+    ("submits", "submit"),
+    ("hall ticket download", "hall ticket"),
+    ("workshop/seminar", "seminar"),
+])
+def test_keyword_hits(scorer, text, keyword):
+    assert keyword in matched(scorer, text)
+
+
+@pytest.mark.parametrize("text, keyword", [
+    ("for example", "exam"),
+    ("eventually", "event"),
+    ("prevent", "event"),
+    ("jobless", "job"),
+    ("hallway ticket", "hall ticket"),
+])
+def test_keyword_misses(scorer, text, keyword):
+    assert keyword not in matched(scorer, text)
+
+
+def test_short_keyword_not_inside_words():
+    scorer = KeywordScorer({"a": ["ia"]}, ["a"], default="none")
+
+    assert scorer.predict(["media coverage", "ia marks"], [None, None]) == ["none", "a"]
+
+
+def test_predict_topics():
+    texts = ["Exams rescheduled", "Upcoming events this week", "nothing relevant", "fees refund"]
+    sources = ["Student / Club", "Student / Club", "Misc / External", "Administration / Office"]
+
+    assert infer_level2_topics(texts, sources) == [
+        "Timetable / Schedule Update",      # timetable list comes first on a 1-1 tie
+        "Events / Hackathons",
+        "General Information / Misc",
+        "Administrative / Fees / Counselling",
+    ]
@@ -0,0 +1,63 @@
+"""
+classify_level1_batch must label every row exactly like classify_level1.
+
+    python -m pytest tests/test_level1_batch.py      (from Machine_Learning_Algo/)
+"""
+import importlib.util
+import os
+
+import pandas as pd
+import pytest
+
+STEP2_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "step2 Semi assisted Labelling.py")
+
+
+@pytest.fixture(scope="module")
+def step2():
+    # The script name has spaces, so it can't be imported the normal way
+    spec = importlib.util.spec_from_file_location("step2_labelling", STEP2_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# (from, sender_domain, clean_text, expected label)
+CASES = [
+    ("NPTEL <noreply@nptel.iitm.ac.in>", "", "week 3 assignment is live", "External Course Provider"),
+    ("", "NPTEL.AC.IN ", "", "External Course Provider"),
+    ("Club <club@charusat.edu.in>", "", "hackathon this friday", "Student / Club"),
+    ("", "cspit.charusat.edu.in", "exam schedule", "Student / Club"),
+    ("Exam Cell <exam@charusat.ac.in>", "", "Revised EXAM SCHEDULE attached", "Administration / Office"),
+    ("", "charusat.ac.in", "fees payment and assignment submission", "Administration / Office"),
+    ("", "cspit.charusat.ac.in", "submit the lab work by monday", "Faculty / Academic Staff"),
+    ("", "charusat.ac.in", "media coverage", "Faculty / Academic Staff"),      # "ia" substring, as before
+    ("", "charusat.ac.in", "good morning", "Misc / External"),
+    ("Someone <a@gmail.com>", "", "exam schedule assignment", "Misc / External"),
+    ("no address here", "", "notice", "Misc / External"),
+    ("", "", "", "Misc / External"),
+    ("x <y@charusat.ac.in>", "gmail.com", "notice", "Misc / External"),     # given domain wins over from
+]
+
+
+def test_batch_matches_rowwise(step2):
+    df = pd.DataFrame(CASES, columns=["from", "sender_domain", "clean_text", "expected"], index=range(100, 100 + len(CASES)))
+    expected = df.apply(lambda r: step2.classify_level1(r["from"], r["sender_domain"], r["clean_text"]), axis=1)
+
+    actual = step2.classify_level1_batch(df)
+
+    assert list(expected) == list(df["expected"])
+    assert actual.index.equals(df.index)
+    assert list(actual.astype(str)) == list(expected)
+    assert list(actual.cat.categories) == step2.LEVEL1_LABELS
+
+
+def test_batch_without_optional_columns(step2):
+    df = pd.DataFrame({"from": ["a@nptel.ac.in", "b@charusat.ac.in"]})
+
+    assert list(step2.classify_level1_batch(df).astype(str)) == ["External Course Provider", "Misc / External"]
+
+
+def test_batch_on_empty_frame(step2):
+    df = pd.DataFrame(columns=["from", "sender_domain", "clean_text"])
+
+    assert len(step2.classify_level1_batch(df)) == 0
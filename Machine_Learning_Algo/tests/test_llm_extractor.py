@@ -0,0 +1,81 @@
+import json
+
+import httpx
+import pytest
+
+from llm_extractor import ExtractionFailed, MarkerExtractor
+
+ANSWER = (
+    "1. Required action: yes\n2. Action verb: submit\n3. Consequence: unclear\n"
+    "4. University enforced: yes\n5. Optional participation: no\n6. Deadline: none\n"
+    "7. Exam related: no\n8. Schedule changed: no\n9. Optional learning: no\n"
+    "10. Optional participation event: no\n11. Academic work type: one_time_requirement\n"
+)
+
+
+class FakeOllama:
+    """Streams ANSWER line by line; counts requests and the clients they came from."""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.requests = 0
+        self.clients = []
+
+    def handler(self, request):
+        self.requests += 1
+        if self.status != 200:
+            return httpx.Response(self.status)
+        lines = [json.dumps({"response": line + "\n", "done": False}) for line in ANSWER.splitlines()]
+        lines.append(json.dumps({"response": "", "done": True}))
+        return httpx.Response(200, text="\n".join(lines) + "\n")
+
+    def extractor(self, **kwargs):
+        fake = self
+
+        class Extractor(MarkerExtractor):
+            def _client(self):
+                client = httpx.AsyncClient(transport=httpx.MockTransport(fake.handler))
+                fake.clients.append(client)
+                return client
+
+        return Extractor(url="http://ollama.test", **kwargs)
+
+
+def test_extract_one_reuses_one_client():
+    ollama = FakeOllama()
+    extractor = ollama.extractor()
+
+    for _ in range(3):
+        markers = extractor.extract_one("Faculty / Academic Staff", "submit the report")
+        assert markers["has_required_action"] is True
+        assert markers["action_type"] == "submit"
+    results, failures = extractor.run([(i, "Misc / External", f"email {i}") for i in range(5)])
+
+    assert len(results) == 5 and not failures
+    assert ollama.requests == 8
+    assert len(ollama.clients) == 1
+    extractor.close()
+    assert ollama.clients[0].is_closed
+    extractor.close()       # idempotent
+
+
+def test_run_after_close_opens_a_new_client():
+    ollama = FakeOllama()
+    extractor = ollama.extractor()
+    extractor.extract_one("", "a")
+    extractor.close()
+
+    extractor.extract_one("", "b")
+
+    assert len(ollama.clients) == 2
+    extractor.close()
+
+
+def test_failures_raise():
+    ollama = FakeOllama(status=503)
+    extractor = ollama.extractor(retries=1, retry_rounds=0)
+
+    with pytest.raises(ExtractionFailed, match="HTTP 503"):
+        extractor.extract_one("", "a")
+    assert ollama.requests == 2
+    extractor.close()
@@ -0,0 +1,70 @@
+import sqlite3
+import types
+
+import pytest
+
+import marker_cache
+from marker_cache import MarkerCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(marker_cache, "time", types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite")
+
+
+def last_used(path, key):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT last_used FROM llm_cache WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_hits_do_not_write_until_close(path, clock):
+    cache = MarkerCache(path, touch_batch=3)
+    cache.put("a", {"x": 1})
+    cache.put("b", {"x": 2})
+    clock.now = 2000.0
+
+    changes = cache.conn.total_changes
+    assert cache.get("a") == {"x": 1}
+    assert cache.get("b") == {"x": 2}
+    assert cache.get("a") == {"x": 1}
+    assert cache.get("missing") is None
+    assert cache.conn.total_changes == changes
+    assert last_used(path, "a") == 1000.0
+
+    cache.close()
+    assert last_used(path, "a") == last_used(path, "b") == 2000.0
+
+
+def test_touches_flush_once_the_batch_fills(path, clock):
+    cache = MarkerCache(path, touch_batch=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    clock.now = 2000.0
+
+    cache.get("a")
+    assert last_used(path, "a") == 1000.0
+    cache.get("b")
+
+    assert last_used(path, "a") == last_used(path, "b") == 2000.0
+
+
+def test_eviction_sees_buffered_hits(path, clock):
+    cache = MarkerCache(path, max_entries=3, touch_batch=100)
+    for key in "abc":
+        clock.now += 1
+        cache.put(key, key)
+    clock.now += 1
+    cache.get("a")      # a is now the most recently used
+
+    cache.put("d", "d")
+
+    assert cache.get("a") == "a"
+    assert cache.get("b") is None
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,61 @@
+import pickle
+
+import numpy as np
+
+from topic_model import TopicModel, build_featurizer
+
+TOPICS = {
+    "Exam Notifications": "экзамен midsem exam hall ticket seating plan",
+    "Events / Hackathons": "hackathon workshop event registration café",
+    "Administrative / Fees / Counselling": "fees payment hostel refund counselling",
+}
+
+
+def training_set():
+    texts, sources, labels = [], [], []
+    for i in range(8):
+        for topic, words in TOPICS.items():
+            texts.append(f"{words} batch {i}")
+            sources.append("Administration / Office" if i % 2 else "Student / Club")
+            labels.append(topic)
+    return texts, sources, labels
+
+
+def test_featurizer_keeps_unicode_words():
+    featurizer = build_featurizer(min_df=1, max_df=1.0).fit(["Экзамен завтра", "café menu", "exam date"])
+
+    assert {"экзамен", "экзамен завтра", "café"} <= set(featurizer.vocabulary_)
+    row = featurizer.transform(["ЭКЗАМЕН"])
+    assert row.nnz == 1 and np.isclose(row.power(2).sum(), 1.0)
+
+
+def test_featurizer_has_no_document_separator():
+    # Any word, including the old batch sentinel, is just a word inside its own document
+    featurizer = build_featurizer(min_df=1, max_df=1.0).fit(["a qqdocbreakqq b", "exam date"])
+
+    matrix = featurizer.transform(["qqdocbreakqq", "exam qqdocbreakqq date", "exam"])
+
+    assert matrix.shape[0] == 3
+    assert matrix[2].nnz == 1
+
+
+def test_featurizer_only_reads_the_start():
+    featurizer = build_featurizer(min_df=1, max_df=1.0, max_chars=10).fit(["EXAM date " + "hostel " * 10])
+
+    assert "hostel" not in featurizer.vocabulary_
+    assert "exam" in featurizer.vocabulary_
+
+
+def test_train_route_and_pickle():
+    texts, sources, labels = training_set()
+    model = TopicModel.train(texts, sources, labels)
+
+    predicted, confidence, confident = model.route(
+        ["экзамен seating plan", "hackathon café"], ["Student / Club", "unknown source"]
+    )
+
+    assert list(predicted) == ["Exam Notifications", "Events / Hackathons"]
+    assert confidence.shape == confident.shape == (2,)
+    restored = pickle.loads(pickle.dumps(model))
+    assert np.allclose(restored.predict_proba(texts, sources), model.predict_proba(texts, sources))
+    assert model.predict_proba([], []).shape == (0, 3)
@@ -0,0 +1,61 @@
+"""
+decide_topics over a marker table must pick the same topic as decide_topic.
+
+    python -m pytest tests/test_topic_rules.py      (from Machine_Learning_Algo/)
+"""
+import itertools
+
+import pytest
+
+from level2_rules_final import decide_topic
+from topic_rules import BOOL_MARKERS, DEFAULT_TOPIC, TOPIC_RULES, decide_topics, marker_table
+
+# (markers, expected topic) – one case per rule, plus the override and missing-value edges
+CASES = [
+    ({"label_source": "Faculty / Academic Staff", "action_type": "submit"}, "General Information / Misc"),
+    ({"has_required_action": True, "label_source": "Faculty", "action_type": "upload"}, "Assignment or Submission"),
+    ({"has_required_action": True, "label_source": "Student / Club", "action_type": "submit"}, "Assignment or Submission"),
+    ({"has_required_action": True, "label_source": "Office", "action_type": "pay"}, "Administrative / Fees / Counselling"),
+    ({"has_required_action": True, "label_source": "", "action_type": "verify", "university_enforced": True},
+     "Administrative / Fees / Counselling"),
+    ({"has_required_action": True, "label_source": "Misc / External", "action_type": "pay"}, "General Information / Misc"),
+    ({"has_required_action": True, "action_type": "register", "exam_related": True}, "Exam Notifications"),
+    ({"has_required_action": True, "action_type": "appear", "exam_related": None, "schedule_changed": True},
+     "Timetable / Schedule Update"),
+    ({"has_required_action": True, "label_source": "administration", "action_type": "none"}, "Important Announcements"),
+    ({"has_required_action": True, "action_type": None, "optional_learning": True}, "Certification / Courses"),
+    ({"has_required_action": True, "optional_participation_event": True}, "Events / Hackathons"),
+    ({"has_required_action": True, "label_source": "External Course Provider", "action_type": ""}, DEFAULT_TOPIC),
+    ({}, DEFAULT_TOPIC),
+]
+
+
+def all_marker_combinations():
+    """Every bool combination, crossed with a few sources and action types."""
+    sources = ["Administration / Office", "faculty", "Student / Club", ""]
+    actions = ["submit", "upload", "pay", "appear", "none", ""]
+    for values in itertools.product([True, False], repeat=len(BOOL_MARKERS)):
+        for source, action in itertools.product(sources, actions):
+            yield {"label_source": source, "action_type": action, **dict(zip(BOOL_MARKERS, values))}
+
+
+def test_cases_cover_every_rule():
+    assert {topic for topic, _ in TOPIC_RULES} <= {topic for _, topic in CASES}
+
+
+@pytest.mark.parametrize("markers, expected", CASES)
+def test_single_row(markers, expected):
+    assert decide_topic(markers) == expected
+    assert list(decide_topics(marker_table([markers]))) == [expected]
+
+
+def test_batch_matches_rowwise():
+    markers = list(all_marker_combinations()) + [m for m, _ in CASES]
+
+    actual = decide_topics(marker_table(markers))
+
+    assert list(actual) == [decide_topic(m) for m in markers]
+
+
+def test_empty_table():
+    assert len(decide_topics(marker_table([]))) == 0
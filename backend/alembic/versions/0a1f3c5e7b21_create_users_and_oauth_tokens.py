@@ -0,0 +1,54 @@
+"""create users and oauth_tokens
+
+Revision ID: 0a1f3c5e7b21
+Revises: 
+Create Date: 2025-12-14 10:41:09.118204
+
+Baseline for databases that previously relied on Base.metadata.create_all at
+startup. Existing databases already stamped at 975e08fd1934 skip it.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a1f3c5e7b21'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('users',
+    sa.Column('uid', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('branch', sa.String(), nullable=True),
+    sa.Column('semester', sa.Integer(), nullable=True),
+    sa.Column('sid', sa.String(), nullable=True),
+    sa.Column('profile_completed', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('uid'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_index(op.f('ix_users_uid'), 'users', ['uid'], unique=False)
+    op.create_table('oauth_tokens',
+    sa.Column('uid', sa.String(), nullable=False),
+    sa.Column('refresh_token', sa.Text(), nullable=False),
+    sa.Column('scopes', sa.Text(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('token_type', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('uid')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('oauth_tokens')
+    op.drop_index(op.f('ix_users_uid'), table_name='users')
+    op.drop_table('users')
@@ -1,8 +1,7 @@
-alembic revision --autogenerate -m "update user and oauth_token models"
-alembic upgrade head"""update user and oauth_token models
+"""update user and oauth_token models
 
 Revision ID: 975e08fd1934
-Revises: 
+Revises: 0a1f3c5e7b21
 Create Date: 2025-12-14 10:56:34.236916
 
 """
@@ -14,7 +13,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision: str = '975e08fd1934'
-down_revision: Union[str, Sequence[str], None] = None
+down_revision: Union[str, Sequence[str], None] = '0a1f3c5e7b21'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
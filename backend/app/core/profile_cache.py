@@ -0,0 +1,223 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from app.models.schemas.user_schema import UserOut
+
+# memory | redis
+PROFILE_CACHE_BACKEND = os.getenv("PROFILE_CACHE_BACKEND", "memory")
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", "300"))
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+PROFILE_CACHE_LOG_EVERY = int(os.getenv("PROFILE_CACHE_LOG_EVERY", "1000"))    # log stats() every N lookups
+
+
+# ----------------------------------------------------------
+# Backends
+# ----------------------------------------------------------
+
+class LRUBackend:
+    """
+    In-process LRU with a per-entry TTL. Holds UserOut objects as-is.
+
+    Per worker: with several uvicorn workers each keeps its own copy and an
+    invalidation only reaches the worker that handled the write, so the others
+    serve the old profile for up to PROFILE_CACHE_TTL. Use the redis backend
+    when running more than one worker.
+
+    Generations: delete() stamps the uid from a process-wide counter, and a set()
+    carrying a generation taken before that stamp is dropped. Stamps are kept
+    for the last `maxsize` invalidated uids; older ones fold into a floor that
+    rejects any set() with a generation below it.
+    """
+
+    def __init__(self, maxsize: int = PROFILE_CACHE_SIZE, ttl: int = PROFILE_CACHE_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._counter = 0
+        self._invalidated = OrderedDict()   # uid -> counter value at its last delete()
+        self._floor = 0
+
+    async def generation(self, uid: str):
+        return self._counter
+
+    async def get(self, uid: str):
+        entry = self._entries.get(uid)
+        if entry is None:
+            return None
+        expires_at, profile = entry
+        if self.clock() >= expires_at:
+            del self._entries[uid]
+            return None
+        self._entries.move_to_end(uid)
+        return profile
+
+    async def set(self, uid: str, profile: UserOut, generation) -> bool:
+        # No await before the write: check-and-set is atomic on the event loop
+        if generation < self._invalidated.get(uid, self._floor):
+            return False
+        self._entries[uid] = (self.clock() + self.ttl, profile)
+        self._entries.move_to_end(uid)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return True
+
+    async def delete(self, uid: str):
+        self._counter += 1
+        self._invalidated[uid] = self._counter
+        self._invalidated.move_to_end(uid)
+        while len(self._invalidated) > self.maxsize:
+            _, stamp = self._invalidated.popitem(last=False)
+            self._floor = max(self._floor, stamp)
+        self._entries.pop(uid, None)
+
+
+class RedisBackend:
+    """
+    Shared cache over the Redis protocol, so every uvicorn worker sees the same
+    entries and invalidations. `client` is anything with async get/set/delete/
+    incr/eval (redis.asyncio.Redis, or a local fake in tests).
+
+    Generations live in "<prefix>gen:<uid>" (INCR on delete); set() is a Lua
+    check-and-set that only writes while that counter is unchanged.
+    """
+
+    # KEYS: entry, generation; ARGV: expected generation, payload, ttl
+    CHECK_AND_SET = """
+    if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then return 0 end
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+    """
+    GENERATION_TTL = 86400      # outlives any request that could still hold an old generation
+
+    def __init__(self, client=None, url: str = REDIS_URL, ttl: int = PROFILE_CACHE_TTL, prefix: str = "profile:"):
+        if client is None:
+            import redis.asyncio as redis   # optional dependency, only needed for this backend
+            client = redis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, uid: str):
+        raw = await self.client.get(self.prefix + uid)
+        if raw is None:
+            return None
+        return UserOut.model_validate_json(raw)
+
+    async def generation(self, uid: str):
+        raw = await self.client.get(f"{self.prefix}gen:{uid}")
+        return raw.decode() if isinstance(raw, bytes) else (raw or "0")
+
+    async def set(self, uid: str, profile: UserOut, generation) -> bool:
+        written = await self.client.eval(
+            self.CHECK_AND_SET, 2, self.prefix + uid, f"{self.prefix}gen:{uid}",
+            str(generation), profile.model_dump_json(), self.ttl,
+        )
+        return bool(written)
+
+    async def delete(self, uid: str):
+        generation_key = f"{self.prefix}gen:{uid}"
+        await self.client.incr(generation_key)
+        await self.client.expire(generation_key, self.GENERATION_TTL)
+        await self.client.delete(self.prefix + uid)
+
+
+# ----------------------------------------------------------
+# Cache front
+# ----------------------------------------------------------
+
+class ProfileCache:
+    """
+    Read-through cache of UserOut payloads keyed by uid, with hit/miss counters.
+
+    A reader takes generation(uid) before reading the database and passes it to
+    set(); invalidate() after a write bumps the generation, so a reader that
+    fetched the old row before the commit can't put it back in the cache.
+    Counters are logged every PROFILE_CACHE_LOG_EVERY lookups (per worker).
+    """
+
+    def __init__(self, backend, log_every: int = PROFILE_CACHE_LOG_EVERY):
+        self.backend = backend
+        self.log_every = log_every
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.stale_writes = 0
+
+    async def get(self, uid: str):
+        try:
+            profile = await self.backend.get(uid)
+        except Exception as e:
+            # A broken shared cache must not take the profile endpoint down
+            self.errors += 1
+            logging.warning(f"Profile cache get failed for {uid}: {e}")
+            profile = None
+
+        if profile is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        if self.log_every and (self.hits + self.misses) % self.log_every == 0:
+            logging.info(f"Profile cache stats: {self.stats()}")
+        return profile
+
+    async def generation(self, uid: str):
+        """Token for a later set(); None if the backend is unreachable (set() then skips)."""
+        try:
+            return await self.backend.generation(uid)
+        except Exception as e:
+            self.errors += 1
+            logging.warning(f"Profile cache generation failed for {uid}: {e}")
+            return None
+
+    async def set(self, uid: str, profile: UserOut, generation):
+        if generation is None:
+            return
+        try:
+            if not await self.backend.set(uid, profile, generation):
+                # Invalidated while this request was reading the database
+                self.stale_writes += 1
+        except Exception as e:
+            self.errors += 1
+            logging.warning(f"Profile cache set failed for {uid}: {e}")
+
+    async def invalidate(self, uid: str):
+        try:
+            await self.backend.delete(uid)
+        except Exception as e:
+            self.errors += 1
+            logging.error(f"Profile cache invalidation failed for {uid}: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "stale_writes": self.stale_writes,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_profile_cache: ProfileCache | None = None
+
+
+def get_profile_cache() -> ProfileCache:
+    global _profile_cache
+    if _profile_cache is None:
+        if PROFILE_CACHE_BACKEND == "redis":
+            backend = RedisBackend()
+        else:
+            backend = LRUBackend()
+        _profile_cache = ProfileCache(backend)
+    return _profile_cache
+
+
+def set_profile_cache(cache: ProfileCache | None):
+    """Swap the process-wide cache (tests, or a custom backend)."""
+    global _profile_cache
+    _profile_cache = cache
@@ -1,15 +1,39 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.core.database import Base, engine
-from app.models import user   # IMPORTANT: import your model files
+from app.core.database import engine
 from app.routers import user_routers, oauth_routes
-from app.core import firebase_config
-
-
-# Create tables
-Base.metadata.create_all(bind=engine)
-
-
-app = FastAPI()
+from app.utils.google_client import close_google_client
+from app.services.token_broker import get_token_broker
+from app.services.job_queue import build_scheduler, get_job_queue
+
+# Set to 0 when dedicated `python -m app.worker` processes drain the queue
+JOB_WORKER_IN_PROCESS = os.getenv("JOB_WORKER_IN_PROCESS", "1") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema is managed by Alembic (`alembic upgrade head`), not created here.
+    # The Google HTTP client, the DB pool and the JWT libraries all initialize on first use.
+    broker = get_token_broker()
+    await broker.start()
+    background = []
+    if JOB_WORKER_IN_PROCESS:
+        background = [
+            asyncio.create_task(get_job_queue().work()),
+            asyncio.create_task(build_scheduler().run()),
+        ]
+    yield
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await broker.stop()
+    await close_google_client()
+    await engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(user_routers.router)
 app.include_router(oauth_routes.router)
@@ -18,4 +42,3 @@ app.include_router(oauth_routes.router)
 @app.get("/")
 def root():
     return {"message": "Backend running"}
-
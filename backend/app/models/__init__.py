@@ -1,4 +1,24 @@
 from .user import User
 from .oauthToken import OAuthToken
+from .mailSync import MailSyncCursor, MailMessage
+from .classroom import (
+    ClassroomCourse,
+    ClassroomEnrollment,
+    ClassroomAnnouncement,
+    ClassroomCourseWork,
+    ClassroomSyncState,
+)
+from .job import Job
 
-__all__ = ["User", "OAuthToken"]
+__all__ = [
+    "User",
+    "OAuthToken",
+    "MailSyncCursor",
+    "MailMessage",
+    "ClassroomCourse",
+    "ClassroomEnrollment",
+    "ClassroomAnnouncement",
+    "ClassroomCourseWork",
+    "ClassroomSyncState",
+    "Job",
+]
@@ -0,0 +1,70 @@
+from sqlalchemy import Column, DateTime, Float, Index, String, Text
+from app.core.database import Base
+import datetime
+
+# Course content is stored once per course and shared by every enrolled student;
+# classroom_enrollments maps users onto it.
+
+class ClassroomCourse(Base):
+    __tablename__ = "classroom_courses"
+
+    course_id = Column(String, primary_key=True)
+    name = Column(String, nullable=True)
+    section = Column(String, nullable=True)
+    course_state = Column(String, nullable=True)
+    alternate_link = Column(Text, nullable=True)
+    update_time = Column(DateTime, nullable=True)
+
+
+class ClassroomEnrollment(Base):
+    __tablename__ = "classroom_enrollments"
+
+    uid = Column(String, primary_key=True)
+    course_id = Column(String, primary_key=True)
+
+
+class ClassroomAnnouncement(Base):
+    __tablename__ = "classroom_announcements"
+
+    course_id = Column(String, primary_key=True)
+    item_id = Column(String, primary_key=True)
+    text = Column(Text, nullable=True)
+    state = Column(String, nullable=True)
+    creator_user_id = Column(String, nullable=True)
+    alternate_link = Column(Text, nullable=True)
+    creation_time = Column(DateTime, nullable=True)
+    update_time = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_classroom_announcements_course_update", "course_id", "update_time"),
+    )
+
+
+class ClassroomCourseWork(Base):
+    __tablename__ = "classroom_coursework"
+
+    course_id = Column(String, primary_key=True)
+    item_id = Column(String, primary_key=True)
+    title = Column(Text, nullable=True)
+    description = Column(Text, nullable=True)
+    work_type = Column(String, nullable=True)
+    state = Column(String, nullable=True)
+    max_points = Column(Float, nullable=True)
+    due_at = Column(DateTime, nullable=True)
+    alternate_link = Column(Text, nullable=True)
+    creation_time = Column(DateTime, nullable=True)
+    update_time = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_classroom_coursework_course_due", "course_id", "due_at"),
+    )
+
+
+class ClassroomSyncState(Base):
+    """ETag + updateTime watermark per polled resource ("user:<uid>:<course_id>:announcements", "user:<uid>:courses", ...)."""
+    __tablename__ = "classroom_sync_state"
+
+    resource = Column(String, primary_key=True)
+    etag = Column(Text, nullable=True)
+    watermark = Column(DateTime, nullable=True)
+    polled_at = Column(DateTime, default=datetime.datetime.utcnow)
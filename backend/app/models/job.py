@@ -0,0 +1,36 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, text
+from app.core.database import Base
+import datetime
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    uid = Column(String, nullable=True)
+    job_type = Column(String, nullable=False)
+    payload = Column(Text, nullable=True)       # JSON
+
+    priority = Column(Integer, nullable=False, default=0)     # higher runs first
+    status = Column(String, nullable=False, default="queued")  # queued / running / done / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+
+    run_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        # At most one queued job per (uid, job_type) – enqueueing again is a no-op
+        Index(
+            "uq_jobs_queued_uid_type", "uid", "job_type",
+            unique=True,
+            postgresql_where=text("status = 'queued'"),
+            sqlite_where=text("status = 'queued'"),
+        ),
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from app.core.database import Base
+import datetime
+
+class MailSyncCursor(Base):
+    __tablename__ = "mail_sync_cursors"
+
+    uid = Column(String, primary_key=True)
+
+    # Gmail historyId the next delta sync starts from
+    history_id = Column(String, nullable=True)
+
+    full_synced_at = Column(DateTime, nullable=True)
+    last_synced_at = Column(DateTime, nullable=True)
+    messages_synced = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+
+class MailMessage(Base):
+    __tablename__ = "mail_messages"
+
+    uid = Column(String, primary_key=True)
+    message_id = Column(String, primary_key=True)
+
+    thread_id = Column(String, nullable=True)
+    history_id = Column(String, nullable=True)
+    internal_date = Column(DateTime, nullable=True)
+    sender = Column(String, nullable=True)
+    subject = Column(Text, nullable=True)
+    snippet = Column(Text, nullable=True)
+    body = Column(Text, nullable=True)
+    label_ids = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_mail_messages_uid_internal_date", "uid", "internal_date"),
+    )
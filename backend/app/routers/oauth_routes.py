@@ -1,16 +1,22 @@
 import datetime
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.core.profile_cache import ProfileCache, get_profile_cache
 from app.models.oauthToken import OAuthToken
+from app.models.user import User
 from app.utils.firebase_util import verify_firebase_token
+from app.utils.google_client import GOOGLE_TOKEN_URL, DeadlineExceeded, get_google_client
+from app.services.token_broker import get_token_broker
+from app.services.job_queue import CLASSROOM_SYNC, MAIL_SYNC, get_job_queue
 import urllib.parse
 import os
-import requests
+import httpx
 
 router = APIRouter(prefix="/auth/google", tags=["Google OAuth"])
 
-TOKEN_URL = "https://oauth2.googleapis.com/token"
+TOKEN_URL = GOOGLE_TOKEN_URL
 GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
 CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 CLIENT_ID = os.getenv("ANDROID_GOOGLE_CLIENT_ID")
@@ -28,10 +34,11 @@ SCOPES = [
 
 
 @router.post("/exchange")
-def exchange_google_refresh_token(
+async def exchange_google_refresh_token(
     payload: dict,
     firebase_data=Depends(verify_firebase_token),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    cache: ProfileCache = Depends(get_profile_cache),
 ):
     code = payload.get("code")
     code_verifier = payload.get("code_verifier")
@@ -39,15 +46,10 @@ def exchange_google_refresh_token(
     if not code or not code_verifier:
         raise HTTPException(status_code=400, detail="Missing code or code_verifier")
 
-    data = {
-        "client_id": CLIENT_ID,
-        "grant_type": "authorization_code",
-        "code": code,
-        "code_verifier": code_verifier,
-        "redirect_uri": REDIRECT_URL,
-    }
-
-    resp = requests.post(TOKEN_URL, data=data, timeout=10)
+    try:
+        resp = await get_google_client().exchange_code(CLIENT_ID, code, code_verifier, REDIRECT_URL)
+    except (httpx.HTTPError, DeadlineExceeded) as e:
+        raise HTTPException(status_code=502, detail=f"Google token endpoint unreachable: {e}")
 
     if resp.status_code != 200:
         raise HTTPException(status_code=400, detail=f"Google exchange failed: {resp.text}")
@@ -70,7 +72,7 @@ def exchange_google_refresh_token(
     uid = firebase_data["uid"]
 
 
-    token = db.query(OAuthToken).filter(OAuthToken.uid == uid).first()
+    token = (await db.execute(select(OAuthToken).where(OAuthToken.uid == uid))).scalar_one_or_none()
 
     if token:
         token.refresh_token = refresh_token
@@ -86,7 +88,19 @@ def exchange_google_refresh_token(
         )
         db.add(token)
 
-    db.commit()
+    # Keep the denormalized flag on users in sync for profile reads
+    await db.execute(update(User).where(User.uid == uid).values(oauth_connected=True))
+
+    # Initial sync runs in the background, committed together with the token
+    queue = get_job_queue()
+    await queue.enqueue(MAIL_SYNC, uid, priority=10, db=db)
+    await queue.enqueue(CLASSROOM_SYNC, uid, priority=10, db=db)
+
+    await db.commit()
+    await cache.invalidate(uid)
+
+    # We already hold a fresh access token – no need to refresh on first use
+    get_token_broker().prime(uid, access_token, expires_in)
 
     return {
         "success": True,
@@ -1,6 +1,10 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import select, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db, dialect_insert
+from app.core.profile_cache import ProfileCache, get_profile_cache
 from app.models.user import User
 from app.models.schemas.user_schema import UserOut, UserProfileSetup
 from app.utils.firebase_util import verify_firebase_token
@@ -8,55 +12,101 @@ from app.models.oauthToken import OAuthToken  # Add this import
 
 router = APIRouter(prefix="/user", tags=["User"])
 
+# users LEFT JOIN oauth_tokens: profile and connection state in one round trip
+def _profile_query(uid: str):
+    return (
+        select(User, OAuthToken.uid.is_not(None))
+        .outerjoin(OAuthToken, OAuthToken.uid == User.uid)
+        .where(User.uid == uid)
+    )
+
+
+def _to_user_out(user: User, oauth_connected: bool) -> UserOut:
+    return UserOut(
+        uid=user.uid,
+        email=user.email or "",
+        name=user.name,
+        semester=user.semester,
+        branch=user.branch,
+        sid=user.sid,
+        profile_completed=user.profile_completed,
+        oauth_connected=oauth_connected,
+    )
+
+
 @router.get("/profile", response_model=UserOut)
-def get_or_create_user(
+async def get_or_create_user(
     firebase_data=Depends(verify_firebase_token),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    cache: ProfileCache = Depends(get_profile_cache),
 ):
     uid = firebase_data["uid"]
-    email = firebase_data.get("email", "")
+    # Stored as NULL when absent: users.email is unique, and NULLs don't collide
+    email = firebase_data.get("email") or None
     name = firebase_data.get("name", "")
 
-    user = db.query(User).filter(User.uid == uid).first()
-
-    if not user:
-        user = User(
+    cached = await cache.get(uid)
+    if cached is not None:
+        return cached
+
+    # Taken before the read: if a write invalidates meanwhile, our set() is dropped
+    generation = await cache.generation(uid)
+    row = (await db.execute(_profile_query(uid))).first()
+    if row:
+        profile = _to_user_out(row[0], row[1])
+        await cache.set(uid, profile, generation)
+        return profile
+
+    # First login: atomic insert that ignores any unique conflict (uid or email),
+    # so two app tabs racing here can't hit a duplicate key
+    user = await _insert_user(db, uid, email, name)
+    if user is None:
+        row = (await db.execute(_profile_query(uid))).first()
+        if row is None:
+            # Not our uid, so the email belongs to another account (e.g. a re-created
+            # Firebase user); create this one without it rather than fail the login
+            logging.warning(f"Email of {uid} is already used by another account; storing it without email")
+            user = await _insert_user(db, uid, None, name)
+    await db.commit()
+
+    if user is None:
+        # Lost the race – the other request created the row
+        row = (await db.execute(_profile_query(uid))).one()
+        profile = _to_user_out(row[0], row[1])
+    else:
+        profile = _to_user_out(user, bool(user.oauth_connected))
+
+    await cache.set(uid, profile, generation)
+    return profile
+
+
+async def _insert_user(db: AsyncSession, uid: str, email: str | None, name: str) -> User | None:
+    """INSERT ... ON CONFLICT DO NOTHING; returns the new row, or None if any unique key existed."""
+    insert = dialect_insert(db)
+    stmt = (
+        insert(User)
+        .values(
             uid=uid,
             email=email,
             name=name,
             profile_completed=False,
+            oauth_connected=exists().where(OAuthToken.uid == uid),
         )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
-    oauth_connected = (
-        db.query(OAuthToken)
-        .filter(OAuthToken.uid == uid)
-        .first()
-        is not None
-    )
-
-    return UserOut(
-        uid=user.uid,
-        email=user.email,
-        name=user.name,
-        semester=user.semester,
-        branch=user.branch,
-        sid=user.sid,
-        profile_completed=user.profile_completed,
-        oauth_connected=oauth_connected,
+        .on_conflict_do_nothing()
+        .returning(User)
     )
+    return (await db.scalars(stmt)).first()
 
 
 @router.put("/profile-setup", response_model=UserOut)
-def update_profile(
+async def update_profile(
     data: UserProfileSetup,
     firebase_data = Depends(verify_firebase_token),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    cache: ProfileCache = Depends(get_profile_cache),
 ):
     uid = firebase_data["uid"]
-    user = db.query(User).filter(User.uid == uid).first()
+    user = (await db.execute(select(User).where(User.uid == uid))).scalar_one_or_none()
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -70,20 +120,22 @@ def update_profile(
     # Ensure profile stays marked as completed
     user.profile_completed = True
 
-    db.commit()
-    db.refresh(user)
-    return user
+    await db.commit()
+    await cache.invalidate(uid)
+    await db.refresh(user)
+    return _to_user_out(user, bool(user.oauth_connected))
 
 
 @router.post("/profile-setup", response_model=UserOut)
-def create_profile(
+async def create_profile(
     data: UserProfileSetup,
     firebase_data = Depends(verify_firebase_token),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    cache: ProfileCache = Depends(get_profile_cache),
 ):
 
     uid = firebase_data["uid"]
-    user = db.query(User).filter(User.uid == uid).first()
+    user = (await db.execute(select(User).where(User.uid == uid))).scalar_one_or_none()
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -94,6 +146,7 @@ def create_profile(
     user.sid = data.sid
     user.profile_completed = True
 
-    db.commit()
-    db.refresh(user)
-    return user
+    await db.commit()
+    await cache.invalidate(uid)
+    await db.refresh(user)
+    return _to_user_out(user, bool(user.oauth_connected))
@@ -0,0 +1 @@
+# Background services (token broker, sync engines, job queue)
@@ -0,0 +1,319 @@
+import asyncio
+import datetime
+import logging
+import os
+import time
+
+from sqlalchemy import delete, select
+
+from app.core.database import dialect_insert
+from app.models.classroom import (
+    ClassroomAnnouncement,
+    ClassroomCourse,
+    ClassroomCourseWork,
+    ClassroomEnrollment,
+    ClassroomSyncState,
+)
+
+USER_RATE_LIMIT = float(os.getenv("CLASSROOM_USER_RATE_LIMIT", "5"))      # requests/second per user
+USER_RATE_BURST = int(os.getenv("CLASSROOM_USER_RATE_BURST", "10"))
+COURSE_CONCURRENCY = int(os.getenv("CLASSROOM_COURSE_CONCURRENCY", "8"))
+MIN_REPOLL_INTERVAL = int(os.getenv("CLASSROOM_MIN_REPOLL_INTERVAL", "120"))  # seconds between polls of one student's feed
+
+
+class RateLimiter:
+    """Token bucket: `rate` requests per second with bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.clock = clock
+        self.updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# ----------------------------------------------------------
+# Parsing
+# ----------------------------------------------------------
+
+def parse_time(value):
+    """RFC 3339 ("2024-01-05T10:11:12.345Z") -> naive UTC datetime."""
+    if not value:
+        return None
+    parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _due_at(item: dict):
+    date = item.get("dueDate")
+    if not date:
+        return None
+    # Google omits zero-valued fields; no dueTime at all means end of day
+    time_of_day = item.get("dueTime")
+    if time_of_day is None:
+        hours, minutes = 23, 59
+    else:
+        hours, minutes = time_of_day.get("hours", 0), time_of_day.get("minutes", 0)
+    return datetime.datetime(date["year"], date["month"], date["day"], hours, minutes)
+
+
+def course_row(course: dict) -> dict:
+    return {
+        "course_id": course["id"],
+        "name": course.get("name"),
+        "section": course.get("section"),
+        "course_state": course.get("courseState"),
+        "alternate_link": course.get("alternateLink"),
+        "update_time": parse_time(course.get("updateTime")),
+    }
+
+
+def announcement_row(course_id: str, item: dict) -> dict:
+    return {
+        "course_id": course_id,
+        "item_id": item["id"],
+        "text": item.get("text"),
+        "state": item.get("state"),
+        "creator_user_id": item.get("creatorUserId"),
+        "alternate_link": item.get("alternateLink"),
+        "creation_time": parse_time(item.get("creationTime")),
+        "update_time": parse_time(item.get("updateTime")),
+    }
+
+
+def coursework_row(course_id: str, item: dict) -> dict:
+    return {
+        "course_id": course_id,
+        "item_id": item["id"],
+        "title": item.get("title"),
+        "description": item.get("description"),
+        "work_type": item.get("workType"),
+        "state": item.get("state"),
+        "max_points": item.get("maxPoints"),
+        "due_at": _due_at(item),
+        "alternate_link": item.get("alternateLink"),
+        "creation_time": parse_time(item.get("creationTime")),
+        "update_time": parse_time(item.get("updateTime")),
+    }
+
+
+# (api method, response key, table, row builder) per course feed
+FEEDS = {
+    "announcements": ("list_announcements", "announcements", ClassroomAnnouncement, announcement_row),
+    "coursework": ("list_coursework", "courseWork", ClassroomCourseWork, coursework_row),
+}
+
+
+async def _upsert(db, model, rows: list[dict], keys: list[str]):
+    if not rows:
+        return
+    insert = dialect_insert(db)
+    stmt = insert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={col: stmt.excluded[col] for col in rows[0] if col not in keys},
+    )
+    await db.execute(stmt, rows)
+
+
+# ----------------------------------------------------------
+# Ingestor
+# ----------------------------------------------------------
+
+class ClassroomIngestor:
+    """
+    Pulls a user's courses once, then fans out announcement and coursework polls
+    per course under a per-user rate limit.
+
+    Each (student, course, feed) remembers its ETag and newest updateTime. State
+    is per student because Classroom only lists what that student can see –
+    items assigned to individual students differ between classmates. A 304, or
+    a first page whose items are all older than the watermark, costs one
+    request and no writes; a feed polled less than MIN_REPOLL_INTERVAL ago is
+    skipped. A course that fails (403/404 after unenrolment, ...) is logged and
+    skipped without failing the rest of the sync.
+
+    One token bucket per uid lives on the ingestor, so back-to-back syncs for
+    the same student share its budget; buckets that have refilled are dropped.
+
+    Items deleted upstream are not removed locally: the list endpoints don't
+    report deletions, and announcement/coursework rows are shared per course
+    while each student only sees part of it, so one student's listing can't
+    prove an item is gone.
+    """
+
+    def __init__(self, classroom_api, token_broker, session_factory,
+                 rate: float = USER_RATE_LIMIT, burst: int = USER_RATE_BURST,
+                 course_concurrency: int = COURSE_CONCURRENCY, min_repoll_interval: int = MIN_REPOLL_INTERVAL):
+        self.api = classroom_api
+        self.broker = token_broker
+        self.session_factory = session_factory
+        self.rate = rate
+        self.burst = burst
+        self.course_concurrency = course_concurrency
+        self.min_repoll_interval = datetime.timedelta(seconds=min_repoll_interval)
+        self._limiters: dict[str, RateLimiter] = {}
+
+    def _limiter(self, uid: str) -> RateLimiter:
+        # A bucket that has refilled behaves like a new one, so keeping it is pointless
+        for other, limiter in list(self._limiters.items()):
+            refilled = limiter.tokens + (limiter.clock() - limiter.updated) * limiter.rate
+            if other != uid and refilled >= limiter.capacity:
+                del self._limiters[other]
+        limiter = self._limiters.get(uid)
+        if limiter is None:
+            limiter = self._limiters[uid] = RateLimiter(self.rate, self.burst)
+        return limiter
+
+    async def sync_user(self, uid: str) -> dict:
+        """Returns {"courses": n, "announcements": n, "coursework": n, "failed_feeds": n}."""
+        access_token = await self.broker.get_access_token(uid)
+        limiter = self._limiter(uid)
+
+        course_ids = await self._sync_courses(uid, access_token, limiter)
+
+        slots = asyncio.Semaphore(self.course_concurrency)
+
+        async def poll(course_id, kind):
+            async with slots:
+                return await self._sync_feed(uid, access_token, limiter, course_id, kind)
+
+        feeds = [(c, kind) for c in course_ids for kind in FEEDS]
+        results = await asyncio.gather(*(poll(c, kind) for c, kind in feeds), return_exceptions=True)
+        counts = {"courses": len(course_ids), "announcements": 0, "coursework": 0, "failed_feeds": 0}
+        for (course_id, kind), result in zip(feeds, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, Exception):
+                counts["failed_feeds"] += 1
+                logging.warning(f"Classroom sync for {uid}: {course_id}:{kind} failed: {result!r}")
+            else:
+                counts[kind] += result
+        return counts
+
+    async def _sync_courses(self, uid: str, access_token: str, limiter: RateLimiter) -> list[str]:
+        resource = f"user:{uid}:courses"
+        async with self.session_factory() as db:
+            state = await db.get(ClassroomSyncState, resource)
+            etag = state.etag if state else None
+
+        courses, first_etag, page_token = [], None, None
+        while True:
+            await limiter.acquire()
+            body, page_etag = await self.api.list_courses(access_token, page_token=page_token, etag=None if page_token else etag)
+            if body is None:
+                # Course list unchanged – reuse the enrollments we stored last time
+                async with self.session_factory() as db:
+                    rows = await db.execute(select(ClassroomEnrollment.course_id).where(ClassroomEnrollment.uid == uid))
+                    return [r[0] for r in rows]
+            if page_token is None:
+                first_etag = page_etag
+            courses.extend(body.get("courses", []))
+            page_token = body.get("nextPageToken")
+            if not page_token:
+                break
+
+        course_ids = [c["id"] for c in courses]
+        async with self.session_factory() as db:
+            await _upsert(db, ClassroomCourse, [course_row(c) for c in courses], ["course_id"])
+            await db.execute(
+                delete(ClassroomEnrollment).where(
+                    ClassroomEnrollment.uid == uid, ClassroomEnrollment.course_id.not_in(course_ids)
+                )
+            )
+            if course_ids:
+                insert = dialect_insert(db)
+                await db.execute(
+                    insert(ClassroomEnrollment).on_conflict_do_nothing(),
+                    [{"uid": uid, "course_id": c} for c in course_ids],
+                )
+            await self._save_state(db, resource, first_etag, None)
+            await db.commit()
+        return course_ids
+
+    async def _sync_feed(self, uid: str, access_token: str, limiter: RateLimiter, course_id: str, kind: str) -> int:
+        method, key, model, build_row = FEEDS[kind]
+        resource = f"user:{uid}:{course_id}:{kind}"
+        now = datetime.datetime.utcnow()
+
+        async with self.session_factory() as db:
+            state = await db.get(ClassroomSyncState, resource)
+        if state and state.polled_at and now - state.polled_at < self.min_repoll_interval:
+            return 0
+        etag = state.etag if state else None
+        watermark = state.watermark if state else None
+
+        rows, first_etag, newest, page_token = [], etag, watermark, None
+        while True:
+            await limiter.acquire()
+            body, page_etag = await getattr(self.api, method)(
+                access_token, course_id, page_token=page_token, etag=None if page_token else etag
+            )
+            if body is None:
+                break
+            if page_token is None:
+                first_etag = page_etag
+
+            reached_watermark = False
+            for item in body.get(key, []):
+                row = build_row(course_id, item)
+                # Pages are ordered by updateTime desc, so the first old item ends the scan
+                if watermark and row["update_time"] and row["update_time"] <= watermark:
+                    reached_watermark = True
+                    break
+                rows.append(row)
+                if row["update_time"] and (newest is None or row["update_time"] > newest):
+                    newest = row["update_time"]
+
+            page_token = body.get("nextPageToken")
+            if reached_watermark or not page_token:
+                break
+
+        async with self.session_factory() as db:
+            await _upsert(db, model, rows, ["course_id", "item_id"])
+            await self._save_state(db, resource, first_etag, newest)
+            await db.commit()
+        if rows:
+            logging.info(f"Classroom {resource}: {len(rows)} new/updated items")
+        return len(rows)
+
+    async def _save_state(self, db, resource: str, etag, watermark):
+        insert = dialect_insert(db)
+        values = {"resource": resource, "etag": etag, "watermark": watermark, "polled_at": datetime.datetime.utcnow()}
+        stmt = insert(ClassroomSyncState).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["resource"],
+            set_={"etag": stmt.excluded.etag, "watermark": stmt.excluded.watermark, "polled_at": stmt.excluded.polled_at},
+        )
+        await db.execute(stmt)
+
+
+_classroom_sync: ClassroomIngestor | None = None
+
+
+def get_classroom_sync() -> ClassroomIngestor:
+    global _classroom_sync
+    if _classroom_sync is None:
+        from app.core.database import SessionLocal
+        from app.services.token_broker import get_token_broker
+        from app.utils.classroom_api import HttpClassroomApi
+        _classroom_sync = ClassroomIngestor(HttpClassroomApi(), get_token_broker(), SessionLocal)
+    return _classroom_sync
+
+
+def set_classroom_sync(ingestor: ClassroomIngestor | None):
+    """Swap the process-wide ingestor (tests, or a fake Classroom API)."""
+    global _classroom_sync
+    _classroom_sync = ingestor
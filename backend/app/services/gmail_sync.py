@@ -0,0 +1,235 @@
+import asyncio
+import base64
+import datetime
+import logging
+import os
+
+from sqlalchemy import delete
+
+from app.core.database import dialect_insert
+from app.models.mailSync import MailMessage, MailSyncCursor
+from app.utils.gmail_api import HistoryExpired
+
+SYNC_WORKERS = int(os.getenv("MAIL_SYNC_WORKERS", "8"))
+FETCH_BATCH_SIZE = int(os.getenv("MAIL_FETCH_BATCH_SIZE", "100"))
+FULL_SYNC_MAX_MESSAGES = int(os.getenv("MAIL_FULL_SYNC_MAX_MESSAGES", "2000"))
+FULL_SYNC_QUERY = os.getenv("MAIL_FULL_SYNC_QUERY", "")     # e.g. "newer_than:180d"
+
+
+# ----------------------------------------------------------
+# Message parsing
+# ----------------------------------------------------------
+
+def _decode_body(data: str) -> str:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4)).decode("utf-8", errors="replace")
+
+
+def _extract_text(payload: dict) -> str:
+    """Prefer text/plain anywhere in the MIME tree, fall back to the first text/html."""
+    plain, html = [], []
+
+    def walk(part):
+        mime = part.get("mimeType", "")
+        data = part.get("body", {}).get("data")
+        if data and mime == "text/plain":
+            plain.append(_decode_body(data))
+        elif data and mime == "text/html":
+            html.append(_decode_body(data))
+        for child in part.get("parts", []) or []:
+            walk(child)
+
+    walk(payload)
+    return "\n".join(plain) if plain else "\n".join(html)
+
+
+def message_row(uid: str, message: dict) -> dict:
+    headers = {h["name"].lower(): h["value"] for h in message.get("payload", {}).get("headers", [])}
+    internal_date = None
+    if message.get("internalDate"):
+        internal_date = datetime.datetime.utcfromtimestamp(int(message["internalDate"]) / 1000)
+    return {
+        "uid": uid,
+        "message_id": message["id"],
+        "thread_id": message.get("threadId"),
+        "history_id": message.get("historyId"),
+        "internal_date": internal_date,
+        "sender": headers.get("from"),
+        "subject": headers.get("subject"),
+        "snippet": message.get("snippet"),
+        "body": _extract_text(message.get("payload", {})),
+        "label_ids": ",".join(message.get("labelIds", [])),
+    }
+
+
+# ----------------------------------------------------------
+# Sync engine
+# ----------------------------------------------------------
+
+class GmailSyncEngine:
+    """
+    One full fetch per connected user, then historyId deltas only.
+
+    `gmail_api` is anything with HttpGmailApi's coroutines (a local fake in tests),
+    `token_broker` hands out access tokens. At most SYNC_WORKERS users sync at
+    once and a user already syncing is never started twice.
+    """
+
+    def __init__(self, gmail_api, token_broker, session_factory, max_workers: int = SYNC_WORKERS):
+        self.api = gmail_api
+        self.broker = token_broker
+        self.session_factory = session_factory
+        self._slots = asyncio.Semaphore(max_workers)
+        self._running: dict[str, asyncio.Task] = {}
+
+    async def sync_user(self, uid: str) -> int:
+        """Sync one user (joining a sync already in progress). Returns messages stored."""
+        task = self._running.get(uid)
+        if task is None:
+            task = asyncio.ensure_future(self._sync_with_slot(uid))
+            self._running[uid] = task
+            task.add_done_callback(lambda _: self._running.pop(uid, None))
+        return await asyncio.shield(task)
+
+    async def sync_many(self, uids) -> dict:
+        """Sync a set of users on the bounded pool. Returns {uid: count or exception}."""
+        uids = list(uids)
+        results = await asyncio.gather(*(self.sync_user(uid) for uid in uids), return_exceptions=True)
+        return dict(zip(uids, results))
+
+    async def _sync_with_slot(self, uid: str) -> int:
+        async with self._slots:
+            try:
+                return await self._sync(uid)
+            except Exception as e:
+                logging.error(f"Mail sync failed for {uid}: {e}")
+                await self._record_error(uid, str(e))
+                raise
+
+    async def _sync(self, uid: str) -> int:
+        access_token = await self.broker.get_access_token(uid)
+
+        async with self.session_factory() as db:
+            cursor = await db.get(MailSyncCursor, uid)
+            history_id = cursor.history_id if cursor else None
+
+        if history_id:
+            try:
+                return await self._delta_sync(uid, access_token, history_id)
+            except HistoryExpired:
+                logging.info(f"History {history_id} expired for {uid}, falling back to full sync")
+        return await self._full_sync(uid, access_token)
+
+    async def _full_sync(self, uid: str, access_token: str) -> int:
+        # Take the historyId before listing so nothing arriving mid-sync is missed
+        profile = await self.api.get_profile(access_token)
+        start_history_id = str(profile["historyId"])
+
+        message_ids, page_token = [], None
+        while len(message_ids) < FULL_SYNC_MAX_MESSAGES:
+            page = await self.api.list_messages(access_token, page_token=page_token, query=FULL_SYNC_QUERY or None)
+            message_ids.extend(m["id"] for m in page.get("messages", []))
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                break
+        message_ids = message_ids[:FULL_SYNC_MAX_MESSAGES]
+
+        stored = await self._fetch_and_store(uid, access_token, message_ids)
+        await self._save_cursor(uid, start_history_id, stored, full=True)
+        return stored
+
+    async def _delta_sync(self, uid: str, access_token: str, history_id: str) -> int:
+        added, deleted = {}, set()
+        latest_history_id, page_token = history_id, None
+        while True:
+            page = await self.api.list_history(access_token, history_id, page_token=page_token)
+            for record in page.get("history", []):
+                for item in record.get("messagesAdded", []):
+                    added[item["message"]["id"]] = None
+                    deleted.discard(item["message"]["id"])
+                for item in record.get("messagesDeleted", []):
+                    deleted.add(item["message"]["id"])
+                    added.pop(item["message"]["id"], None)
+            latest_history_id = str(page.get("historyId", latest_history_id))
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                break
+
+        if deleted:
+            async with self.session_factory() as db:
+                await db.execute(
+                    delete(MailMessage).where(MailMessage.uid == uid, MailMessage.message_id.in_(deleted))
+                )
+                await db.commit()
+
+        stored = await self._fetch_and_store(uid, access_token, list(added))
+        await self._save_cursor(uid, latest_history_id, stored, full=False)
+        return stored
+
+    async def _fetch_and_store(self, uid: str, access_token: str, message_ids: list[str]) -> int:
+        stored = 0
+        for start in range(0, len(message_ids), FETCH_BATCH_SIZE):
+            chunk = message_ids[start:start + FETCH_BATCH_SIZE]
+            messages = await self.api.batch_get_messages(access_token, chunk)
+            rows = [message_row(uid, m) for m in messages]
+            if not rows:
+                continue
+            async with self.session_factory() as db:
+                insert = dialect_insert(db)
+                stmt = insert(MailMessage)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[MailMessage.uid, MailMessage.message_id],
+                    set_={
+                        "history_id": stmt.excluded.history_id,
+                        "label_ids": stmt.excluded.label_ids,
+                    },
+                )
+                await db.execute(stmt, rows)
+                await db.commit()
+            stored += len(rows)
+        return stored
+
+    async def _save_cursor(self, uid: str, history_id: str, stored: int, full: bool):
+        now = datetime.datetime.utcnow()
+        async with self.session_factory() as db:
+            cursor = await db.get(MailSyncCursor, uid)
+            if cursor is None:
+                cursor = MailSyncCursor(uid=uid, messages_synced=0)
+                db.add(cursor)
+            cursor.history_id = history_id
+            cursor.last_synced_at = now
+            cursor.messages_synced = (cursor.messages_synced or 0) + stored
+            cursor.last_error = None
+            if full:
+                cursor.full_synced_at = now
+            await db.commit()
+
+    async def _record_error(self, uid: str, error: str):
+        try:
+            async with self.session_factory() as db:
+                cursor = await db.get(MailSyncCursor, uid)
+                if cursor is None:
+                    cursor = MailSyncCursor(uid=uid, messages_synced=0)
+                    db.add(cursor)
+                cursor.last_error = error[:2000]
+                await db.commit()
+        except Exception as e:
+            logging.error(f"Could not record mail sync error for {uid}: {e}")
+
+
+_gmail_sync: GmailSyncEngine | None = None
+
+
+def get_gmail_sync() -> GmailSyncEngine:
+    global _gmail_sync
+    if _gmail_sync is None:
+        from app.core.database import SessionLocal
+        from app.services.token_broker import get_token_broker
+        from app.utils.gmail_api import HttpGmailApi
+        _gmail_sync = GmailSyncEngine(HttpGmailApi(), get_token_broker(), SessionLocal)
+    return _gmail_sync
+
+
+def set_gmail_sync(engine: GmailSyncEngine | None):
+    """Swap the process-wide engine (tests, or a fake Gmail API)."""
+    global _gmail_sync
+    _gmail_sync = engine
@@ -0,0 +1,337 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+import random
+import socket
+import uuid
+
+from sqlalchemy import and_, delete, event, exists, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from app.core.database import dialect_insert
+from app.models.job import Job
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))   # a crashed worker's job is retried after this
+JOB_RETRY_BASE = float(os.getenv("JOB_RETRY_BASE", "10"))
+JOB_RETRY_CAP = float(os.getenv("JOB_RETRY_CAP", "3600"))
+# Finished (done/failed) jobs older than this are deleted by the scheduler
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+# Job types
+MAIL_SYNC = "mail_sync"
+CLASSROOM_SYNC = "classroom_sync"
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: ~base, 2*base, 4*base ... capped."""
+    delay = min(JOB_RETRY_CAP, JOB_RETRY_BASE * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobQueue:
+    """
+    Durable job queue on the application database.
+
+    Jobs are claimed with UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED)
+    and leased for JOB_LEASE_SECONDS, so any number of worker processes can drain
+    the same table. While a handler runs, a heartbeat keeps extending the lease,
+    so only jobs of dead workers are reclaimed. Only one *queued* job may exist
+    per (uid, job_type); enqueueing a duplicate is a no-op.
+    """
+
+    def __init__(self, session_factory, worker_id: str | None = None):
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.handlers = {}
+        self._wakeup = asyncio.Event()
+
+    def register(self, job_type: str, handler):
+        """handler: async def handler(uid, payload: dict) -> None"""
+        self.handlers[job_type] = handler
+
+    # ------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------
+
+    async def enqueue(self, job_type: str, uid: str | None = None, payload: dict | None = None,
+                      priority: int = 0, delay: float = 0, max_attempts: int = 5, db=None) -> bool:
+        """
+        Queue a job. Pass the caller's `db` session to enqueue inside its transaction
+        (the caller commits). Returns False when an identical job is already queued.
+        """
+        values = {
+            "uid": uid,
+            "job_type": job_type,
+            "payload": json.dumps(payload or {}),
+            "priority": priority,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": datetime.datetime.utcnow() + datetime.timedelta(seconds=delay),
+        }
+
+        async def insert_job(session):
+            insert = dialect_insert(session)
+            stmt = (
+                insert(Job)
+                .values(**values)
+                .on_conflict_do_nothing(index_elements=["uid", "job_type"], index_where=Job.status == "queued")
+                .returning(Job.id)
+            )
+            return (await session.execute(stmt)).first() is not None
+
+        if db is not None:
+            created = await insert_job(db)
+            if created:
+                # Wake workers only once the caller's transaction makes the job visible
+                event.listen(db.sync_session, "after_commit", lambda session: self._wakeup.set(), once=True)
+        else:
+            async with self.session_factory() as session:
+                created = await insert_job(session)
+                await session.commit()
+            if created:
+                self._wakeup.set()
+        return created
+
+    # ------------------------------------------------------
+    # Consumer side
+    # ------------------------------------------------------
+
+    async def claim(self, limit: int) -> list[Job]:
+        now = datetime.datetime.utcnow()
+        async with self.session_factory() as db:
+            runnable = (
+                select(Job.id)
+                .where(
+                    or_(
+                        and_(Job.status == "queued", Job.run_at <= now),
+                        # lease expired: the worker holding it died
+                        and_(Job.status == "running", Job.locked_until < now),
+                    )
+                )
+                .order_by(Job.priority.desc(), Job.run_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            stmt = (
+                update(Job)
+                .where(Job.id.in_(runnable.scalar_subquery()))
+                .values(
+                    status="running",
+                    locked_by=self.worker_id,
+                    locked_until=now + datetime.timedelta(seconds=JOB_LEASE_SECONDS),
+                    attempts=Job.attempts + 1,
+                )
+                .returning(Job)
+                .execution_options(synchronize_session=False)
+            )
+            jobs = list((await db.scalars(stmt)).all())
+            await db.commit()
+        return jobs
+
+    async def run_job(self, job: Job):
+        handler = self.handlers.get(job.job_type)
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job type {job.job_type!r}")
+            await handler(job.uid, json.loads(job.payload or "{}"))
+        except Exception as e:
+            logging.error(f"Job {job.id} ({job.job_type}, uid={job.uid}) failed on attempt {job.attempts}: {e}")
+            heartbeat.cancel()
+            await self._fail(job, str(e))
+        else:
+            heartbeat.cancel()
+            await self._finish(job, status="done", error=None)
+        finally:
+            heartbeat.cancel()      # also when the worker itself is cancelled
+
+    async def _heartbeat(self, job: Job):
+        """Extends the lease every third of JOB_LEASE_SECONDS while the handler runs."""
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                async with self.session_factory() as db:
+                    result = await db.execute(
+                        update(Job)
+                        .where(Job.id == job.id, Job.locked_by == self.worker_id, Job.status == "running")
+                        .values(locked_until=datetime.datetime.utcnow() + datetime.timedelta(seconds=JOB_LEASE_SECONDS))
+                    )
+                    await db.commit()
+                if result.rowcount == 0:
+                    logging.warning(f"Job {job.id} lease lost to another worker; its result will be discarded")
+                    return
+            except Exception as e:
+                logging.error(f"Job {job.id} heartbeat failed: {e}")
+
+    async def _finish(self, job: Job, status: str, error: str | None):
+        async with self.session_factory() as db:
+            await db.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.locked_by == self.worker_id)
+                .values(status=status, locked_by=None, locked_until=None, last_error=error)
+            )
+            await db.commit()
+
+    async def _fail(self, job: Job, error: str):
+        error = error[:2000]
+        if job.attempts >= job.max_attempts:
+            await self._finish(job, status="failed", error=error)
+            return
+
+        # Requeue only if no fresh job for the same work is waiting. The check is part
+        # of the UPDATE; an enqueue committing in between trips the unique index instead
+        other = aliased(Job)
+        duplicate_queued = exists().where(
+            other.uid == job.uid, other.job_type == job.job_type, other.status == "queued", other.id != job.id
+        )
+        requeued = False
+        async with self.session_factory() as db:
+            try:
+                result = await db.execute(
+                    update(Job)
+                    .where(Job.id == job.id, Job.locked_by == self.worker_id, ~duplicate_queued)
+                    .values(
+                        status="queued",
+                        locked_by=None,
+                        locked_until=None,
+                        last_error=error,
+                        run_at=datetime.datetime.utcnow() + datetime.timedelta(seconds=retry_delay(job.attempts)),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+                requeued = result.rowcount > 0
+            except IntegrityError:
+                # An enqueue committed between the check and the write
+                await db.rollback()
+        if not requeued:
+            # A fresh job for the same work is waiting (or the lease was lost) – let it do the retry
+            await self._finish(job, status="failed", error=f"superseded by a queued job: {error}")
+
+    async def prune(self, older_than: float = JOB_RETENTION_SECONDS) -> int:
+        """Deletes done/failed jobs last touched more than `older_than` seconds ago."""
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=older_than)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(Job).where(Job.status.in_(["done", "failed"]), Job.updated_at < cutoff)
+            )
+            await db.commit()
+        return result.rowcount
+
+    async def work(self, concurrency: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        """Run jobs forever on `concurrency` asyncio slots. Cancel the task to stop."""
+        running: set[asyncio.Task] = set()
+        try:
+            while True:
+                free = concurrency - len(running)
+                jobs = []
+                if free > 0:
+                    try:
+                        jobs = await self.claim(free)
+                    except Exception as e:
+                        logging.error(f"Job claim failed: {e}")
+                for job in jobs:
+                    task = asyncio.create_task(self.run_job(job))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+
+                if jobs and len(running) < concurrency:
+                    continue    # more may be waiting
+                self._wakeup.clear()
+                waiters = [asyncio.ensure_future(self._wakeup.wait()), *running]
+                done, pending = await asyncio.wait(waiters, timeout=poll_interval, return_when=asyncio.FIRST_COMPLETED)
+                waiters[0].cancel()
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+class PeriodicScheduler:
+    """
+    Calls async callbacks on fixed intervals (with a little jitter). Callbacks
+    should only enqueue jobs; de-duplication makes running the scheduler in
+    several processes harmless.
+    """
+
+    def __init__(self):
+        self.entries = []
+
+    def every(self, seconds: float, callback):
+        self.entries.append((seconds, callback))
+
+    async def run(self):
+        await asyncio.gather(*(self._loop(seconds, callback) for seconds, callback in self.entries))
+
+    async def _loop(self, seconds: float, callback):
+        while True:
+            await asyncio.sleep(seconds * random.uniform(0.9, 1.1))
+            try:
+                await callback()
+            except Exception as e:
+                logging.error(f"Scheduled task {getattr(callback, '__name__', callback)} failed: {e}")
+
+
+# ----------------------------------------------------------
+# Default wiring
+# ----------------------------------------------------------
+
+SYNC_INTERVAL = int(os.getenv("JOB_SYNC_INTERVAL", "900"))
+
+
+async def _mail_sync(uid, payload):
+    from app.services.gmail_sync import get_gmail_sync
+    await get_gmail_sync().sync_user(uid)
+
+
+async def _classroom_sync(uid, payload):
+    from app.services.classroom_sync import get_classroom_sync
+    await get_classroom_sync().sync_user(uid)
+
+
+async def enqueue_syncs_for_connected_users():
+    from app.models.oauthToken import OAuthToken
+    queue = get_job_queue()
+    async with queue.session_factory() as db:
+        uids = [r[0] for r in await db.execute(select(OAuthToken.uid))]
+    for uid in uids:
+        await queue.enqueue(MAIL_SYNC, uid)
+        await queue.enqueue(CLASSROOM_SYNC, uid)
+
+
+async def prune_finished_jobs():
+    removed = await get_job_queue().prune()
+    if removed:
+        logging.info(f"Pruned {removed} finished jobs")
+
+
+def build_scheduler() -> PeriodicScheduler:
+    scheduler = PeriodicScheduler()
+    scheduler.every(SYNC_INTERVAL, enqueue_syncs_for_connected_users)
+    scheduler.every(3600, prune_finished_jobs)
+    return scheduler
+
+
+_job_queue: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        from app.core.database import SessionLocal
+        _job_queue = JobQueue(SessionLocal)
+        _job_queue.register(MAIL_SYNC, _mail_sync)
+        _job_queue.register(CLASSROOM_SYNC, _classroom_sync)
+    return _job_queue
+
+
+def set_job_queue(queue: JobQueue | None):
+    """Swap the process-wide queue (tests, or custom handlers)."""
+    global _job_queue
+    _job_queue = queue
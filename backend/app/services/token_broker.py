@@ -0,0 +1,234 @@
+import asyncio
+import datetime
+import logging
+import os
+import random
+import time
+
+from sqlalchemy import select, update
+
+from app.models.oauthToken import OAuthToken
+
+CLIENT_ID = os.getenv("ANDROID_GOOGLE_CLIENT_ID")
+CLIENT_SECRET = os.getenv("CLIENT_SECRET")
+
+REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", "300"))     # refresh this many seconds before expiry
+SWEEP_INTERVAL = float(os.getenv("TOKEN_SWEEP_INTERVAL", "30"))
+FLUSH_INTERVAL = float(os.getenv("TOKEN_FLUSH_INTERVAL", "2"))
+FLUSH_BATCH_SIZE = int(os.getenv("TOKEN_FLUSH_BATCH_SIZE", "200"))
+IDLE_EVICT_AFTER = 3600     # stop proactively refreshing users we haven't served for an hour
+
+
+class TokenRefreshError(Exception):
+    """Google refused to mint an access token (revoked grant, unknown user, ...)."""
+
+
+class _CachedToken:
+    __slots__ = ("access_token", "expires_at", "last_used")
+
+    def __init__(self, access_token: str, expires_at: float, last_used: float):
+        self.access_token = access_token
+        self.expires_at = expires_at
+        self.last_used = last_used
+
+
+class TokenBroker:
+    """
+    Hands out short-lived Google access tokens per uid.
+
+    Tokens live in memory until REFRESH_MARGIN before they expire. Concurrent
+    callers for one uid share a single in-flight refresh, a background sweep
+    refreshes recently used tokens ahead of expiry, and the new expiry/scopes are
+    written back to oauth_tokens in batches instead of once per refresh.
+
+    With google_client=None the process-wide client is looked up on every
+    refresh, so close_google_client() on shutdown never leaves the broker
+    holding a closed client.
+    """
+
+    def __init__(self, google_client, session_factory, client_id=CLIENT_ID, client_secret=CLIENT_SECRET,
+                 refresh_margin: int = REFRESH_MARGIN, clock=time.time):
+        self._google = google_client
+        self.session_factory = session_factory
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+
+        self._tokens: dict[str, _CachedToken] = {}
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._pending: dict[str, dict] = {}
+        self._flush_wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._proactive: set[asyncio.Task] = set()
+        self.refreshes = 0
+
+    @property
+    def google(self):
+        if self._google is not None:
+            return self._google
+        from app.utils.google_client import get_google_client
+        return get_google_client()
+
+    # ------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------
+
+    async def get_access_token(self, uid: str) -> str:
+        now = self.clock()
+        cached = self._tokens.get(uid)
+        if cached is not None and cached.expires_at - self.refresh_margin > now:
+            cached.last_used = now
+            return cached.access_token
+        return await self._refresh_single_flight(uid)
+
+    def prime(self, uid: str, access_token: str, expires_in: int | None):
+        """Seed the cache with a token we already have (e.g. from the code exchange)."""
+        if access_token and expires_in:
+            now = self.clock()
+            self._tokens[uid] = _CachedToken(access_token, now + expires_in, now)
+
+    def forget(self, uid: str):
+        self._tokens.pop(uid, None)
+
+    async def start(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._sweep_loop()),
+                asyncio.create_task(self._flush_loop()),
+            ]
+
+    async def stop(self):
+        # Refreshes the sweep started (and the shielded refreshes they wait on) die with the broker
+        tasks = self._tasks + list(self._proactive) + list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
+
+    # ------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------
+
+    async def _refresh_single_flight(self, uid: str) -> str:
+        future = self._inflight.get(uid)
+        if future is None:
+            future = asyncio.ensure_future(self._refresh(uid))
+            self._inflight[uid] = future
+            future.add_done_callback(lambda _: self._inflight.pop(uid, None))
+        # shield: one caller being cancelled must not cancel the refresh for the others
+        return await asyncio.shield(future)
+
+    async def _refresh(self, uid: str) -> str:
+        async with self.session_factory() as db:
+            refresh_token = (
+                await db.execute(select(OAuthToken.refresh_token).where(OAuthToken.uid == uid))
+            ).scalar_one_or_none()
+        if refresh_token is None:
+            raise TokenRefreshError(f"No Google account connected for {uid}")
+
+        resp = await self.google.refresh(self.client_id, refresh_token, self.client_secret)
+        if resp.status_code != 200:
+            self.forget(uid)
+            raise TokenRefreshError(f"Google refresh failed for {uid}: {resp.status_code} {resp.text}")
+
+        body = resp.json()
+        access_token = body["access_token"]
+        expires_in = int(body.get("expires_in", 3600))
+        now = self.clock()
+        self._tokens[uid] = _CachedToken(access_token, now + expires_in, now)
+        self.refreshes += 1
+
+        writeback = {
+            "uid": uid,
+            "expires_at": datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in),
+        }
+        if body.get("scope"):
+            writeback["scopes"] = body["scope"]
+        if body.get("refresh_token"):
+            # Google may rotate the refresh token
+            writeback["refresh_token"] = body["refresh_token"]
+        self._queue_writeback(writeback)
+
+        return access_token
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            now = self.clock()
+            for uid, cached in list(self._tokens.items()):
+                if now - cached.last_used > IDLE_EVICT_AFTER:
+                    del self._tokens[uid]
+                    continue
+                # Refresh a little before the request path would, spread out to avoid bursts
+                horizon = self.refresh_margin + SWEEP_INTERVAL + random.uniform(0, SWEEP_INTERVAL)
+                if cached.expires_at - now <= horizon and uid not in self._inflight:
+                    # Keep a reference: the loop only holds tasks weakly
+                    task = asyncio.create_task(self._proactive_refresh(uid))
+                    self._proactive.add(task)
+                    task.add_done_callback(self._proactive.discard)
+
+    async def _proactive_refresh(self, uid: str):
+        try:
+            await self._refresh_single_flight(uid)
+        except Exception as e:
+            logging.warning(f"Proactive token refresh failed for {uid}: {e}")
+
+    # ------------------------------------------------------
+    # Batched write-back
+    # ------------------------------------------------------
+
+    def _queue_writeback(self, row: dict):
+        # Later refreshes for the same uid overwrite earlier ones
+        self._pending[row["uid"]] = {**self._pending.get(row["uid"], {}), **row}
+        if len(self._pending) >= FLUSH_BATCH_SIZE:
+            self._flush_wakeup.set()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wakeup.wait(), timeout=FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Token write-back failed: {e}")
+
+    async def flush(self):
+        if not self._pending:
+            return
+        rows, self._pending = list(self._pending.values()), {}
+        try:
+            async with self.session_factory() as db:
+                # Bulk UPDATE by primary key, grouped by column set (executemany per group)
+                groups: dict[tuple, list[dict]] = {}
+                for row in rows:
+                    groups.setdefault(tuple(sorted(row)), []).append(row)
+                for group in groups.values():
+                    await db.execute(update(OAuthToken), group)
+                await db.commit()
+        except Exception:
+            # Put rows back unless a newer refresh already queued something for that uid
+            for row in rows:
+                self._pending.setdefault(row["uid"], row)
+            raise
+
+
+_token_broker: TokenBroker | None = None
+
+
+def get_token_broker() -> TokenBroker:
+    global _token_broker
+    if _token_broker is None:
+        from app.core.database import SessionLocal
+        _token_broker = TokenBroker(None, SessionLocal)
+    return _token_broker
+
+
+def set_token_broker(broker: TokenBroker | None):
+    """Swap the process-wide broker (tests, or a stubbed Google client)."""
+    global _token_broker
+    _token_broker = broker
@@ -0,0 +1,61 @@
+import os
+
+from app.utils.google_client import get_google_client
+
+# Point this at a local fake server for tests/benchmarks
+CLASSROOM_API_URL = os.getenv("CLASSROOM_API_URL", "https://classroom.googleapis.com/v1")
+
+PAGE_SIZE = 100
+
+
+class ClassroomApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Classroom API error {status}: {message}")
+        self.status = status
+
+
+class HttpClassroomApi:
+    """
+    Minimal async Classroom REST client over the shared pooled GoogleClient.
+
+    Every list call takes the ETag from the previous poll and returns
+    (body, etag); body is None when Google answers 304 Not Modified.
+    """
+
+    def __init__(self, google_client=None, api_url: str = CLASSROOM_API_URL):
+        self._google = google_client
+        self.api_url = api_url.rstrip("/")
+
+    @property
+    def google(self):
+        # Looked up per call, so the singleton never holds a client close_google_client() closed
+        return self._google if self._google is not None else get_google_client()
+
+    async def _list(self, access_token: str, path: str, params: dict, etag=None):
+        headers = {"Authorization": f"Bearer {access_token}"}
+        if etag:
+            headers["If-None-Match"] = etag
+        resp = await self.google.request("GET", f"{self.api_url}/{path}", params=params, headers=headers)
+        if resp.status_code == 304:
+            return None, etag
+        if resp.status_code != 200:
+            raise ClassroomApiError(resp.status_code, resp.text)
+        return resp.json(), resp.headers.get("etag")
+
+    async def list_courses(self, access_token: str, page_token=None, etag=None):
+        params = {"studentId": "me", "courseStates": "ACTIVE", "pageSize": PAGE_SIZE}
+        if page_token:
+            params["pageToken"] = page_token
+        return await self._list(access_token, "courses", params, etag)
+
+    async def list_announcements(self, access_token: str, course_id: str, page_token=None, etag=None):
+        params = {"orderBy": "updateTime desc", "pageSize": PAGE_SIZE}
+        if page_token:
+            params["pageToken"] = page_token
+        return await self._list(access_token, f"courses/{course_id}/announcements", params, etag)
+
+    async def list_coursework(self, access_token: str, course_id: str, page_token=None, etag=None):
+        params = {"orderBy": "updateTime desc", "pageSize": PAGE_SIZE}
+        if page_token:
+            params["pageToken"] = page_token
+        return await self._list(access_token, f"courses/{course_id}/courseWork", params, etag)
@@ -1,5 +1,5 @@
 from fastapi import HTTPException, Header
-from firebase_admin import auth
+from app.utils.token_verifier import get_token_verifier
 import logging
 
 async def verify_firebase_token(authorization: str | None = Header(None)):
@@ -16,10 +16,10 @@ async def verify_firebase_token(authorization: str | None = Header(None)):
         raise HTTPException(status_code=401, detail="Invalid authorization format")
 
     id_token = authorization.split(" ")[1]
-    logging.info("Token extracted. Attempting to verify with Firebase Admin...")
+    logging.info("Token extracted. Attempting to verify against cached Firebase signing keys...")
 
     try:
-        decoded_token = auth.verify_id_token(id_token)
+        decoded_token = await get_token_verifier().verify(id_token)
         logging.info(f"Token verification succeeded. UID: {decoded_token.get('uid')}")
         return decoded_token
     except Exception as e:
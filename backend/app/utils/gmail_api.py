@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import uuid
+
+from app.utils.google_client import MAX_ATTEMPTS, RETRY_STATUSES, _backoff, get_google_client
+
+# Point these at a local fake server for tests/benchmarks
+GMAIL_API_URL = os.getenv("GMAIL_API_URL", "https://gmail.googleapis.com/gmail/v1")
+GMAIL_BATCH_URL = os.getenv("GMAIL_BATCH_URL", "https://gmail.googleapis.com/batch/gmail/v1")
+
+BATCH_LIMIT = 100   # Gmail accepts at most 100 calls per batch request
+
+CONTENT_ID_RE = re.compile(rb"content-id:\s*<response-item(\d+)>", re.IGNORECASE)
+
+
+class GmailApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Gmail API error {status}: {message}")
+        self.status = status
+
+
+class HistoryExpired(GmailApiError):
+    """startHistoryId is too old (404) – the caller must fall back to a full sync."""
+
+
+class HttpGmailApi:
+    """
+    Minimal async Gmail REST client over the shared pooled GoogleClient.
+    Anything with the same four coroutines can be injected into the sync engine.
+    """
+
+    def __init__(self, google_client=None, api_url: str = GMAIL_API_URL, batch_url: str = GMAIL_BATCH_URL):
+        self._google = google_client
+        self.api_url = api_url.rstrip("/")
+        self.batch_url = batch_url
+
+    @property
+    def google(self):
+        # Looked up per call, so the singleton never holds a client close_google_client() closed
+        return self._google if self._google is not None else get_google_client()
+
+    async def _get(self, access_token: str, path: str, params=None) -> dict:
+        resp = await self.google.request(
+            "GET",
+            f"{self.api_url}/users/me/{path}",
+            params=params,
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        if resp.status_code == 404 and path == "history":
+            raise HistoryExpired(404, resp.text)
+        if resp.status_code != 200:
+            raise GmailApiError(resp.status_code, resp.text)
+        return resp.json()
+
+    async def get_profile(self, access_token: str) -> dict:
+        return await self._get(access_token, "profile")
+
+    async def list_messages(self, access_token: str, page_token=None, max_results: int = 500, query=None) -> dict:
+        params = {"maxResults": max_results}
+        if page_token:
+            params["pageToken"] = page_token
+        if query:
+            params["q"] = query
+        return await self._get(access_token, "messages", params)
+
+    async def list_history(self, access_token: str, start_history_id: str, page_token=None) -> dict:
+        params = [
+            ("startHistoryId", start_history_id),
+            ("historyTypes", "messageAdded"),
+            ("historyTypes", "messageDeleted"),
+            ("maxResults", 500),
+        ]
+        if page_token:
+            params.append(("pageToken", page_token))
+        return await self._get(access_token, "history", params)
+
+    async def batch_get_messages(self, access_token: str, message_ids: list[str]) -> list[dict]:
+        """
+        Fetch full messages through the multipart batch endpoint, up to BATCH_LIMIT
+        per HTTP request. Messages deleted in the meantime (404 parts) are skipped.
+        Parts answered with 429/5xx are re-requested on their own, with the same
+        backoff and attempt limit as GoogleClient.request.
+        """
+        messages = []
+        for start in range(0, len(message_ids), BATCH_LIMIT):
+            pending = message_ids[start:start + BATCH_LIMIT]
+            attempt = 0
+            while pending:
+                answers = await self._send_batch(access_token, pending)
+                retry, last_error = [], None
+                for message_id in pending:
+                    # A part missing from the response is retried like a 503
+                    status, payload = answers.get(message_id, (503, {"error": "no part in batch response"}))
+                    if status == 200:
+                        messages.append(payload)
+                    elif status in RETRY_STATUSES:
+                        retry.append(message_id)
+                        last_error = (status, payload)
+                    elif status != 404:
+                        raise GmailApiError(status, json.dumps(payload))
+                if retry:
+                    attempt += 1
+                    if attempt >= MAX_ATTEMPTS:
+                        raise GmailApiError(last_error[0], json.dumps(last_error[1]))
+                    logging.warning(f"Gmail batch: {len(retry)} parts returned {last_error[0]}, retrying those")
+                    await asyncio.sleep(_backoff(attempt - 1))
+                pending = retry
+        return messages
+
+    async def _send_batch(self, access_token: str, message_ids: list[str]):
+        """One batch request -> {message_id: (status, json body)}."""
+        boundary = f"batch_{uuid.uuid4().hex}"
+        resp = await self.google.request(
+            "POST",
+            self.batch_url,
+            content=_encode_batch(message_ids, boundary),
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "Content-Type": f"multipart/mixed; boundary={boundary}",
+            },
+        )
+        if resp.status_code != 200:
+            raise GmailApiError(resp.status_code, resp.text)
+        parts = _decode_batch(resp.content, resp.headers.get("content-type", ""))
+        answers = {}
+        for position, (item, status, payload) in enumerate(parts):
+            # Parts carry the request's Content-ID back as <response-itemN>; fall back to order
+            index = item if item is not None else position
+            if index < len(message_ids):
+                answers[message_ids[index]] = (status, payload)
+        return answers
+
+
+# ----------------------------------------------------------
+# multipart/mixed batch encoding
+# ----------------------------------------------------------
+
+def _encode_batch(message_ids: list[str], boundary: str) -> bytes:
+    parts = []
+    for i, message_id in enumerate(message_ids):
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <item{i}>\r\n\r\n"
+            f"GET /gmail/v1/users/me/messages/{message_id}?format=full\r\n\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return "".join(parts).encode()
+
+
+def _decode_batch(content: bytes, content_type: str):
+    """Yield (item index from the Content-ID or None, status, json body) for each embedded HTTP response."""
+    boundary = None
+    for param in content_type.split(";"):
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "boundary":
+            boundary = value.strip('"')
+    if not boundary:
+        raise GmailApiError(500, "Batch response has no multipart boundary")
+
+    for part in content.split(f"--{boundary}".encode()):
+        part = part.strip()
+        if not part or part == b"--":
+            continue
+        # part headers, then the embedded HTTP response (status line + headers), then its body
+        sections = part.replace(b"\r\n", b"\n").split(b"\n\n", 2)
+        if len(sections) < 3:
+            continue
+        item = None
+        match = CONTENT_ID_RE.search(sections[0])
+        if match:
+            item = int(match.group(1))
+        status_line = sections[1].split(b"\n", 1)[0].decode()
+        status = int(status_line.split(" ")[1])
+        try:
+            payload = json.loads(sections[2]) if sections[2].strip() else {}
+        except ValueError:
+            payload = {"raw": sections[2].decode(errors="replace")}
+        yield item, status, payload
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import os
+import random
+import time
+
+import httpx
+
+# Point this at a local stub for tests/benchmarks
+GOOGLE_TOKEN_URL = os.getenv("GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+DEFAULT_DEADLINE = 10.0     # seconds for the whole call, retries included
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 0.2
+BACKOFF_CAP = 2.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# For requests that must not run twice, only failures where nothing reached the server
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+UNSENT_STATUSES = {429}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _backoff(attempt: int, retry_after: str | None = None) -> float:
+    """Full-jitter exponential backoff; a numeric Retry-After header wins."""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_CAP)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class DeadlineExceeded(Exception):
+    """The call (including retries) ran past its deadline."""
+
+
+class GoogleClient:
+    """
+    Shared async HTTP client for Google endpoints. One instance per process keeps
+    TCP/TLS connections alive between calls (HTTP/2 when `h2` is installed).
+    """
+
+    def __init__(self, token_url: str = GOOGLE_TOKEN_URL, client: httpx.AsyncClient | None = None):
+        self.token_url = token_url
+        self.client = client or httpx.AsyncClient(
+            http2=_http2_available(),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    async def request(
+        self, method: str, url: str, deadline: float = DEFAULT_DEADLINE, idempotent: bool = True, **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request, retrying transport errors and 429/5xx with jittered backoff
+        until MAX_ATTEMPTS or the deadline runs out. The last response is returned
+        as-is so callers can inspect non-retryable errors.
+
+        With idempotent=False only connect failures and 429 are retried: after a
+        read timeout or a 5xx the server may already have acted on the request.
+        """
+        retry_errors = httpx.TransportError if idempotent else UNSENT_ERRORS
+        retry_statuses = RETRY_STATUSES if idempotent else UNSENT_STATUSES
+        end = time.monotonic() + deadline
+        attempt = 0
+        while True:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"{method} {url} exceeded {deadline}s deadline")
+
+            try:
+                resp = await self.client.request(method, url, timeout=remaining, **kwargs)
+            except retry_errors as e:
+                if attempt + 1 >= MAX_ATTEMPTS:
+                    raise
+                logging.warning(f"{method} {url} failed ({e!r}), retrying")
+                delay = _backoff(attempt)
+            else:
+                if resp.status_code not in retry_statuses or attempt + 1 >= MAX_ATTEMPTS:
+                    return resp
+                logging.warning(f"{method} {url} returned {resp.status_code}, retrying")
+                delay = _backoff(attempt, resp.headers.get("retry-after"))
+
+            attempt += 1
+            if time.monotonic() + delay >= end:
+                raise DeadlineExceeded(f"{method} {url} exceeded {deadline}s deadline")
+            await asyncio.sleep(delay)
+
+    async def exchange_code(self, client_id, code, code_verifier, redirect_uri, deadline: float = DEFAULT_DEADLINE):
+        """Authorization code (+ PKCE verifier) -> token response. Codes are single-use, so never resent."""
+        data = {
+            "client_id": client_id,
+            "grant_type": "authorization_code",
+            "code": code,
+            "code_verifier": code_verifier,
+            "redirect_uri": redirect_uri,
+        }
+        return await self.request("POST", self.token_url, data=data, deadline=deadline, idempotent=False)
+
+    async def refresh(self, client_id, refresh_token, client_secret=None, deadline: float = DEFAULT_DEADLINE):
+        """Refresh token -> fresh access token response."""
+        data = {
+            "client_id": client_id,
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+        }
+        if client_secret:
+            data["client_secret"] = client_secret
+        return await self.request("POST", self.token_url, data=data, deadline=deadline)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_google_client: GoogleClient | None = None
+
+
+def get_google_client() -> GoogleClient:
+    global _google_client
+    if _google_client is None:
+        _google_client = GoogleClient()
+    return _google_client
+
+
+def set_google_client(client: GoogleClient | None):
+    """Swap the process-wide client (tests, or a local stub endpoint)."""
+    global _google_client
+    _google_client = client
+
+
+async def close_google_client():
+    global _google_client
+    if _google_client is not None:
+        await _google_client.aclose()
+        _google_client = None
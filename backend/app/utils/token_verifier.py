@@ -0,0 +1,280 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+
+import httpx
+
+# jwt/cryptography are imported on first verification – they are a large share of app import time
+
+# Google publishes the Firebase ID token signing certs here (x509 PEM keyed by kid)
+FIREBASE_CERTS_URL = os.getenv(
+    "FIREBASE_CERTS_URL",
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com",
+)
+ISSUER_PREFIX = "https://securetoken.google.com/"
+
+DEFAULT_CERT_MAX_AGE = 3600     # used when the response has no Cache-Control
+MIN_REFRESH_INTERVAL = 30       # don't hammer Google when a token has an unknown kid (or the fetch fails)
+# Keep verifying with expired-but-cached keys this long when Google's cert endpoint is failing
+CERT_STALE_GRACE = int(os.getenv("FIREBASE_CERT_STALE_GRACE", "21600"))
+TOKEN_CACHE_SIZE = int(os.getenv("FIREBASE_TOKEN_CACHE_SIZE", "10000"))
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class TokenVerificationError(Exception):
+    """Raised when an ID token is malformed, badly signed or has invalid claims."""
+
+
+# ----------------------------------------------------------
+# Key sources
+# ----------------------------------------------------------
+
+class GoogleCertKeySource:
+    """Fetches Firebase signing certs over HTTP and honours Cache-Control max-age."""
+
+    def __init__(self, url: str = FIREBASE_CERTS_URL, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    async def fetch(self):
+        from cryptography.x509 import load_pem_x509_certificate
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            resp = await client.get(self.url)
+        resp.raise_for_status()
+
+        max_age = DEFAULT_CERT_MAX_AGE
+        match = _MAX_AGE_RE.search(resp.headers.get("cache-control", ""))
+        if match:
+            max_age = int(match.group(1))
+
+        keys = {
+            kid: load_pem_x509_certificate(pem.encode()).public_key()
+            for kid, pem in resp.json().items()
+        }
+        return keys, max_age
+
+
+class StaticKeySource:
+    """Serves a fixed {kid: public key} mapping, e.g. a local key set in tests."""
+
+    def __init__(self, keys: dict, max_age: int = DEFAULT_CERT_MAX_AGE):
+        self.keys = dict(keys)
+        self.max_age = max_age
+
+    async def fetch(self):
+        return dict(self.keys), self.max_age
+
+
+# ----------------------------------------------------------
+# Caches
+# ----------------------------------------------------------
+
+class KeyCache:
+    """
+    In-process cache of signing keys, refreshed on expiry or on an unseen kid.
+
+    If a refresh fails, the keys we already hold keep being served for up to
+    stale_grace seconds past their expiry (logged), retrying the fetch at most
+    every MIN_REFRESH_INTERVAL; only after that do verifications fail.
+    """
+
+    def __init__(self, source, clock=time.time, stale_grace: int = CERT_STALE_GRACE):
+        self.source = source
+        self.clock = clock
+        self.stale_grace = stale_grace
+        self._keys = {}
+        self._expires_at = 0.0
+        self._last_refresh = 0.0
+        self._retry_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, kid: str):
+        now = self.clock()
+        if now < self._retry_at:
+            pass    # the last fetch failed; serve what we have until the retry time
+        elif now >= self._expires_at:
+            await self._refresh(force=True)
+        elif kid not in self._keys and now - self._last_refresh >= MIN_REFRESH_INTERVAL:
+            # Google rotated keys before our cached copy expired
+            await self._refresh(force=False)
+        return self._keys.get(kid)
+
+    async def _refresh(self, force: bool):
+        last_seen = self._last_refresh
+        async with self._lock:
+            # Another coroutine refreshed (or failed to) while we were waiting for the lock
+            if self._last_refresh != last_seen or self.clock() < self._retry_at:
+                return
+            now = self.clock()
+            if not force and now - self._last_refresh < MIN_REFRESH_INTERVAL:
+                return
+            try:
+                keys, max_age = await self.source.fetch()
+            except Exception as e:
+                self._retry_at = now + MIN_REFRESH_INTERVAL
+                if not self._keys or now >= self._expires_at + self.stale_grace:
+                    self._keys = {}
+                    raise TokenVerificationError(f"Could not fetch Firebase signing keys: {e!r}") from e
+                logging.error(f"Firebase signing key refresh failed, serving cached keys: {e!r}")
+                return
+            self._retry_at = 0.0
+            self._keys = keys
+            self._last_refresh = now
+            self._expires_at = now + max_age
+            logging.info(f"Firebase signing keys refreshed ({len(keys)} keys, max-age {max_age}s)")
+
+
+class DecodedTokenCache:
+    """Bounded LRU of verified tokens keyed by token hash, each entry expiring at the token's exp."""
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE, clock=time.time):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str):
+        """The cached claims (shared – callers hand out copies) or None."""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, claims = entry
+        if self.clock() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    def put(self, token: str, claims: dict, expires_at: float):
+        key = self._key(token)
+        self._entries[key] = (expires_at, claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# ----------------------------------------------------------
+# Verifier
+# ----------------------------------------------------------
+
+class FirebaseTokenVerifier:
+    """
+    Verifies Firebase ID tokens locally against cached Google signing keys.
+    Checks mirror firebase_admin.auth.verify_id_token: RS256 signature, aud,
+    iss, exp/iat, auth_time in the past and a non-empty sub (exposed as "uid").
+    Each call returns its own copy of the claims.
+    """
+
+    def __init__(self, project_id: str, key_source=None, token_cache=None, clock=time.time, leeway: int = 0):
+        if not project_id:
+            raise ValueError("project_id is required to verify Firebase ID tokens")
+        self.project_id = project_id
+        self.issuer = ISSUER_PREFIX + project_id
+        self.clock = clock
+        self.leeway = leeway
+        self.keys = KeyCache(key_source or GoogleCertKeySource(), clock=clock)
+        self.token_cache = token_cache if token_cache is not None else DecodedTokenCache(clock=clock)
+
+    async def verify(self, id_token: str) -> dict:
+        cached = self.token_cache.get(id_token)
+        if cached is not None:
+            return dict(cached)
+
+        import jwt
+
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(f"Malformed token: {e}") from e
+
+        if header.get("alg") != "RS256":
+            raise TokenVerificationError(f"Unexpected algorithm: {header.get('alg')}")
+
+        kid = header.get("kid")
+        if not kid:
+            raise TokenVerificationError("Token has no kid header")
+
+        key = await self.keys.get(kid)
+        if key is None:
+            raise TokenVerificationError(f"No signing key found for kid {kid}")
+
+        claims = self._decode(id_token, key)
+
+        claims["uid"] = claims["sub"]
+        self.token_cache.put(id_token, claims, float(claims["exp"]))
+        return dict(claims)
+
+    def _decode(self, id_token: str, key) -> dict:
+        import jwt
+
+        try:
+            # exp/iat are checked against our own clock below so tests can inject one
+            claims = jwt.decode(
+                id_token,
+                key=key,
+                algorithms=["RS256"],
+                audience=self.project_id,
+                issuer=self.issuer,
+                options={"verify_exp": False, "verify_iat": False, "require": ["exp", "iat", "sub", "auth_time"]},
+            )
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(str(e)) from e
+
+        now = self.clock()
+        if now >= claims["exp"] + self.leeway:
+            raise TokenVerificationError("Token has expired")
+        if claims["iat"] > now + self.leeway:
+            raise TokenVerificationError("Token issued in the future")
+        auth_time = claims["auth_time"]
+        if isinstance(auth_time, bool) or not isinstance(auth_time, (int, float)) or auth_time > now + self.leeway:
+            raise TokenVerificationError("Token has an invalid auth_time claim")
+        if not isinstance(claims["sub"], str) or not claims["sub"] or len(claims["sub"]) > 128:
+            raise TokenVerificationError("Token has an invalid sub claim")
+        return claims
+
+
+def resolve_project_id() -> str | None:
+    """FIREBASE_PROJECT_ID from env, falling back to the service account key file."""
+    project_id = os.getenv("FIREBASE_PROJECT_ID")
+    if project_id:
+        return project_id
+
+    cred_path = os.path.join(os.path.dirname(__file__), "..", "core", "credentials.json")
+    try:
+        with open(cred_path, encoding="utf-8") as f:
+            return json.load(f).get("project_id")
+    except (OSError, ValueError):
+        return None
+
+
+_verifier: FirebaseTokenVerifier | None = None
+
+
+def get_token_verifier() -> FirebaseTokenVerifier:
+    global _verifier
+    if _verifier is None:
+        _verifier = FirebaseTokenVerifier(resolve_project_id())
+    return _verifier
+
+
+def set_token_verifier(verifier: FirebaseTokenVerifier | None):
+    """Swap the process-wide verifier (tests, or a custom key source)."""
+    global _verifier
+    _verifier = verifier
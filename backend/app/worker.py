@@ -0,0 +1,33 @@
+# Standalone job worker: drains the jobs table without serving HTTP.
+#   python -m app.worker
+# Run as many of these as needed; claims use SKIP LOCKED so they don't collide.
+import asyncio
+import logging
+
+from app.core.database import engine
+from app.services.job_queue import build_scheduler, get_job_queue
+from app.services.token_broker import get_token_broker
+from app.utils.google_client import close_google_client
+
+
+async def main():
+    broker = get_token_broker()
+    await broker.start()
+    tasks = [
+        asyncio.create_task(get_job_queue().work()),
+        asyncio.create_task(build_scheduler().run()),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await broker.stop()
+        await close_google_client()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
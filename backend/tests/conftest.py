@@ -0,0 +1,40 @@
+"""
+Shared fixtures. Tests run against a throwaway SQLite file (aiosqlite) and
+in-process fakes for Google; nothing touches the network.
+
+Async tests use the anyio pytest plugin (ships with anyio, an httpx/starlette
+dependency): mark them @pytest.mark.anyio.
+"""
+import os
+import tempfile
+
+# app.core.database reads DATABASE_URL at import time, so set it before any app import
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='unidash-tests-'), 'test.db')}"
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.utils.google_client import GoogleClient  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def session_factory():
+    """Fresh schema per test; yields the app's SessionLocal."""
+    import app.models  # noqa: F401 – registers every table on Base
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield SessionLocal
+    await engine.dispose()
+
+
+def fake_google(handler) -> GoogleClient:
+    """GoogleClient whose requests are answered by `handler(request) -> httpx.Response`."""
+    return GoogleClient(token_url="http://google.test/token", client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
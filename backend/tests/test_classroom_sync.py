@@ -0,0 +1,105 @@
+import pytest
+
+from app.models.classroom import ClassroomAnnouncement, ClassroomSyncState
+from app.services.classroom_sync import ClassroomIngestor
+
+pytestmark = pytest.mark.anyio
+
+
+def announcement(n, day):
+    return {"id": f"a{n}", "text": f"note {n}", "updateTime": f"2024-01-{day:02d}T10:00:00Z"}
+
+
+class FakeClassroom:
+    """One course; announcements newest first, ETags that change whenever the feed does."""
+
+    def __init__(self):
+        self.announcements = [announcement(n, 10 + n) for n in range(3)]
+        self.calls = []
+        self.fail_courses = set()
+
+    def _etag(self, items):
+        return f"v{len(items)}:{max((i['updateTime'] for i in items), default='')}"
+
+    async def list_courses(self, token, page_token=None, etag=None):
+        self.calls.append(("courses", etag))
+        courses = [{"id": "c1", "name": "Data Structures"}, {"id": "c2", "name": "Networks"}]
+        return ({"courses": courses}, "courses-v1") if etag != "courses-v1" else (None, etag)
+
+    async def list_announcements(self, token, course_id, page_token=None, etag=None):
+        self.calls.append(("announcements", course_id, etag))
+        if course_id in self.fail_courses:
+            raise RuntimeError("403 Forbidden")
+        items = sorted(self.announcements, key=lambda i: i["updateTime"], reverse=True) if course_id == "c1" else []
+        current = self._etag(items)
+        if etag == current:
+            return None, etag
+        return {"announcements": items}, current
+
+    async def list_coursework(self, token, course_id, page_token=None, etag=None):
+        self.calls.append(("coursework", course_id, etag))
+        return {"courseWork": []}, None
+
+
+class FakeBroker:
+    async def get_access_token(self, uid):
+        return "token"
+
+
+async def count(session_factory, model):
+    from sqlalchemy import func, select
+    async with session_factory() as db:
+        return (await db.execute(select(func.count()).select_from(model))).scalar()
+
+
+async def test_etag_and_watermark_skip_unchanged_feeds(session_factory):
+    api = FakeClassroom()
+    ingestor = ClassroomIngestor(api, FakeBroker(), session_factory, min_repoll_interval=0)
+
+    first = await ingestor.sync_user("u1")
+    assert first["announcements"] == 3
+
+    # Nothing changed: course list and feed answer 304 via the stored ETags, nothing is written
+    api.calls.clear()
+    assert (await ingestor.sync_user("u1"))["announcements"] == 0
+    assert ("courses", "courses-v1") in api.calls
+
+    # One new item: the scan stops at the watermark, so only it is written
+    api.announcements.append(announcement(9, 28))
+    assert (await ingestor.sync_user("u1"))["announcements"] == 1
+    assert await count(session_factory, ClassroomAnnouncement) == 4
+
+    async with session_factory() as db:
+        state = await db.get(ClassroomSyncState, "user:u1:c1:announcements")
+    assert state.watermark.day == 28
+
+
+async def test_state_is_per_student(session_factory):
+    api = FakeClassroom()
+    ingestor = ClassroomIngestor(api, FakeBroker(), session_factory, min_repoll_interval=3600)
+    await ingestor.sync_user("u1")
+
+    # u1's recent poll must not make u2's first sync skip the feeds
+    assert (await ingestor.sync_user("u2"))["announcements"] == 3
+    # ...but u1's own repoll inside the interval is skipped
+    api.calls.clear()
+    await ingestor.sync_user("u1")
+    assert not [c for c in api.calls if c[0] == "announcements"]
+
+
+async def test_failing_course_does_not_fail_the_sync(session_factory):
+    api = FakeClassroom()
+    api.fail_courses.add("c2")
+    ingestor = ClassroomIngestor(api, FakeBroker(), session_factory, min_repoll_interval=0)
+
+    counts = await ingestor.sync_user("u1")
+    assert counts["announcements"] == 3
+    assert counts["failed_feeds"] == 1
+
+
+async def test_rate_limit_budget_carries_across_syncs(session_factory):
+    ingestor = ClassroomIngestor(FakeClassroom(), FakeBroker(), session_factory, rate=0.001, burst=20, min_repoll_interval=0)
+    # Each sync: 1 course list + 2 courses x 2 feeds = 5 requests, drawn from the same bucket
+    await ingestor.sync_user("u1")
+    await ingestor.sync_user("u1")
+    assert ingestor._limiter("u1").tokens == pytest.approx(10, abs=0.1)
@@ -0,0 +1,92 @@
+import json
+
+import httpx
+import pytest
+
+from app.utils import gmail_api
+from app.utils.gmail_api import GmailApiError, HttpGmailApi
+from conftest import fake_google
+
+pytestmark = pytest.mark.anyio
+
+
+def batch_response(parts):
+    """multipart/mixed body for [(item index, status, body)] in the order given."""
+    out = ""
+    for item, status, body in parts:
+        out += (
+            "--resp\r\nContent-Type: application/http\r\n"
+            f"Content-ID: <response-item{item}>\r\n\r\n"
+            f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n\r\n{json.dumps(body)}\r\n"
+        )
+    return httpx.Response(200, content=(out + "--resp--").encode(), headers={"content-type": "multipart/mixed; boundary=resp"})
+
+
+def requested_ids(request):
+    return [line.split("/messages/")[1].split("?")[0] for line in request.content.decode().splitlines() if line.startswith("GET ")]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(gmail_api, "_backoff", lambda attempt, retry_after=None: 0)
+
+
+async def test_batch_retries_only_throttled_parts():
+    # m1 ok, m2 deleted (404), m3 throttled once, m4 a 503 once; parts answered out of order
+    calls = []
+    flaky = {"m3": 429, "m4": 503}
+
+    def handler(request):
+        ids = requested_ids(request)
+        calls.append(ids)
+        parts = []
+        for item, message_id in reversed(list(enumerate(ids))):
+            if message_id == "m2":
+                parts.append((item, 404, {"error": "gone"}))
+            elif message_id in flaky:
+                parts.append((item, flaky.pop(message_id), {"error": "slow down"}))
+            else:
+                parts.append((item, 200, {"id": message_id}))
+        return batch_response(parts)
+
+    api = HttpGmailApi(fake_google(handler), batch_url="http://gmail.test/batch")
+    messages = await api.batch_get_messages("token", ["m1", "m2", "m3", "m4"])
+
+    assert sorted(m["id"] for m in messages) == ["m1", "m3", "m4"]
+    assert calls == [["m1", "m2", "m3", "m4"], ["m3", "m4"]]
+
+
+async def test_batch_gives_up_after_max_attempts():
+    calls = []
+
+    def handler(request):
+        ids = requested_ids(request)
+        calls.append(ids)
+        return batch_response([(i, 429, {"error": "slow down"}) if m == "m2" else (i, 200, {"id": m}) for i, m in enumerate(ids)])
+
+    api = HttpGmailApi(fake_google(handler), batch_url="http://gmail.test/batch")
+    with pytest.raises(GmailApiError) as err:
+        await api.batch_get_messages("token", ["m1", "m2"])
+    assert err.value.status == 429
+    assert len(calls) == gmail_api.MAX_ATTEMPTS
+
+
+async def test_batch_retries_parts_missing_from_the_response():
+    calls = []
+
+    def handler(request):
+        ids = requested_ids(request)
+        calls.append(ids)
+        return batch_response([(0, 200, {"id": ids[0]})])   # only the first part comes back
+
+    api = HttpGmailApi(fake_google(handler), batch_url="http://gmail.test/batch")
+    messages = await api.batch_get_messages("token", ["m1", "m2"])
+    assert [m["id"] for m in messages] == ["m1", "m2"]
+    assert calls == [["m1", "m2"], ["m2"]]
+
+
+async def test_batch_other_part_errors_fail_fast():
+    api = HttpGmailApi(fake_google(lambda r: batch_response([(0, 403, {"error": "forbidden"})])), batch_url="http://gmail.test/batch")
+    with pytest.raises(GmailApiError) as err:
+        await api.batch_get_messages("token", ["m1"])
+    assert err.value.status == 403
@@ -0,0 +1,122 @@
+import base64
+
+import pytest
+from sqlalchemy import select
+
+from app.models.mailSync import MailMessage, MailSyncCursor
+from app.services.gmail_sync import GmailSyncEngine, message_row
+from app.utils.gmail_api import HistoryExpired
+
+pytestmark = pytest.mark.anyio
+
+
+def gmail_message(message_id, text="hello"):
+    data = base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+    return {
+        "id": message_id,
+        "threadId": "t1",
+        "historyId": "5",
+        "internalDate": "1700000000000",
+        "labelIds": ["INBOX"],
+        "payload": {
+            "mimeType": "multipart/alternative",
+            "headers": [{"name": "From", "value": "office@charusat.ac.in"}, {"name": "Subject", "value": "Fees"}],
+            "parts": [
+                {"mimeType": "text/html", "body": {"data": base64.urlsafe_b64encode(b"<p>html</p>").decode()}},
+                {"mimeType": "text/plain", "body": {"data": data}},
+            ],
+        },
+    }
+
+
+class FakeGmail:
+    """Mailbox with a history window: startHistoryId below `oldest_history` is expired (404)."""
+
+    def __init__(self, message_ids):
+        self.box = {m: gmail_message(m) for m in message_ids}
+        self.history_id = 100
+        self.oldest_history = 50
+        self.history = []
+        self.calls = []
+
+    async def get_profile(self, token):
+        self.calls.append("profile")
+        return {"historyId": str(self.history_id)}
+
+    async def list_messages(self, token, page_token=None, max_results=500, query=None):
+        self.calls.append("list")
+        return {"messages": [{"id": m} for m in sorted(self.box)]}
+
+    async def list_history(self, token, start_history_id, page_token=None):
+        self.calls.append(("history", start_history_id))
+        if int(start_history_id) < self.oldest_history:
+            raise HistoryExpired(404, "Requested entity was not found.")
+        return {"historyId": str(self.history_id), "history": self.history}
+
+    async def batch_get_messages(self, token, message_ids):
+        return [self.box[m] for m in message_ids if m in self.box]
+
+
+class FakeBroker:
+    async def get_access_token(self, uid):
+        return "token"
+
+
+async def stored_ids(session_factory, uid="u1"):
+    async with session_factory() as db:
+        return sorted((await db.scalars(select(MailMessage.message_id).where(MailMessage.uid == uid))).all())
+
+
+async def cursor(session_factory, uid="u1"):
+    async with session_factory() as db:
+        return await db.get(MailSyncCursor, uid)
+
+
+async def test_first_sync_is_full_then_deltas(session_factory):
+    api = FakeGmail(["m1", "m2", "m3"])
+    engine = GmailSyncEngine(api, FakeBroker(), session_factory)
+
+    assert await engine.sync_user("u1") == 3
+    assert (await cursor(session_factory)).history_id == "100"
+
+    api.box["m4"] = gmail_message("m4")
+    api.history = [{"messagesAdded": [{"message": {"id": "m4"}}]}, {"messagesDeleted": [{"message": {"id": "m1"}}]}]
+    api.history_id = 110
+    api.calls.clear()
+    assert await engine.sync_user("u1") == 1
+    assert api.calls == [("history", "100")]
+    assert await stored_ids(session_factory) == ["m2", "m3", "m4"]
+    assert (await cursor(session_factory)).history_id == "110"
+
+
+async def test_expired_history_falls_back_to_full_sync(session_factory):
+    api = FakeGmail(["m1", "m2"])
+    engine = GmailSyncEngine(api, FakeBroker(), session_factory)
+    async with session_factory() as db:
+        db.add(MailSyncCursor(uid="u1", history_id="10", messages_synced=0))
+        await db.commit()
+
+    assert await engine.sync_user("u1") == 2
+    assert api.calls == [("history", "10"), "profile", "list"]
+    state = await cursor(session_factory)
+    assert state.history_id == "100"
+    assert state.full_synced_at is not None
+    assert state.last_error is None
+
+
+async def test_failure_is_recorded_on_the_cursor(session_factory):
+    class Broken(FakeGmail):
+        async def get_profile(self, token):
+            raise RuntimeError("Gmail API error 500")
+
+    engine = GmailSyncEngine(Broken([]), FakeBroker(), session_factory)
+    with pytest.raises(RuntimeError):
+        await engine.sync_user("u1")
+    assert "500" in (await cursor(session_factory)).last_error
+
+
+def test_message_row_prefers_plain_text():
+    row = message_row("u1", gmail_message("m1", text="Pay fees by Friday"))
+    assert row["body"] == "Pay fees by Friday"
+    assert row["sender"] == "office@charusat.ac.in"
+    assert row["label_ids"] == "INBOX"
@@ -0,0 +1,65 @@
+"""
+Import-time budget for app.main.
+
+    python -m pytest tests/test_import_budget.py          (from backend/)
+
+Imports app.main in fresh interpreters and fails if the best of N runs is
+slower than IMPORT_BUDGET_SECONDS, or if the import opened the database or
+pulled in modules that should only load on first use.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.5"))
+RUNS = int(os.getenv("IMPORT_BUDGET_RUNS", "5"))
+
+# Must stay lazy: loaded on first token verification / first use only
+LAZY_MODULES = ["jwt", "cryptography.x509"]
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def imports(tmp_path_factory):
+    """Best import time, lazy modules loaded, and whether the database file was created."""
+    db_path = tmp_path_factory.mktemp("import_budget") / "budget.db"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}", "PYTHONPATH": BACKEND_DIR}
+
+    timings, loaded = [], set()
+    for _ in range(RUNS):
+        out = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", PROBE],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        loaded.update(result["loaded"])
+
+    # SQLite creates the file on first connect, so its absence proves no connection/DDL at import
+    return {"best": min(timings), "loaded": loaded, "touched_db": db_path.exists()}
+
+
+def test_import_within_budget(imports):
+    assert imports["best"] <= IMPORT_BUDGET_SECONDS, (
+        f"import took {imports['best']:.3f}s over {RUNS} runs, budget is {IMPORT_BUDGET_SECONDS:.3f}s"
+    )
+
+
+def test_import_keeps_modules_lazy(imports):
+    assert not imports["loaded"], f"eagerly imported: {', '.join(sorted(imports['loaded']))}"
+
+
+def test_import_does_not_touch_database(imports):
+    assert not imports["touched_db"], "importing app.main connected to the database"
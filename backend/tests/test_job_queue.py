@@ -0,0 +1,140 @@
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models.job import Job
+from app.services import job_queue
+from app.services.job_queue import JobQueue
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def queue(session_factory, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_RETRY_BASE", 0)
+    return JobQueue(session_factory, worker_id="w1")
+
+
+async def jobs(session_factory, **where):
+    async with session_factory() as db:
+        stmt = select(Job).order_by(Job.id)
+        for column, value in where.items():
+            stmt = stmt.where(getattr(Job, column) == value)
+        return list((await db.scalars(stmt)).all())
+
+
+async def test_duplicate_enqueue_is_a_noop(queue, session_factory):
+    assert await queue.enqueue("sync", "u1") is True
+    assert await queue.enqueue("sync", "u1") is False
+    assert await queue.enqueue("sync", "u2") is True
+    assert await queue.enqueue("other", "u1") is True
+    assert len(await jobs(session_factory)) == 3
+
+    # Once the queued job is claimed, new work for the same user can queue again
+    await queue.claim(10)
+    assert await queue.enqueue("sync", "u1") is True
+
+
+async def test_claim_leases_jobs_once(queue, session_factory):
+    await queue.enqueue("sync", "u1")
+    other = JobQueue(session_factory, worker_id="w2")
+
+    claimed = await queue.claim(10)
+    assert [j.uid for j in claimed] == ["u1"]
+    assert claimed[0].attempts == 1
+    assert await other.claim(10) == []
+
+
+async def test_expired_lease_is_reclaimed(queue, session_factory):
+    await queue.enqueue("sync", "u1")
+    [job] = await queue.claim(1)
+    # The worker holding it died: nothing extends the lease
+    async with session_factory() as db:
+        await db.execute(update(Job).where(Job.id == job.id).values(locked_until=datetime.datetime.utcnow() - datetime.timedelta(seconds=1)))
+        await db.commit()
+
+    other = JobQueue(session_factory, worker_id="w2")
+    [reclaimed] = await other.claim(1)
+    assert reclaimed.id == job.id
+    assert reclaimed.locked_by == "w2"
+    assert reclaimed.attempts == 2
+
+    # The dead worker's late result is discarded
+    await queue._finish(job, status="done", error=None)
+    assert (await jobs(session_factory))[0].status == "running"
+
+
+async def test_failure_requeues_then_gives_up(queue, session_factory):
+    async def broken(uid, payload):
+        raise RuntimeError("boom")
+
+    queue.register("sync", broken)
+    await queue.enqueue("sync", "u1", max_attempts=2)
+
+    [job] = await queue.claim(1)
+    await queue.run_job(job)
+    [state] = await jobs(session_factory)
+    assert (state.status, state.attempts, state.last_error) == ("queued", 1, "boom")
+
+    [job] = await queue.claim(1)
+    await queue.run_job(job)
+    [state] = await jobs(session_factory)
+    assert (state.status, state.attempts) == ("failed", 2)
+
+
+async def test_failed_job_superseded_by_fresh_enqueue(queue, session_factory):
+    await queue.enqueue("sync", "u1")
+    [job] = await queue.claim(1)
+    assert await queue.enqueue("sync", "u1") is True
+
+    await queue._fail(job, "boom")
+    states = [(j.status, j.last_error) for j in await jobs(session_factory)]
+    assert states == [("failed", "superseded by a queued job: boom"), ("queued", None)]
+
+
+async def test_heartbeat_keeps_a_slow_job_leased(session_factory, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_LEASE_SECONDS", 0.3)
+    runs = []
+
+    async def slow(uid, payload):
+        runs.append(uid)
+        await asyncio.sleep(1.0)
+
+    workers = [JobQueue(session_factory, worker_id=f"w{i}") for i in range(2)]
+    for worker in workers:
+        worker.register("slow", slow)
+    await workers[0].enqueue("slow", "u1")
+
+    tasks = [asyncio.create_task(w.work(concurrency=1, poll_interval=0.05)) for w in workers]
+    await asyncio.sleep(1.5)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert runs == ["u1"]
+    assert (await jobs(session_factory))[0].status == "done"
+
+
+async def test_enqueue_in_caller_transaction_wakes_after_commit(queue, session_factory):
+    async with session_factory() as db:
+        await queue.enqueue("sync", "u1", db=db)
+        assert not queue._wakeup.is_set()
+        assert await jobs(session_factory) == []
+        await db.commit()
+    assert queue._wakeup.is_set()
+    assert len(await jobs(session_factory)) == 1
+
+
+async def test_prune_deletes_old_finished_jobs(queue, session_factory):
+    for uid in ("u1", "u2", "u3"):
+        await queue.enqueue("sync", uid)
+    async with session_factory() as db:
+        old = datetime.datetime.utcnow() - datetime.timedelta(days=30)
+        await db.execute(update(Job).where(Job.uid == "u1").values(status="done", updated_at=old))
+        await db.execute(update(Job).where(Job.uid == "u2").values(status="done"))
+        await db.commit()
+
+    assert await queue.prune() == 1
+    assert [j.uid for j in await jobs(session_factory)] == ["u2", "u3"]
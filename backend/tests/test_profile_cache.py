@@ -0,0 +1,121 @@
+import pytest
+
+from app.core.profile_cache import LRUBackend, ProfileCache, RedisBackend
+from app.models.schemas.user_schema import UserOut
+
+pytestmark = pytest.mark.anyio
+
+
+def profile(name="Asha"):
+    return UserOut(uid="u1", email="u1@x.in", name=name, profile_completed=True, oauth_connected=False)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def test_invalidate_drops_the_entry():
+    cache = ProfileCache(LRUBackend())
+    await cache.set("u1", profile(), await cache.generation("u1"))
+    assert (await cache.get("u1")).name == "Asha"
+
+    await cache.invalidate("u1")
+    assert await cache.get("u1") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+async def test_entries_expire():
+    clock = Clock()
+    cache = ProfileCache(LRUBackend(ttl=10, clock=clock))
+    await cache.set("u1", profile(), await cache.generation("u1"))
+    clock.now = 10
+    assert await cache.get("u1") is None
+
+
+async def test_lru_evicts_oldest():
+    cache = ProfileCache(LRUBackend(maxsize=2))
+    for uid in ("a", "b", "c"):
+        await cache.set(uid, profile(uid), await cache.generation(uid))
+    assert await cache.get("a") is None
+    assert (await cache.get("c")).name == "c"
+
+
+async def test_broken_backend_is_a_miss():
+    class Broken:
+        async def get(self, uid):
+            raise ConnectionError("redis down")
+
+    cache = ProfileCache(Broken())
+    assert await cache.get("u1") is None
+    assert cache.stats()["errors"] == 1
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the few redis.asyncio calls RedisBackend makes."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, "0")) + 1)
+        return int(self.data[key])
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def eval(self, script, numkeys, entry_key, generation_key, expected, payload, ttl):
+        # RedisBackend.CHECK_AND_SET
+        if self.data.get(generation_key, "0") != expected:
+            return 0
+        self.data[entry_key] = payload
+        return 1
+
+
+@pytest.mark.parametrize("make_backend", [LRUBackend, lambda: RedisBackend(client=FakeRedis())], ids=["lru", "redis"])
+async def test_read_before_commit_cannot_repopulate(make_backend):
+    cache = ProfileCache(make_backend())
+    # Reader misses and reads the old row...
+    generation = await cache.generation("u1")
+    old = profile("before edit")
+    # ...the writer commits and invalidates...
+    await cache.invalidate("u1")
+    # ...and the reader's late set() is dropped
+    await cache.set("u1", old, generation)
+    assert await cache.get("u1") is None
+    assert cache.stats()["stale_writes"] == 1
+
+    # A read that starts after the invalidation caches normally
+    await cache.set("u1", profile("after edit"), await cache.generation("u1"))
+    assert (await cache.get("u1")).name == "after edit"
+
+
+async def test_lru_generation_floor_after_stamp_eviction():
+    backend = LRUBackend(maxsize=1)
+    cache = ProfileCache(backend)
+    generation = await cache.generation("u1")
+    await cache.invalidate("u1")
+    await cache.invalidate("u2")        # pushes u1's stamp out; the floor still covers it
+    await cache.set("u1", profile(), generation)
+    assert await cache.get("u1") is None
+
+
+async def test_stats_are_logged(caplog):
+    cache = ProfileCache(LRUBackend(), log_every=2)
+    with caplog.at_level("INFO"):
+        await cache.get("a")
+        await cache.get("b")
+    assert "Profile cache stats" in caplog.text
@@ -0,0 +1,106 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.models.oauthToken import OAuthToken
+from app.services.token_broker import TokenBroker, TokenRefreshError
+from conftest import fake_google
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+async def tokens(session_factory):
+    async with session_factory() as db:
+        db.add_all([OAuthToken(uid=uid, refresh_token=f"refresh-{uid}") for uid in ("u1", "u2")])
+        await db.commit()
+    return session_factory
+
+
+def google_refresh_endpoint(calls, delay=0.05, status=200):
+    async def handler(request):
+        calls.append(request.content.decode())
+        await asyncio.sleep(delay)
+        if status != 200:
+            return httpx.Response(status, json={"error": "invalid_grant"})
+        return httpx.Response(200, json={"access_token": f"access-{len(calls)}", "expires_in": 3600, "scope": "gmail"})
+    return handler
+
+
+async def test_concurrent_callers_share_one_refresh(tokens):
+    calls = []
+    broker = TokenBroker(fake_google(google_refresh_endpoint(calls)), tokens, "client", "secret")
+
+    results = await asyncio.gather(*(broker.get_access_token("u1") for _ in range(50)))
+    assert len(calls) == 1
+    assert set(results) == {"access-1"}
+
+    # Served from memory until REFRESH_MARGIN before expiry
+    assert await broker.get_access_token("u1") == "access-1"
+    assert len(calls) == 1
+
+
+async def test_cancelled_caller_does_not_cancel_the_refresh(tokens):
+    calls = []
+    broker = TokenBroker(fake_google(google_refresh_endpoint(calls, delay=0.1)), tokens, "client", "secret")
+
+    impatient = asyncio.create_task(broker.get_access_token("u1"))
+    patient = asyncio.create_task(broker.get_access_token("u1"))
+    await asyncio.sleep(0.02)
+    impatient.cancel()
+    assert await patient == "access-1"
+    assert len(calls) == 1
+
+
+async def test_refresh_again_near_expiry(tokens):
+    calls, clock = [], Clock()
+    broker = TokenBroker(fake_google(google_refresh_endpoint(calls, delay=0)), tokens, "client", "secret", clock=clock)
+    await broker.get_access_token("u1")
+    clock.now += 3600 - broker.refresh_margin
+    assert await broker.get_access_token("u1") == "access-2"
+
+
+async def test_refused_refresh_raises_and_is_not_cached(tokens):
+    calls = []
+    broker = TokenBroker(fake_google(google_refresh_endpoint(calls, delay=0, status=400)), tokens, "client", "secret")
+    for _ in range(2):
+        with pytest.raises(TokenRefreshError):
+            await broker.get_access_token("u1")
+    assert len(calls) == 2
+    with pytest.raises(TokenRefreshError, match="No Google account"):
+        await broker.get_access_token("nobody")
+
+
+async def test_writeback_is_batched(tokens):
+    calls = []
+    broker = TokenBroker(fake_google(google_refresh_endpoint(calls, delay=0)), tokens, "client", "secret")
+    await asyncio.gather(broker.get_access_token("u1"), broker.get_access_token("u2"))
+    await broker.flush()
+    async with tokens() as db:
+        scopes = (await db.scalars(select(OAuthToken.scopes))).all()
+    assert scopes == ["gmail", "gmail"]
+
+
+async def test_stop_cancels_proactive_refreshes(tokens, monkeypatch):
+    from app.services import token_broker
+    monkeypatch.setattr(token_broker, "SWEEP_INTERVAL", 0.01)
+    calls = []
+    broker = TokenBroker(fake_google(google_refresh_endpoint(calls, delay=10)), tokens, "client", "secret")
+    broker.prime("u1", "old", expires_in=1)
+
+    await broker.start()
+    await asyncio.sleep(0.1)
+    assert broker._proactive and calls
+    await broker.stop()
+    assert not broker._proactive
+    assert not broker._inflight
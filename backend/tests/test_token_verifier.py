@@ -0,0 +1,168 @@
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.utils.token_verifier import FirebaseTokenVerifier, StaticKeySource, TokenVerificationError
+
+pytestmark = pytest.mark.anyio
+
+PROJECT = "unidash-test"
+NOW = 1_700_000_000
+
+
+@pytest.fixture(scope="module")
+def private_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+class Clock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FailingKeySource:
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch(self):
+        self.calls += 1
+        raise OSError("cert endpoint unreachable")
+
+
+def make_token(private_key, kid="k1", **claims):
+    payload = {
+        "iss": f"https://securetoken.google.com/{PROJECT}",
+        "aud": PROJECT,
+        "sub": "user-1",
+        "iat": NOW - 60,
+        "exp": NOW + 3600,
+        "auth_time": NOW - 120,
+        "email": "student@charusat.edu.in",
+        **claims,
+    }
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+def make_verifier(private_key, clock=None, source=None):
+    source = source or StaticKeySource({"k1": private_key.public_key()})
+    return FirebaseTokenVerifier(PROJECT, key_source=source, clock=clock or Clock())
+
+
+async def test_good_token(private_key):
+    claims = await make_verifier(private_key).verify(make_token(private_key))
+    assert claims["uid"] == "user-1"
+    assert claims["email"] == "student@charusat.edu.in"
+
+
+async def test_expired_token(private_key):
+    verifier = make_verifier(private_key, clock=Clock(NOW + 3601))
+    with pytest.raises(TokenVerificationError, match="expired"):
+        await verifier.verify(make_token(private_key))
+
+
+async def test_cached_token_expires_with_its_exp(private_key):
+    clock = Clock()
+    verifier = make_verifier(private_key, clock=clock)
+    token = make_token(private_key)
+    await verifier.verify(token)
+    clock.now = NOW + 3601
+    with pytest.raises(TokenVerificationError, match="expired"):
+        await verifier.verify(token)
+
+
+async def test_wrong_audience(private_key):
+    with pytest.raises(TokenVerificationError):
+        await make_verifier(private_key).verify(make_token(private_key, aud="someone-else"))
+
+
+async def test_unknown_kid(private_key):
+    with pytest.raises(TokenVerificationError, match="No signing key"):
+        await make_verifier(private_key).verify(make_token(private_key, kid="rotated-away"))
+
+
+async def test_signed_by_another_key(private_key):
+    other = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    with pytest.raises(TokenVerificationError):
+        await make_verifier(private_key).verify(make_token(other))
+
+
+async def test_key_fetch_failure_without_cached_keys(private_key):
+    verifier = make_verifier(private_key, source=FailingKeySource())
+    with pytest.raises(TokenVerificationError, match="Could not fetch"):
+        await verifier.verify(make_token(private_key))
+
+
+class FlakyKeySource(StaticKeySource):
+    """Serves keys until `failing` is set, then raises like an unreachable endpoint."""
+
+    def __init__(self, keys, max_age=3600):
+        super().__init__(keys, max_age)
+        self.failing = False
+        self.calls = 0
+
+    async def fetch(self):
+        self.calls += 1
+        if self.failing:
+            raise OSError("cert endpoint unreachable")
+        return await super().fetch()
+
+
+async def test_stale_keys_served_while_fetch_fails(private_key):
+    clock = Clock()
+    source = FlakyKeySource({"k1": private_key.public_key()})
+    verifier = make_verifier(private_key, clock=clock, source=source)
+    await verifier.verify(make_token(private_key, sub="warm-up"))
+
+    # Keys expired and Google is down: still verifies with the cached keys, fetching once
+    source.failing = True
+    clock.now = NOW + 3600
+    for n in range(5):
+        claims = await verifier.verify(make_token(private_key, sub=f"user-{n}", exp=NOW + 7200))
+        assert claims["uid"] == f"user-{n}"
+    assert source.calls == 2
+
+    # Retried after MIN_REFRESH_INTERVAL, and recovers once the endpoint is back
+    source.failing = False
+    clock.now += 60
+    await verifier.verify(make_token(private_key, sub="after", exp=NOW + 7200))
+    assert source.calls == 3
+
+
+async def test_stale_keys_dropped_after_grace(private_key):
+    clock = Clock()
+    source = FlakyKeySource({"k1": private_key.public_key()})
+    verifier = make_verifier(private_key, clock=clock, source=source)
+    await verifier.verify(make_token(private_key, sub="warm-up"))
+
+    source.failing = True
+    clock.now = NOW + 3600 + verifier.keys.stale_grace
+    with pytest.raises(TokenVerificationError, match="Could not fetch"):
+        await verifier.verify(make_token(private_key, exp=clock.now + 60))
+
+
+async def test_claims_are_copies(private_key):
+    verifier = make_verifier(private_key)
+    token = make_token(private_key)
+    first = await verifier.verify(token)
+    first["uid"] = "tampered"
+    first["admin"] = True
+    second = await verifier.verify(token)
+    assert second["uid"] == "user-1"
+    assert "admin" not in second
+
+
+@pytest.mark.parametrize("auth_time", [NOW + 600, "yesterday", None])
+async def test_invalid_auth_time(private_key, auth_time):
+    claims = {"auth_time": auth_time} if auth_time is not None else {}
+    token = make_token(private_key, **claims)
+    if auth_time is None:
+        token = jwt.encode(
+            {k: v for k, v in jwt.decode(token, options={"verify_signature": False}).items() if k != "auth_time"},
+            private_key, algorithm="RS256", headers={"kid": "k1"},
+        )
+    with pytest.raises(TokenVerificationError):
+        await make_verifier(private_key).verify(token)
@@ -0,0 +1,103 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import Header
+from sqlalchemy import func, select
+
+from app.core.profile_cache import LRUBackend, ProfileCache, get_profile_cache
+from app.main import app
+from app.models.user import User
+from app.routers import user_routers
+from app.utils.firebase_util import verify_firebase_token
+
+pytestmark = pytest.mark.anyio
+
+
+async def fake_claims(x_test_uid: str = Header(...), x_test_email: str = Header("")):
+    return {"uid": x_test_uid, "email": x_test_email, "name": "Student"}
+
+
+@pytest.fixture
+async def client(session_factory):
+    cache = ProfileCache(LRUBackend())
+    app.dependency_overrides[verify_firebase_token] = fake_claims
+    app.dependency_overrides[get_profile_cache] = lambda: cache
+    # No lifespan: the broker and job worker are not needed for these routes
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        c.cache = cache
+        yield c
+    app.dependency_overrides.clear()
+
+
+def as_user(uid, email=""):
+    return {"X-Test-Uid": uid, "X-Test-Email": email}
+
+
+async def user_count(session_factory, uid):
+    async with session_factory() as db:
+        return (await db.execute(select(func.count()).select_from(User).where(User.uid == uid))).scalar()
+
+
+async def test_first_login_creates_profile(client, session_factory):
+    resp = await client.get("/user/profile", headers=as_user("u1", "u1@charusat.edu.in"))
+    assert resp.status_code == 200
+    assert resp.json()["email"] == "u1@charusat.edu.in"
+    assert resp.json()["profile_completed"] is False
+    assert await user_count(session_factory, "u1") == 1
+
+
+async def test_concurrent_first_logins(client, session_factory):
+    responses = await asyncio.gather(*(client.get("/user/profile", headers=as_user("u1", "u1@x.in")) for _ in range(10)))
+    assert [r.status_code for r in responses] == [200] * 10
+    assert await user_count(session_factory, "u1") == 1
+
+
+async def test_lost_race_reads_the_winners_row(client, session_factory, monkeypatch):
+    # The other request inserts between our SELECT (which saw nothing) and our INSERT
+    async with session_factory() as db:
+        db.add(User(uid="u1", email="u1@x.in", name="Winner", profile_completed=False))
+        await db.commit()
+    real_query = user_routers._profile_query
+    seen = []
+
+    def first_select_misses(uid):
+        seen.append(uid)
+        return real_query("nobody" if len(seen) == 1 else uid)
+
+    monkeypatch.setattr(user_routers, "_profile_query", first_select_misses)
+    resp = await client.get("/user/profile", headers=as_user("u1", "u1@x.in"))
+    assert resp.status_code == 200
+    assert resp.json()["name"] == "Winner"
+    assert await user_count(session_factory, "u1") == 1
+
+
+async def test_accounts_without_email_do_not_collide(client, session_factory):
+    for uid in ("phone-1", "phone-2"):
+        resp = await client.get("/user/profile", headers=as_user(uid))
+        assert resp.status_code == 200
+        assert resp.json()["email"] == ""
+    assert await user_count(session_factory, "phone-2") == 1
+
+
+async def test_email_taken_by_another_uid(client, session_factory):
+    assert (await client.get("/user/profile", headers=as_user("old-uid", "same@x.in"))).status_code == 200
+
+    resp = await client.get("/user/profile", headers=as_user("new-uid", "same@x.in"))
+    assert resp.status_code == 200
+    assert resp.json()["uid"] == "new-uid"
+    assert await user_count(session_factory, "new-uid") == 1
+    async with session_factory() as db:
+        assert (await db.get(User, "old-uid")).email == "same@x.in"
+
+
+async def test_profile_setup_returns_profile(client):
+    await client.get("/user/profile", headers=as_user("u1"))
+    resp = await client.put(
+        "/user/profile-setup",
+        json={"name": "Asha", "branch": "CE", "semester": 5, "sid": "22CE001"},
+        headers=as_user("u1"),
+    )
+    assert resp.status_code == 200
+    assert resp.json()["profile_completed"] is True
+    assert resp.json()["email"] == ""